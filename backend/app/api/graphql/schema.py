@@ -1,26 +1,53 @@
 """GraphQL schema and resolvers"""
 import strawberry
-from typing import List, Optional
-import uuid
+from strawberry.scalars import JSON
+from typing import AsyncGenerator, List, Optional
 
 from ...models.schemas import ChatRequest as ChatRequestModel, SearchRequest as SearchRequestModel
-from ...services.llm_service import llm_service
-from ...services.vector_service import vector_db_service
+from ...models.search_hit import SearchHit
+from ...services.chat_pipeline import get_chat_pipeline
+from ...services.llm_service import get_llm_service
+from ...services.vector_service import get_vector_db_service
+from ...services.ingestion_jobs import ingestion_job_manager
 
 
 # GraphQL Types
+@strawberry.type
+class StageTimings:
+    history_ms: float
+    prepare_ms: float
+    generation_ms: float
+    total_ms: float
+    retrieval_ms: Optional[float] = None
+    rerank_ms: Optional[float] = None
+
+
 @strawberry.type
 class ChatMessage:
     message: str
     conversation_id: str
     sources: Optional[List[str]] = None
+    prompt_tokens: Optional[int] = None
+    cached: bool = False
+    timings: Optional[StageTimings] = None
+
+
+@strawberry.type
+class ChatToken:
+    token: str
+    conversation_id: str
+    done: bool = False
+    sources: Optional[List[str]] = None
+    prompt_tokens: Optional[int] = None
+    ttft_ms: Optional[float] = None
+    timings: Optional[StageTimings] = None
 
 
 @strawberry.type
 class SearchResult:
     content: str
     score: float
-    metadata: str
+    metadata: JSON
 
 
 @strawberry.type
@@ -28,6 +55,47 @@ class DocumentResult:
     id: str
     content: str
     success: bool
+    chunks_added: int = 0
+    chunks_reused: int = 0
+
+
+@strawberry.type
+class IngestionJob:
+    job_id: str
+    status: str
+    total_documents: int
+    total_chunks: Optional[int]
+    committed_chunks: int
+    chunks_added: int
+    chunks_reused: int
+    chunks_per_second: float
+    document_ids: Optional[List[str]]
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+
+
+def _source_contents(sources: Optional[List[SearchHit]]) -> Optional[List[str]]:
+    """Reduce pipeline sources to their content"""
+    return [hit.content for hit in sources] if sources else None
+
+
+def _to_ingestion_job(job: dict) -> IngestionJob:
+    """Build a GraphQL ingestion job from the manager's status dict"""
+    return IngestionJob(
+        job_id=job["job_id"],
+        status=job["status"],
+        total_documents=job["total_documents"],
+        total_chunks=job["total_chunks"],
+        committed_chunks=job["committed_chunks"],
+        chunks_added=job["chunks_added"],
+        chunks_reused=job["chunks_reused"],
+        chunks_per_second=job["chunks_per_second"],
+        document_ids=job["document_ids"],
+        error=job["error"],
+        created_at=job["created_at"],
+        updated_at=job["updated_at"]
+    )
 
 
 # GraphQL Input Types
@@ -36,6 +104,10 @@ class ChatInput:
     message: str
     conversation_id: Optional[str] = None
     use_vector_db: bool = False
+    extra_queries: Optional[List[str]] = None
+    rerank: Optional[bool] = None
+    rerank_candidates: Optional[int] = None
+    context_token_budget: Optional[int] = None
 
 
 @strawberry.input
@@ -48,6 +120,8 @@ class DocumentInput:
 class SearchInput:
     query: str
     top_k: int = 5
+    alpha: Optional[float] = None
+    filter: Optional[JSON] = None
 
 
 # Queries
@@ -62,21 +136,29 @@ class Query:
     async def search(self, input: SearchInput) -> List[SearchResult]:
         """Search for documents in vector database"""
         try:
+            vector_db_service = await get_vector_db_service()
             results = await vector_db_service.search(
                 query=input.query,
-                top_k=input.top_k
+                top_k=input.top_k,
+                filter_metadata=input.filter,
+                alpha=input.alpha
             )
             
-            return [
-                SearchResult(
-                    content=r["content"],
-                    score=r["score"],
-                    metadata=str(r["metadata"])
-                )
-                for r in results
-            ]
+            # Search hits resolve the SearchResult fields directly
+            return results
         except Exception as e:
             raise Exception(f"Search failed: {str(e)}")
+    
+    @strawberry.field
+    async def ingestion_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Get the status and throughput of a background ingestion job"""
+        job = ingestion_job_manager.get_job(job_id)
+        return _to_ingestion_job(job) if job else None
+    
+    @strawberry.field
+    async def ingestion_jobs(self) -> List[IngestionJob]:
+        """List background ingestion jobs, newest first"""
+        return [_to_ingestion_job(job) for job in ingestion_job_manager.list_jobs()]
 
 
 # Mutations
@@ -86,31 +168,24 @@ class Mutation:
     async def chat(self, input: ChatInput) -> ChatMessage:
         """Send a chat message and get a response"""
         try:
-            conversation_id = input.conversation_id or str(uuid.uuid4())
-            
-            # Get context from vector DB if requested
-            context = None
-            sources = None
-            if input.use_vector_db:
-                search_results = await vector_db_service.search(
-                    query=input.message,
-                    top_k=3
-                )
-                if search_results:
-                    context = "\n\n".join([r["content"] for r in search_results])
-                    sources = [r["content"] for r in search_results]
-            
-            # Generate response
-            response_message = await llm_service.chat(
+            chat_pipeline = await get_chat_pipeline()
+            result = await chat_pipeline.chat(
                 message=input.message,
-                conversation_id=conversation_id,
-                context=context
+                conversation_id=input.conversation_id,
+                use_vector_db=input.use_vector_db,
+                extra_queries=input.extra_queries,
+                rerank=input.rerank,
+                rerank_candidates=input.rerank_candidates,
+                context_token_budget=input.context_token_budget
             )
             
             return ChatMessage(
-                message=response_message,
-                conversation_id=conversation_id,
-                sources=sources
+                message=result["message"],
+                conversation_id=result["conversation_id"],
+                sources=_source_contents(result["sources"]),
+                prompt_tokens=result["prompt_tokens"],
+                cached=result["cached"],
+                timings=StageTimings(**result["timings"])
             )
         except Exception as e:
             raise Exception(f"Chat failed: {str(e)}")
@@ -119,28 +194,120 @@ class Mutation:
     async def add_document(self, input: DocumentInput) -> DocumentResult:
         """Add a document to the vector database"""
         try:
-            doc_id = await vector_db_service.add_document(
+            vector_db_service = await get_vector_db_service()
+            result = await vector_db_service.add_document(
                 content=input.content,
                 metadata={"raw": input.metadata} if input.metadata else {}
             )
             
             return DocumentResult(
-                id=doc_id,
+                id=result["id"],
                 content=input.content,
-                success=True
+                success=True,
+                chunks_added=result["chunks_added"],
+                chunks_reused=result["chunks_reused"]
             )
         except Exception as e:
             raise Exception(f"Failed to add document: {str(e)}")
     
+    @strawberry.mutation
+    async def add_documents(self, inputs: List[DocumentInput]) -> List[DocumentResult]:
+        """Add a batch of documents to the vector database"""
+        try:
+            vector_db_service = await get_vector_db_service()
+            results = await vector_db_service.add_documents([
+                (input.content, {"raw": input.metadata} if input.metadata else {})
+                for input in inputs
+            ])
+            
+            return [
+                DocumentResult(
+                    id=result["id"],
+                    content=input.content,
+                    success=True,
+                    chunks_added=result["chunks_added"],
+                    chunks_reused=result["chunks_reused"]
+                )
+                for result, input in zip(results, inputs)
+            ]
+        except Exception as e:
+            raise Exception(f"Failed to add documents: {str(e)}")
+    
+    @strawberry.mutation
+    async def submit_ingestion_job(self, inputs: List[DocumentInput]) -> IngestionJob:
+        """Queue documents for background ingestion"""
+        try:
+            job = await ingestion_job_manager.submit([
+                (input.content, {"raw": input.metadata} if input.metadata else {})
+                for input in inputs
+            ])
+            return _to_ingestion_job(job)
+        except Exception as e:
+            raise Exception(f"Failed to submit ingestion job: {str(e)}")
+    
+    @strawberry.mutation
+    async def retry_ingestion_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Queue a failed ingestion job again, resuming from its last checkpoint"""
+        try:
+            job = await ingestion_job_manager.retry_job(job_id)
+            return _to_ingestion_job(job) if job else None
+        except Exception as e:
+            raise Exception(f"Failed to retry ingestion job: {str(e)}")
+    
+    @strawberry.mutation
+    async def delete_ingestion_job(self, job_id: str) -> bool:
+        """Delete an ingestion job and its submitted documents"""
+        try:
+            return ingestion_job_manager.delete_job(job_id)
+        except Exception as e:
+            raise Exception(f"Failed to delete ingestion job: {str(e)}")
+    
     @strawberry.mutation
     async def clear_conversation(self, conversation_id: str) -> bool:
         """Clear a conversation history"""
         try:
+            llm_service = await get_llm_service()
             llm_service.clear_conversation(conversation_id)
             return True
         except:
             return False
 
 
+# Subscriptions
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def chat_stream(self, input: ChatInput) -> AsyncGenerator[ChatToken, None]:
+        """Stream a chat response token by token, ending with a done marker"""
+        try:
+            chat_pipeline = await get_chat_pipeline()
+            turn = await chat_pipeline.prepare(
+                message=input.message,
+                conversation_id=input.conversation_id,
+                use_vector_db=input.use_vector_db,
+                extra_queries=input.extra_queries,
+                rerank=input.rerank,
+                rerank_candidates=input.rerank_candidates,
+                context_token_budget=input.context_token_budget
+            )
+            conversation_id = turn["conversation_id"]
+            
+            async for event in chat_pipeline.stream(turn):
+                if event.get("done"):
+                    yield ChatToken(
+                        token="",
+                        conversation_id=conversation_id,
+                        done=True,
+                        sources=_source_contents(event["sources"]),
+                        prompt_tokens=event["prompt_tokens"],
+                        ttft_ms=event["ttft_ms"],
+                        timings=StageTimings(**event["timings"])
+                    )
+                else:
+                    yield ChatToken(token=event["token"], conversation_id=conversation_id)
+        except Exception as e:
+            raise Exception(f"Chat stream failed: {str(e)}")
+
+
 # Create schema
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(query=Query, mutation=Mutation, subscription=Subscription)
@@ -1,24 +1,37 @@
 """REST API endpoints"""
-from fastapi import APIRouter, HTTPException
-from typing import List
-import uuid
+import codecs
+import json
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from ...models.schemas import (
     ChatRequest,
     ChatResponse,
     DocumentInput,
     DocumentResponse,
+    DocumentUploadResponse,
+    BulkDocumentInput,
+    BulkDocumentResponse,
+    IngestionJobStatus,
     SearchRequest,
     SearchResult,
     HealthResponse
 )
-from ...services.llm_service import llm_service
-from ...services.vector_service import vector_db_service
+from .responses import FastJSONResponse, dumps
+from ...services.chat_pipeline import chat_pipeline_provider, get_chat_pipeline
+from ...services.reranker import reranker_provider
+from ...services.llm_service import get_llm_service, llm_provider
+from ...services.vector_service import get_vector_db_service, vector_db_provider
+from ...services.ingestion_jobs import ingestion_job_manager
 from ...core.config import settings
 
 
 router = APIRouter()
 
+# Bytes read from an uploaded file at a time
+_UPLOAD_READ_SIZE = 1024 * 1024
+
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -31,41 +44,112 @@ async def health_check():
     )
 
 
+@router.get("/health/live")
+async def liveness():
+    """Liveness probe - the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Readiness probe - services are created and models loaded
+    
+    Returns 503 until warm-up finishes, so load balancers only route
+    traffic to workers that can answer without a cold start.
+    """
+    services = {
+        provider.name: provider.status()
+        for provider in (llm_provider, vector_db_provider, chat_pipeline_provider)
+    }
+    ready = all(service["ready"] for service in services.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "services": services}
+    )
+
+
+@router.get("/metrics")
+async def metrics():
+    """Service performance metrics, for services that have been created"""
+    return {
+        "llm": llm_provider.instance.stats() if llm_provider.ready else None,
+        "vector_db": vector_db_provider.instance.stats() if vector_db_provider.ready else None,
+        "reranker": reranker_provider.instance.stats() if reranker_provider.ready else None
+    }
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
     Chat endpoint - Send a message and get a response
     """
     try:
-        # Generate or use existing conversation ID
-        conversation_id = request.conversation_id or str(uuid.uuid4())
-        
-        # Get context from vector DB if requested
-        context = None
-        sources = None
-        if request.use_vector_db:
-            search_results = await vector_db_service.search(
-                query=request.message,
-                top_k=3
-            )
-            if search_results:
-                context = "\n\n".join([r["content"] for r in search_results])
-                sources = search_results
-        
-        # Generate response
-        response_message = await llm_service.chat(
+        chat_pipeline = await get_chat_pipeline()
+        result = await chat_pipeline.chat(
             message=request.message,
-            conversation_id=conversation_id,
-            context=context
+            conversation_id=request.conversation_id,
+            use_vector_db=request.use_vector_db,
+            extra_queries=request.extra_queries,
+            rerank=request.rerank,
+            rerank_candidates=request.rerank_candidates,
+            context_token_budget=request.context_token_budget
         )
         
-        return ChatResponse(
-            message=response_message,
-            conversation_id=conversation_id,
-            sources=sources
+        return FastJSONResponse(result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a single server-sent event"""
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint - Send a message and receive the response as
+    server-sent events
+    
+    Emits a `token` event per generated token, then a single `done` event
+    carrying the conversation ID and sources, or an `error` event on failure.
+    """
+    try:
+        chat_pipeline = await get_chat_pipeline()
+        turn = await chat_pipeline.prepare(
+            message=request.message,
+            conversation_id=request.conversation_id,
+            use_vector_db=request.use_vector_db,
+            extra_queries=request.extra_queries,
+            rerank=request.rerank,
+            rerank_candidates=request.rerank_candidates,
+            context_token_budget=request.context_token_budget
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in chat_pipeline.stream(turn):
+                if event.get("done"):
+                    yield _sse("done", {
+                        "conversation_id": event["conversation_id"],
+                        "sources": event["sources"],
+                        "prompt_tokens": event["prompt_tokens"],
+                        "ttft_ms": event["ttft_ms"],
+                        "timings": event["timings"]
+                    })
+                else:
+                    yield _sse("token", {"token": event["token"]})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/documents", response_model=DocumentResponse)
@@ -74,39 +158,233 @@ async def add_document(document: DocumentInput):
     Add a document to the vector database
     """
     try:
-        doc_id = await vector_db_service.add_document(
+        vector_db_service = await get_vector_db_service()
+        result = await vector_db_service.add_document(
             content=document.content,
             metadata=document.metadata
         )
         
         return DocumentResponse(
-            id=doc_id,
+            id=result["id"],
             content=document.content,
-            metadata=document.metadata
+            metadata=document.metadata,
+            chunks_added=result["chunks_added"],
+            chunks_reused=result["chunks_reused"]
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _bulk_response(results: List[Dict[str, Any]]) -> BulkDocumentResponse:
+    """Build a bulk ingestion response from per-document results"""
+    return BulkDocumentResponse(
+        ids=[r["id"] for r in results],
+        count=len(results),
+        chunks_added=sum(r["chunks_added"] for r in results),
+        chunks_reused=sum(r["chunks_reused"] for r in results)
+    )
+
+
+@router.post("/documents/bulk", response_model=BulkDocumentResponse)
+async def add_documents_bulk(request: BulkDocumentInput):
+    """
+    Add a batch of documents to the vector database
+    """
+    try:
+        vector_db_service = await get_vector_db_service()
+        results = await vector_db_service.add_documents([
+            (document.content, document.metadata)
+            for document in request.documents
+        ])
+        
+        return _bulk_response(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _parse_ndjson_document(line: bytes, line_number: int) -> DocumentInput:
+    """Parse one NDJSON line, naming the line if it is invalid"""
+    try:
+        return DocumentInput.model_validate_json(line)
+    except ValueError as e:
+        raise ValueError(f"line {line_number}: {str(e)}")
+
+
+@router.post("/documents/bulk/ndjson", response_model=BulkDocumentResponse)
+async def add_documents_ndjson(request: Request):
+    """
+    Add documents streamed as NDJSON, one DocumentInput object per line
+    
+    The body is read incrementally and ingested in batches, so the whole
+    upload never has to be held in memory.
+    """
+    results: List[Dict[str, Any]] = []
+    batch: List[DocumentInput] = []
+    
+    async def flush():
+        vector_db_service = await get_vector_db_service()
+        results.extend(await vector_db_service.add_documents([
+            (document.content, document.metadata) for document in batch
+        ]))
+        batch.clear()
+    
+    try:
+        buffer = b""
+        line_number = 0
+        async for data in request.stream():
+            buffer += data
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    batch.append(_parse_ndjson_document(line, line_number))
+                if len(batch) >= settings.INGEST_BATCH_SIZE:
+                    await flush()
+        if buffer.strip():
+            batch.append(_parse_ndjson_document(buffer, line_number + 1))
+        if batch:
+            await flush()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid NDJSON document: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return _bulk_response(results)
+
+
+@router.post("/documents/upload", response_model=DocumentUploadResponse)
+async def upload_document(
+    file: UploadFile = File(...),
+    metadata: Optional[str] = Form(None, description="Document metadata as a JSON object")
+):
+    """
+    Add a large UTF-8 text document uploaded as multipart form data
+    
+    The upload is spooled to a temporary file rather than held in memory,
+    then decoded and split as it is read back, and its chunks are embedded
+    and stored in bounded batches, so memory use stays flat however large
+    the document is.
+    """
+    try:
+        document_metadata = json.loads(metadata) if metadata else {}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid metadata: {str(e)}")
+    if not isinstance(document_metadata, dict):
+        raise HTTPException(status_code=400, detail="Invalid metadata: expected a JSON object")
+    
+    size = 0
+    invalid_encoding = False
+    
+    async def pieces() -> AsyncIterator[str]:
+        nonlocal size, invalid_encoding
+        # Characters split across reads are completed by the next read
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            while data := await file.read(_UPLOAD_READ_SIZE):
+                size += len(data)
+                yield decoder.decode(data)
+            yield decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            invalid_encoding = True
+            raise
+    
+    try:
+        vector_db_service = await get_vector_db_service()
+        result = await vector_db_service.add_document_stream(pieces(), document_metadata)
+    except Exception as e:
+        if invalid_encoding:
+            raise HTTPException(status_code=400, detail="Invalid document: expected UTF-8 text")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+    
+    return DocumentUploadResponse(
+        id=result["id"],
+        filename=file.filename,
+        size=size,
+        metadata=document_metadata,
+        chunks_added=result["chunks_added"],
+        chunks_reused=result["chunks_reused"]
+    )
+
+
+@router.post("/jobs/ingest", response_model=IngestionJobStatus, status_code=202)
+async def submit_ingestion_job(request: BulkDocumentInput):
+    """
+    Queue documents for background ingestion and return the job status
+    """
+    try:
+        job = await ingestion_job_manager.submit([
+            (document.content, document.metadata)
+            for document in request.documents
+        ])
+        return IngestionJobStatus(**job)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs", response_model=List[IngestionJobStatus])
+async def list_ingestion_jobs():
+    """
+    List background ingestion jobs, newest first
+    """
+    return [IngestionJobStatus(**job) for job in ingestion_job_manager.list_jobs()]
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+async def get_ingestion_job(job_id: str):
+    """
+    Get the status and throughput of a background ingestion job
+    """
+    job = ingestion_job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestionJobStatus(**job)
+
+
+@router.post("/jobs/{job_id}/retry", response_model=IngestionJobStatus, status_code=202)
+async def retry_ingestion_job(job_id: str):
+    """
+    Queue a failed ingestion job again, resuming from its last committed chunk
+    """
+    try:
+        job = await ingestion_job_manager.retry_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestionJobStatus(**job)
+
+
+@router.delete("/jobs/{job_id}")
+async def delete_ingestion_job(job_id: str):
+    """
+    Delete an ingestion job and its submitted documents
+    """
+    try:
+        deleted = ingestion_job_manager.delete_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"message": "Job deleted successfully"}
+
+
 @router.post("/search", response_model=List[SearchResult])
 async def search_documents(request: SearchRequest):
     """
     Search for similar documents in the vector database
     """
     try:
+        vector_db_service = await get_vector_db_service()
         results = await vector_db_service.search(
             query=request.query,
-            top_k=request.top_k
+            top_k=request.top_k,
+            filter_metadata=request.filter,
+            alpha=request.alpha
         )
         
-        return [
-            SearchResult(
-                content=r["content"],
-                score=r["score"],
-                metadata=r["metadata"]
-            )
-            for r in results
-        ]
+        return FastJSONResponse(results)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -117,6 +395,7 @@ async def clear_conversation(conversation_id: str):
     Clear a conversation history
     """
     try:
+        llm_service = await get_llm_service()
         llm_service.clear_conversation(conversation_id)
         return {"message": "Conversation cleared successfully"}
     except Exception as e:
@@ -0,0 +1,48 @@
+"""Fast JSON serialization for REST responses"""
+import json
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+from ...models.search_hit import SearchHit
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, SearchHit):
+        return value.to_dict()
+    if isinstance(value, (np.generic, np.ndarray)):
+        # Numpy values as the Python floats and lists the schemas produce
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response that serializes service results directly
+    
+    Returning it from a route skips FastAPI's response model validation and
+    jsonable_encoder pass; the route's response_model still documents the
+    shape.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
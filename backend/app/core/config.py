@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    SERVICE_WARMUP: bool = True  # Load models in the background at startup
     
     # CORS
     ALLOWED_ORIGINS: list = ["http://localhost:3000", "http://localhost:3001"]
@@ -22,13 +23,45 @@ class Settings(BaseSettings):
     LLM_PROVIDER: str = "ollama"  # ollama, openai, huggingface
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "llama2"
+    OLLAMA_BASE_URLS: list = []  # Several servers to balance across, instead of OLLAMA_BASE_URL
+    LLM_MAX_CONCURRENCY: int = 4  # Max in-flight generations per worker
+    
+    # LLM routing across backends
+    LLM_ROUTING_POLICY: str = "least_outstanding"  # least_outstanding, latency
+    LLM_ROUTING_AFFINITY: bool = True  # Keep a conversation on one backend to reuse its prompt cache
+    LLM_ROUTING_AFFINITY_SLACK: int = 2  # Extra in-flight requests tolerated on the affinity backend
+    LLM_BACKEND_MAX_FAILURES: int = 3  # Consecutive failures before a backend is ejected
+    LLM_BACKEND_EJECT_SECONDS: float = 30.0
+    
+    # LLM HTTP transport
+    LLM_HTTP_MAX_CONNECTIONS: int = 20  # Pooled connections per provider
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10  # Idle connections kept open
+    LLM_HTTP_KEEPALIVE_SECONDS: float = 60.0  # Idle time before a connection is closed
+    LLM_HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_HTTP_READ_TIMEOUT_SECONDS: float = 120.0  # Max wait between response bytes
+    LLM_HTTP_RETRIES: int = 2  # Retries after connection errors and 429/502/503/504
+    LLM_HTTP_RETRY_BACKOFF_SECONDS: float = 0.5  # Doubled after each retry
+    LLM_HEALTH_CACHE_SECONDS: float = 10.0  # Reuse a health check result this long
     
     # OpenAI (optional)
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-3.5-turbo"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    
+    # Conversation store
+    CONVERSATION_BACKEND: str = "memory"  # memory, sqlite
+    CONVERSATION_DATABASE_URL: str = "sqlite:///./data/conversations.db"
+    CONVERSATION_MAX_CONVERSATIONS: int = 10000
+    CONVERSATION_IDLE_TTL_SECONDS: float = 86400.0  # 0 disables idle eviction
+    CONVERSATION_MAX_MEMORY_MB: float = 256.0
+    
+    # Conversation history
+    HISTORY_POLICY: str = "window"  # full, window, summary
+    PROMPT_TOKEN_BUDGET: int = 3072  # Max prompt tokens, history included
+    HISTORY_SUMMARY_MAX_TOKENS: int = 256
     
     # Vector Database
-    VECTOR_DB_PROVIDER: str = "chroma"  # chroma, pinecone, weaviate
+    VECTOR_DB_PROVIDER: str = "chroma"  # chroma, pinecone, local
     CHROMA_PERSIST_DIRECTORY: str = "./data/chroma"
     
     # Pinecone (optional)
@@ -36,8 +69,67 @@ class Settings(BaseSettings):
     PINECONE_ENVIRONMENT: Optional[str] = None
     PINECONE_INDEX_NAME: str = "langchain-index"
     
+    # Local index (optional)
+    LOCAL_INDEX_DIRECTORY: str = "./data/local_index"
+    LOCAL_INDEX_HNSW: bool = False  # Approximate search, requires hnswlib
+    LOCAL_INDEX_HNSW_M: int = 16
+    LOCAL_INDEX_HNSW_EF_CONSTRUCTION: int = 200
+    LOCAL_INDEX_HNSW_EF_SEARCH: int = 64
+    LOCAL_INDEX_READ_ONLY: bool = False  # Serve searches from a shared index
+    
+    # Document ingestion
+    CHUNK_SIZE: int = 1000
+    CHUNK_OVERLAP: int = 200
+    INGEST_BATCH_SIZE: int = 100  # Documents per bulk ingestion batch
+    INGEST_PROCESS_WORKERS: int = 2  # Processes splitting bulk batches
+    INGEST_JOB_DIRECTORY: str = "./data/jobs"
+    INGEST_JOB_WORKERS: int = 1  # Concurrent background ingestion jobs
+    INGEST_JOB_BATCH_CHUNKS: int = 256  # Chunks committed per checkpoint
+    INGEST_STREAM_BATCH_CHUNKS: int = 256  # Chunks embedded per batch of a streamed upload
+    CHUNK_DEDUP_ENABLED: bool = True  # Skip chunks that are already stored
+    CHUNK_INDEX_DATABASE_URL: str = "sqlite:///./data/chunk_index.db"
+    
+    # Search cache (size 0 disables caching)
+    SEARCH_CACHE_SIZE: int = 1024
+    SEARCH_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Hybrid search
+    BM25_ENABLED: bool = True  # Maintain a keyword index next to the vector store
+    BM25_INDEX_PATH: str = "./data/bm25_index.jsonl"
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    HYBRID_ALPHA: float = 1.0  # Default vector weight: 1 vector only, 0 keywords only
+    HYBRID_RRF_K: int = 60  # Rank offset in reciprocal rank fusion
+    HYBRID_CANDIDATES: int = 4  # Candidates per requested result from each retriever
+    
+    # Reranking
+    RERANK_ENABLED: bool = False  # Default for chat requests that don't choose
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20  # Candidates fetched per query for reranking
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_MAX_LENGTH: int = 512  # Max tokens per (query, chunk) pair
+    CONTEXT_TOKEN_BUDGET: int = 1024  # Max tokens of reranked context
+    
+    # Semantic response cache
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_DATABASE_URL: str = "sqlite:///./data/semantic_cache.db"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Min cosine similarity for a hit
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 10000
+    SEMANTIC_CACHE_TTL_SECONDS: float = 86400.0  # 0 disables expiry
+    
     # Embeddings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # torch, onnx
+    EMBEDDING_ONNX_QUANTIZE: bool = True  # Use int8 weights with the onnx backend
+    EMBEDDING_ONNX_DIRECTORY: str = "./data/onnx"  # Exported ONNX models
+    EMBEDDING_INTRA_OP_THREADS: int = 0  # Threads per embedding call, 0 for the runtime default
+    EMBEDDING_MAX_BATCH_SIZE: int = 32  # Texts per embedding batch
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0  # Time to gather concurrent texts
+    EMBEDDING_WORKERS: int = 1  # Threads running embedding batches
+    EMBEDDING_MODE: str = "local"  # local, server
+    EMBEDDING_SERVER_SOCKET: str = "./data/embedding.sock"
+    EMBEDDING_SERVER_TIMEOUT_SECONDS: float = 30.0
+    EMBEDDING_SERVER_FALLBACK: bool = True  # Embed in-process while the server is unreachable
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,65 @@
+"""Lazily created service instances"""
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ServiceProvider(Generic[T]):
+    """
+    Creates a service on first use instead of at import time
+    
+    Construction runs in a worker thread when requested from async code, so
+    loading models never blocks the event loop. Concurrent first requests
+    wait for the same instance. A failed construction is reported and
+    retried on the next request.
+    """
+    
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+        self.init_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the service has been created"""
+        return self._instance is not None
+    
+    @property
+    def instance(self) -> Optional[T]:
+        """The service if it has been created, without creating it"""
+        return self._instance
+    
+    def get_sync(self) -> T:
+        """Return the service, creating it in the calling thread if needed"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    try:
+                        self._instance = self.factory()
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    self.init_seconds = time.perf_counter() - started
+                    self.error = None
+        return self._instance
+    
+    async def get(self) -> T:
+        """Return the service, creating it off the event loop if needed"""
+        if self._instance is not None:
+            return self._instance
+        return await asyncio.to_thread(self.get_sync)
+    
+    def status(self) -> Dict[str, Any]:
+        """Readiness, construction time and last error"""
+        return {
+            "ready": self.ready,
+            "init_seconds": self.init_seconds,
+            "error": self.error
+        }
@@ -0,0 +1,46 @@
+"""Request coalescing for identical concurrent calls"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Shares one in-flight computation between identical concurrent calls
+    
+    The first caller for a key starts the computation; callers arriving with
+    the same key before it finishes await the same result, or exception,
+    instead of starting their own. The computation is shielded, so one
+    caller disconnecting does not cancel it for the others.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` for `key`, or join the call already in flight for it"""
+        future = self._calls.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._forget(key, future))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+    
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception retrieved in case every caller went away
+        if not future.cancelled():
+            future.exception()
+    
+    def stats(self) -> Dict[str, int]:
+        """Calls executed, calls coalesced and calls in flight"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls)
+        }
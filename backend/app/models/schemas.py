@@ -1,5 +1,5 @@
 """Models and schemas"""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from enum import Enum
 
@@ -29,6 +29,10 @@ class ChatRequest(BaseModel):
     message: str = Field(..., description="User message")
     conversation_id: Optional[str] = Field(None, description="Conversation ID for context")
     use_vector_db: bool = Field(False, description="Whether to use vector DB for context")
+    extra_queries: Optional[List[str]] = Field(None, description="Additional search queries for retrieval")
+    rerank: Optional[bool] = Field(None, description="Rerank retrieved chunks with a cross-encoder (default: RERANK_ENABLED)")
+    rerank_candidates: Optional[int] = Field(None, ge=1, description="Candidates fetched per query for reranking")
+    context_token_budget: Optional[int] = Field(None, ge=1, description="Max tokens of reranked context in the prompt")
 
 
 class ChatResponse(BaseModel):
@@ -36,6 +40,9 @@ class ChatResponse(BaseModel):
     message: str = Field(..., description="Assistant response")
     conversation_id: str = Field(..., description="Conversation ID")
     sources: Optional[List[Dict[str, Any]]] = Field(None, description="Source documents if vector DB used")
+    prompt_tokens: Optional[int] = Field(None, description="Number of tokens in the prompt sent to the LLM")
+    cached: bool = Field(False, description="Whether the answer was served from the response cache")
+    timings: Optional[Dict[str, float]] = Field(None, description="Time spent in each pipeline stage, in milliseconds")
 
 
 class DocumentInput(BaseModel):
@@ -49,16 +56,70 @@ class DocumentResponse(BaseModel):
     id: str = Field(..., description="Document ID")
     content: str = Field(..., description="Document content")
     metadata: Dict[str, Any] = Field(..., description="Document metadata")
+    chunks_added: int = Field(0, description="Number of new chunks embedded and stored")
+    chunks_reused: int = Field(0, description="Number of chunks already stored and reused")
+
+
+class DocumentUploadResponse(BaseModel):
+    """Uploaded document response"""
+    id: str = Field(..., description="Document ID")
+    filename: Optional[str] = Field(None, description="Uploaded file name")
+    size: int = Field(..., description="Uploaded size in bytes")
+    metadata: Dict[str, Any] = Field(..., description="Document metadata")
+    chunks_added: int = Field(0, description="Number of new chunks embedded and stored")
+    chunks_reused: int = Field(0, description="Number of chunks already stored and reused")
+
+
+class BulkDocumentInput(BaseModel):
+    """Batch of documents for bulk ingestion"""
+    documents: List[DocumentInput] = Field(..., description="Documents to ingest")
+
+
+class BulkDocumentResponse(BaseModel):
+    """Bulk ingestion response"""
+    ids: List[str] = Field(..., description="Document ID for each input document, in order")
+    count: int = Field(..., description="Number of documents ingested")
+    chunks_added: int = Field(0, description="Number of new chunks embedded and stored")
+    chunks_reused: int = Field(0, description="Number of chunks already stored and reused")
+
+
+class IngestionJobStatus(BaseModel):
+    """Background ingestion job status"""
+    job_id: str = Field(..., description="Job ID")
+    status: str = Field(..., description="Job status (queued/running/completed/failed)")
+    total_documents: int = Field(..., description="Number of submitted documents")
+    total_chunks: Optional[int] = Field(None, description="Number of chunks, once the documents are split")
+    committed_chunks: int = Field(..., description="Chunks processed so far")
+    chunks_added: int = Field(0, description="New chunks embedded and stored so far")
+    chunks_reused: int = Field(0, description="Already stored chunks reused so far")
+    chunks_per_second: float = Field(..., description="Ingestion throughput")
+    document_ids: Optional[List[str]] = Field(None, description="Document IDs, filled in as chunks are committed")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: float = Field(..., description="Submission time (Unix timestamp)")
+    updated_at: float = Field(..., description="Last checkpoint time (Unix timestamp)")
 
 
 class SearchRequest(BaseModel):
     """Vector search request"""
     query: str = Field(..., description="Search query")
     top_k: int = Field(5, description="Number of results to return")
+    filter: Optional[Dict[str, Any]] = Field(
+        None,
+        description='Metadata filter, e.g. {"tenant": "acme"} or {"year": {"$gte": 2020}}'
+    )
+    alpha: Optional[float] = Field(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="Weight of vector similarity against keyword matching (1 vector only, 0 keywords only)"
+    )
 
 
 class SearchResult(BaseModel):
     """Search result"""
+    # Also validates the services' SearchHit objects
+    model_config = ConfigDict(from_attributes=True)
+    
     content: str = Field(..., description="Document content")
     score: float = Field(..., description="Similarity score")
     metadata: Dict[str, Any] = Field(..., description="Document metadata")
@@ -0,0 +1,36 @@
+"""Lightweight search result passed from the services to the APIs"""
+from typing import Any, Dict, Optional
+
+
+class SearchHit:
+    """
+    One search result
+    
+    A plain slotted object instead of a dict or Pydantic model, so large
+    result sets cost one small allocation per hit and are serialized by
+    the APIs without being copied or validated again.
+    """
+    
+    __slots__ = ("content", "score", "metadata", "rerank_score")
+    
+    def __init__(
+        self,
+        content: str,
+        score: float,
+        metadata: Dict[str, Any],
+        rerank_score: Optional[float] = None
+    ):
+        self.content = content
+        self.score = score
+        self.metadata = metadata
+        self.rerank_score = rerank_score
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready form, matching the SearchResult schema"""
+        result = {"content": self.content, "score": self.score, "metadata": self.metadata}
+        if self.rerank_score is not None:
+            result["rerank_score"] = self.rerank_score
+        return result
+    
+    def __repr__(self) -> str:
+        return f"SearchHit(score={self.score!r}, content={self.content[:40]!r})"
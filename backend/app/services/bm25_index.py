@@ -0,0 +1,207 @@
+"""BM25 Index - Incremental keyword index used for hybrid search"""
+import fcntl
+import json
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Keeps codes such as "E-1042", "sku_77.3" or "v2.1" together as one token
+_TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-_.][^\W_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms
+    
+    Compound tokens joined by "-", "_" or "." are kept whole and their parts
+    are added as well, so "E-1042" matches both "e-1042" and "1042".
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(re.split(r"[-_.]", token))
+    return terms
+
+
+class BM25Index:
+    """
+    In-memory BM25 index over stored chunks, rebuilt from an append-only log
+    
+    Each term's postings are two typed arrays, document rows (uint32) and
+    term frequencies (uint16), so a posting costs six bytes and scoring a
+    term is a vectorized NumPy update over its postings. Adding chunks
+    appends their term counts to the log; the index is replayed from the
+    log on start, without re-tokenizing. Re-adding a known ID replaces its
+    previous row, which stays in the postings as a tombstone.
+    
+    Several processes may share the log. Appends are serialized with an
+    exclusive file lock, and each process indexes entries appended by the
+    others before writing and before each search. A read-only index never
+    writes.
+    """
+    
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75, read_only: bool = False):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._reset()
+        self._load()
+    
+    def _reset(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._live = 0
+        self._total_length = 0
+        self._log_size = 0
+    
+    def _load(self) -> None:
+        """Index log entries past the ones already read"""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self._log_size:
+            # The log was cleared by the writer
+            self._reset()
+        if size == self._log_size:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._log_size)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Still being written
+                    break
+                self._log_size += len(line)
+                try:
+                    doc_id, counts = json.loads(line)
+                except ValueError:
+                    # A write cut short by a crash; the chunk is re-added on retry
+                    continue
+                self._index(doc_id, counts)
+    
+    def _index(self, doc_id: str, counts: Dict[str, int]) -> None:
+        old_row = self._rows.get(doc_id)
+        if old_row is not None:
+            self._alive[old_row] = 0
+            self._live -= 1
+            self._total_length -= self._lengths[old_row]
+        row = len(self._ids)
+        self._ids.append(doc_id)
+        self._rows[doc_id] = row
+        length = sum(counts.values())
+        self._lengths.append(length)
+        self._alive.append(1)
+        self._live += 1
+        self._total_length += length
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("H"))
+            postings[0].append(row)
+            postings[1].append(min(count, 65535))
+    
+    def add(self, ids: List[str], texts: List[str]) -> None:
+        """Index chunks, replacing any previously indexed with the same IDs"""
+        if self.read_only:
+            raise ValueError("The BM25 index is open read-only")
+        entries = [(doc_id, dict(Counter(tokenize(text)))) for doc_id, text in zip(ids, texts)]
+        log = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # Catch up on entries appended by other processes
+                    self._load()
+                    if os.fstat(f.fileno()).st_size > self._log_size:
+                        # Nobody else is writing, so the rest is a partial
+                        # entry left by a crash; drop it to stay line-aligned
+                        f.truncate(self._log_size)
+                    f.write(log)
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            self._log_size += len(log)
+            for doc_id, counts in entries:
+                self._index(doc_id, counts)
+    
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Rank indexed chunks against a keyword query
+        
+        Args:
+            query: Query text
+            k: Maximum number of results
+        
+        Returns:
+            (id, BM25 score) pairs, best first, for chunks sharing a term
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            self._load()
+            if not self._live or k <= 0:
+                return []
+            average_length = max(self._total_length / self._live, 1.0)
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32)
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                rows = np.frombuffer(postings[0], dtype=np.uint32)
+                frequencies = np.frombuffer(postings[1], dtype=np.uint16).astype(np.float32)
+                # Replaced rows stay in the postings; count live rows only
+                live = alive[rows]
+                rows, frequencies = rows[live], frequencies[live]
+                if not len(rows):
+                    continue
+                idf = math.log(1 + (self._live - len(rows) + 0.5) / (len(rows) + 0.5))
+                scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + norms[rows])
+            
+            matched = np.flatnonzero(scores)
+            k = min(k, len(matched))
+            if not k:
+                return []
+            top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            return [(self._ids[row], float(scores[row])) for row in top]
+    
+    def clear(self) -> None:
+        """Delete every indexed chunk"""
+        if self.read_only:
+            raise ValueError("The BM25 index is open read-only")
+        with self._lock:
+            if self.path.exists():
+                with open(self.path, "ab") as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    try:
+                        # Truncate rather than unlink, so processes holding
+                        # the file see it shrink and reset
+                        f.truncate(0)
+                    finally:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+            self._reset()
+    
+    def stats(self) -> Dict[str, int]:
+        """Index size"""
+        with self._lock:
+            return {
+                "chunks": self._live,
+                "terms": len(self._postings),
+                "postings": sum(len(rows) for rows, _ in self._postings.values())
+            }
@@ -0,0 +1,246 @@
+"""Chat Pipeline - Retrieval-augmented chat shared by the REST and GraphQL APIs"""
+import asyncio
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.provider import ServiceProvider
+from ..models.search_hit import SearchHit
+from .llm_service import LLMService, llm_provider
+from .reranker import get_reranker
+from .tokens import count_tokens
+from .vector_service import VectorDBService, vector_db_provider
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
+class ChatPipeline:
+    """
+    Runs a chat turn: retrieval, prompt preparation and generation
+    
+    Retrieval (query embedding and vector search) and loading the
+    conversation history are independent, so they run concurrently. Extra
+    queries fan out into parallel searches whose results are merged. Every
+    turn records how long each stage took.
+    
+    With reranking, each search over-fetches candidates, a cross-encoder
+    rescores them, and the best are kept until the context token budget is
+    spent, instead of a fixed top_k.
+    """
+    
+    def __init__(
+        self,
+        llm: LLMService,
+        vector_db: VectorDBService,
+        top_k: int = 3
+    ):
+        self.llm = llm
+        self.vector_db = vector_db
+        self.top_k = top_k
+    
+    @staticmethod
+    def _fit_context(sources: List[SearchHit], budget: int) -> List[SearchHit]:
+        """Keep sources in order while they fit in the token budget"""
+        kept = []
+        used = 0
+        for source in sources:
+            tokens = count_tokens(source.content)
+            # The best source is always kept, even if it alone exceeds the budget
+            if kept and used + tokens > budget:
+                continue
+            kept.append(source)
+            used += tokens
+        return kept
+    
+    async def _retrieve(
+        self,
+        queries: List[str],
+        rerank: bool = False,
+        rerank_candidates: Optional[int] = None,
+        context_token_budget: Optional[int] = None
+    ) -> Tuple[Optional[str], Optional[List[SearchHit]], Dict[str, float]]:
+        """Search for every query at once, merge the results and optionally rerank"""
+        started = time.perf_counter()
+        depth = (rerank_candidates or settings.RERANK_CANDIDATES) if rerank else self.top_k
+        result_lists = await asyncio.gather(*[
+            self.vector_db.search(query=query, top_k=depth)
+            for query in queries
+        ])
+        
+        # Interleave so each query contributes its best matches first
+        sources = []
+        seen = set()
+        for rank in range(depth):
+            for results in result_lists:
+                if rank < len(results) and results[rank].content not in seen:
+                    seen.add(results[rank].content)
+                    sources.append(results[rank])
+        timings = {"retrieval_ms": _elapsed_ms(started)}
+        
+        if rerank and sources:
+            rerank_started = time.perf_counter()
+            reranker = await get_reranker()
+            sources = await asyncio.to_thread(reranker.rerank, queries[0], sources)
+            sources = self._fit_context(sources, context_token_budget or settings.CONTEXT_TOKEN_BUDGET)
+            timings["rerank_ms"] = _elapsed_ms(rerank_started)
+        else:
+            sources = sources[:self.top_k]
+        
+        if not sources:
+            return None, None, timings
+        context = "\n\n".join([hit.content for hit in sources])
+        return context, sources, timings
+    
+    async def _prepare_history(self, conversation_id: str) -> float:
+        started = time.perf_counter()
+        await self.llm.prepare_history(conversation_id)
+        return _elapsed_ms(started)
+    
+    async def prepare(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        use_vector_db: bool = False,
+        extra_queries: Optional[List[str]] = None,
+        rerank: Optional[bool] = None,
+        rerank_candidates: Optional[int] = None,
+        context_token_budget: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Retrieve context and load history for a chat turn
+        
+        Args:
+            message: User message
+            conversation_id: Conversation to continue; a new one if omitted
+            use_vector_db: Whether to retrieve context from the vector DB
+            extra_queries: Additional search queries for retrieval
+            rerank: Rerank retrieved chunks; defaults to RERANK_ENABLED
+            rerank_candidates: Candidates fetched per query for reranking;
+                defaults to RERANK_CANDIDATES
+            context_token_budget: Max tokens of reranked context; defaults
+                to CONTEXT_TOKEN_BUDGET
+        
+        Returns:
+            The conversation ID, context, sources and stage timings
+        """
+        started = time.perf_counter()
+        conversation_id = conversation_id or str(uuid.uuid4())
+        
+        stages = [self._prepare_history(conversation_id)]
+        if use_vector_db:
+            if rerank is None:
+                rerank = settings.RERANK_ENABLED
+            stages.append(self._retrieve(
+                [message, *(extra_queries or [])],
+                rerank=rerank,
+                rerank_candidates=rerank_candidates,
+                context_token_budget=context_token_budget
+            ))
+        results = await asyncio.gather(*stages)
+        
+        timings = {"history_ms": results[0]}
+        context, sources = None, None
+        if use_vector_db:
+            context, sources, retrieval_timings = results[1]
+            timings.update(retrieval_timings)
+        timings["prepare_ms"] = _elapsed_ms(started)
+        
+        return {
+            "message": message,
+            "conversation_id": conversation_id,
+            "context": context,
+            "sources": sources,
+            "timings": timings,
+            "started": started
+        }
+    
+    async def chat(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        use_vector_db: bool = False,
+        extra_queries: Optional[List[str]] = None,
+        rerank: Optional[bool] = None,
+        rerank_candidates: Optional[int] = None,
+        context_token_budget: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Answer a chat message, retrieving context if requested
+        
+        Takes the same arguments as prepare().
+        
+        Returns:
+            The answer, conversation ID, sources, prompt token count, whether
+            the answer was cached, and stage timings in milliseconds
+        """
+        turn = await self.prepare(
+            message,
+            conversation_id,
+            use_vector_db,
+            extra_queries,
+            rerank,
+            rerank_candidates,
+            context_token_budget
+        )
+        
+        generation_started = time.perf_counter()
+        result = await self.llm.chat(
+            message=message,
+            conversation_id=turn["conversation_id"],
+            context=turn["context"]
+        )
+        timings = turn["timings"]
+        timings["generation_ms"] = _elapsed_ms(generation_started)
+        timings["total_ms"] = _elapsed_ms(turn["started"])
+        
+        return {
+            "message": result["message"],
+            "conversation_id": turn["conversation_id"],
+            "sources": turn["sources"],
+            "prompt_tokens": result["prompt_tokens"],
+            "cached": result["cached"],
+            "timings": timings
+        }
+    
+    async def stream(self, turn: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the answer for a turn returned by prepare()
+        
+        Yields:
+            {"token": ...} for each generated token, then a final
+            {"done": True, ...} carrying the conversation ID, sources, prompt
+            token count, time to first token and stage timings
+        """
+        generation_started = time.perf_counter()
+        async for event in self.llm.stream_chat(
+            message=turn["message"],
+            conversation_id=turn["conversation_id"],
+            context=turn["context"]
+        ):
+            if event.get("done"):
+                timings = turn["timings"]
+                timings["generation_ms"] = _elapsed_ms(generation_started)
+                timings["total_ms"] = _elapsed_ms(turn["started"])
+                yield {
+                    **event,
+                    "conversation_id": turn["conversation_id"],
+                    "sources": turn["sources"],
+                    "timings": timings
+                }
+            else:
+                yield event
+
+
+# Lazily created instance
+chat_pipeline_provider = ServiceProvider(
+    "chat_pipeline",
+    lambda: ChatPipeline(llm_provider.get_sync(), vector_db_provider.get_sync())
+)
+
+
+async def get_chat_pipeline() -> ChatPipeline:
+    """Return the chat pipeline, creating its services on first use"""
+    return await chat_pipeline_provider.get()
@@ -0,0 +1,108 @@
+"""Chunk Index - Persistent content-hash index used to deduplicate chunks"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import (
+    Column,
+    MetaData,
+    String,
+    Table,
+    bindparam,
+    create_engine,
+    delete,
+    select,
+    update,
+)
+
+
+class ChunkHashIndex:
+    """
+    Maps the content hash of every stored chunk to its vector store ID
+    
+    Chunks whose hash is already indexed are skipped during ingestion and the
+    existing ID is reused, so re-uploading a lightly edited document only
+    embeds the chunks that changed.
+    """
+    
+    # Stay well below SQLite's bound parameter limit
+    LOOKUP_BATCH_SIZE = 500
+    
+    def __init__(self, database_url: str):
+        if database_url.startswith("sqlite:///"):
+            Path(database_url[len("sqlite:///"):]).parent.mkdir(parents=True, exist_ok=True)
+        self.engine = create_engine(database_url)
+        self.metadata = MetaData()
+        self.table = Table(
+            "chunk_hashes",
+            self.metadata,
+            Column("hash", String(64), primary_key=True),
+            Column("chunk_id", String, nullable=False)
+        )
+        self.metadata.create_all(self.engine)
+    
+    @staticmethod
+    def hash_chunk(content: str, metadata: Dict[str, Any]) -> str:
+        """
+        Hash a chunk's content together with its metadata
+        
+        Metadata is part of the key so identical text stored under different
+        metadata (e.g. another tenant) is not merged, which would break
+        filtered search.
+        """
+        digest = hashlib.sha256(content.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def lookup(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """Return the stored chunk ID for each known hash"""
+        hashes = list(hashes)
+        found = {}
+        with self.engine.connect() as connection:
+            for start in range(0, len(hashes), self.LOOKUP_BATCH_SIZE):
+                batch = hashes[start:start + self.LOOKUP_BATCH_SIZE]
+                rows = connection.execute(
+                    select(self.table.c.hash, self.table.c.chunk_id)
+                    .where(self.table.c.hash.in_(batch))
+                )
+                found.update((row.hash, row.chunk_id) for row in rows)
+        return found
+    
+    def record(self, entries: Dict[str, str]) -> None:
+        """Record hash to chunk ID mappings for newly stored chunks"""
+        if not entries:
+            return
+        # Select, then update or insert, so any SQL database will do
+        with self.engine.begin() as connection:
+            existing = set()
+            hashes = list(entries)
+            for start in range(0, len(hashes), self.LOOKUP_BATCH_SIZE):
+                rows = connection.execute(
+                    select(self.table.c.hash)
+                    .where(self.table.c.hash.in_(hashes[start:start + self.LOOKUP_BATCH_SIZE]))
+                )
+                existing.update(row.hash for row in rows)
+            
+            if existing:
+                connection.execute(
+                    update(self.table)
+                    .where(self.table.c.hash == bindparam("chunk_hash"))
+                    .values(chunk_id=bindparam("new_chunk_id")),
+                    [
+                        {"chunk_hash": chunk_hash, "new_chunk_id": entries[chunk_hash]}
+                        for chunk_hash in existing
+                    ]
+                )
+            new = [chunk_hash for chunk_hash in hashes if chunk_hash not in existing]
+            if new:
+                connection.execute(self.table.insert(), [
+                    {"hash": chunk_hash, "chunk_id": entries[chunk_hash]}
+                    for chunk_hash in new
+                ])
+    
+    def clear(self) -> None:
+        """Forget every indexed chunk"""
+        with self.engine.begin() as connection:
+            connection.execute(delete(self.table))
@@ -0,0 +1,154 @@
+"""Text chunking helpers
+
+Kept free of model and vector store imports so worker processes can import
+it cheaply.
+"""
+from typing import Iterator, List, Optional
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+# Separators tried in order, the regular splitter's defaults
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
+
+def create_text_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Create the text splitter used for document ingestion"""
+    return RecursiveCharacterTextSplitter(
+        separators=SEPARATORS,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len
+    )
+
+
+def split_texts(texts: List[str], chunk_size: int, chunk_overlap: int) -> List[List[str]]:
+    """
+    Split several documents into chunks
+    
+    Args:
+        texts: Document contents
+        chunk_size: Maximum chunk length in characters
+        chunk_overlap: Overlap between consecutive chunks
+    
+    Returns:
+        The chunks of each document, in input order
+    """
+    splitter = create_text_splitter(chunk_size, chunk_overlap)
+    return [splitter.split_text(text) for text in texts]
+
+
+class StreamingTextSplitter:
+    """
+    Splits text that arrives in pieces, yielding chunks as they complete
+    
+    Produces the same chunks as splitting the whole text with the regular
+    splitter. The text is cut into segments at the first separator found
+    in the opening window, as the regular splitter does for the whole
+    text; a segment is complete once the next separator arrives. Short
+    segments are merged into chunks as they complete, keeping the same
+    overlap, and long ones are split on their own with the remaining
+    separators. Memory is bounded by the window and the longest segment,
+    whatever the length of the document.
+    
+    A separator that first appears after the opening window is not used
+    at the top level, so such text may be chunked differently than by
+    the regular splitter.
+    """
+    
+    def __init__(self, chunk_size: int, chunk_overlap: int, window_chunks: int = 16):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.window = chunk_size * max(2, window_chunks)
+        self._buffer = ""
+        # Where the next separator may start in the buffer
+        self._scanned = 0
+        self._separator: Optional[str] = None
+        self._segment_splitter: Optional[RecursiveCharacterTextSplitter] = None
+        # Segments of the chunk being merged
+        self._current: List[str] = []
+        self._total = 0
+    
+    def _choose_separator(self) -> None:
+        """Use the first separator present, as the regular splitter does"""
+        for i, separator in enumerate(SEPARATORS):
+            if separator == "" or separator in self._buffer:
+                self._separator = separator
+                if separator and SEPARATORS[i + 1:]:
+                    self._segment_splitter = RecursiveCharacterTextSplitter(
+                        separators=SEPARATORS[i + 1:],
+                        chunk_size=self.chunk_size,
+                        chunk_overlap=self.chunk_overlap,
+                        length_function=len
+                    )
+                return
+    
+    def _segments(self, final: bool) -> List[str]:
+        """Take the complete segments, each starting with its separator, off the buffer"""
+        separator, buffer = self._separator, self._buffer
+        if not separator:
+            self._buffer = ""
+            return list(buffer)
+        segments = []
+        start = 0
+        lead = len(separator) if buffer.startswith(separator) else 0
+        position = buffer.find(separator, max(lead, self._scanned))
+        while position != -1:
+            segments.append(buffer[start:position])
+            start = position
+            position = buffer.find(separator, position + len(separator))
+        if final:
+            segments.append(buffer[start:])
+            start = len(buffer)
+        self._buffer = buffer[start:]
+        self._scanned = max(0, len(self._buffer) - len(separator) + 1)
+        return [segment for segment in segments if segment]
+    
+    def _merge(self, segment: str) -> Iterator[str]:
+        """Add a short segment, yielding the chunk it closes"""
+        length = len(segment)
+        if self._current and self._total + length > self.chunk_size:
+            chunk = "".join(self._current).strip()
+            if chunk:
+                yield chunk
+            # Keep the tail of the chunk as the overlap
+            while self._total > self.chunk_overlap or (
+                self._total + length > self.chunk_size and self._total > 0
+            ):
+                self._total -= len(self._current.pop(0))
+        self._current.append(segment)
+        self._total += length
+    
+    def _flush(self) -> Iterator[str]:
+        """Yield the chunk being merged"""
+        chunk = "".join(self._current).strip()
+        self._current = []
+        self._total = 0
+        if chunk:
+            yield chunk
+    
+    def _split(self, final: bool) -> Iterator[str]:
+        for segment in self._segments(final):
+            if len(segment) < self.chunk_size:
+                yield from self._merge(segment)
+                continue
+            yield from self._flush()
+            if self._segment_splitter is None:
+                yield segment
+            else:
+                yield from self._segment_splitter.split_text(segment)
+    
+    def feed(self, text: str) -> Iterator[str]:
+        """Add text and yield the chunks it completes"""
+        self._buffer += text
+        if self._separator is None:
+            if len(self._buffer) < self.window:
+                return
+            self._choose_separator()
+        yield from self._split(final=False)
+    
+    def finish(self) -> Iterator[str]:
+        """Yield the chunks of the remaining text"""
+        if self._separator is None:
+            self._choose_separator()
+        yield from self._split(final=True)
+        yield from self._flush()
@@ -0,0 +1,392 @@
+"""Conversation Store - Bounded, evicting storage for conversation history"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    delete,
+    event,
+    func,
+    select,
+    update,
+)
+
+from ..core.config import settings
+from ..models.schemas import ChatMessage
+
+
+def _message_size(message: ChatMessage) -> int:
+    """Approximate the memory held by a message"""
+    return len(message.role) + len(message.content.encode("utf-8"))
+
+
+class ConversationStore(ABC):
+    """
+    Base class for conversation history backends
+    
+    Conversations are evicted once idle for longer than `idle_ttl` seconds,
+    and the least recently used ones are evicted whenever the store holds
+    more than `max_conversations` or more than `max_bytes` of message
+    content.
+    """
+    
+    def __init__(self, max_conversations: int, idle_ttl: float, max_bytes: int):
+        self.max_conversations = max_conversations
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.evictions = 0
+    
+    @abstractmethod
+    def get_messages(self, conversation_id: str) -> List[ChatMessage]:
+        """Return a conversation's messages, oldest first"""
+    
+    @abstractmethod
+    def get_messages_since(self, conversation_id: str, start: int) -> Tuple[List[ChatMessage], int]:
+        """Return a conversation's messages from index `start` on, and its total message count"""
+    
+    @abstractmethod
+    def append_messages(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        """Append messages to a conversation, creating it if needed"""
+    
+    @abstractmethod
+    def get_summary(self, conversation_id: str) -> Tuple[str, int]:
+        """Return a conversation's running summary and how many messages it covers"""
+    
+    @abstractmethod
+    def set_summary(self, conversation_id: str, summary: str, summarized_count: int) -> None:
+        """Store a conversation's running summary"""
+    
+    @abstractmethod
+    def delete(self, conversation_id: str) -> None:
+        """Delete a conversation"""
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return size and eviction counters"""
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Conversation store kept in the worker's memory"""
+    
+    def __init__(self, max_conversations: int, idle_ttl: float, max_bytes: int):
+        super().__init__(max_conversations, idle_ttl, max_bytes)
+        # conversation_id -> [last access time, size in bytes, messages,
+        # summary, summarized message count], least recently used first
+        self._conversations: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    def get_messages(self, conversation_id: str) -> List[ChatMessage]:
+        messages, _ = self.get_messages_since(conversation_id, 0)
+        return messages
+    
+    def get_messages_since(self, conversation_id: str, start: int) -> Tuple[List[ChatMessage], int]:
+        with self._lock:
+            self._evict()
+            entry = self._conversations.get(conversation_id)
+            if entry is None:
+                return [], 0
+            entry[0] = time.monotonic()
+            self._conversations.move_to_end(conversation_id)
+            return entry[2][start:], len(entry[2])
+    
+    def append_messages(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            entry = self._conversations.setdefault(conversation_id, [0.0, 0, [], "", 0])
+            size = sum(_message_size(message) for message in messages)
+            entry[0] = time.monotonic()
+            entry[1] += size
+            entry[2].extend(messages)
+            self._total_bytes += size
+            self._conversations.move_to_end(conversation_id)
+            self._evict()
+    
+    def get_summary(self, conversation_id: str) -> Tuple[str, int]:
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if entry is None:
+                return "", 0
+            return entry[3], entry[4]
+    
+    def set_summary(self, conversation_id: str, summary: str, summarized_count: int) -> None:
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if entry is None:
+                return
+            size = len(summary.encode("utf-8")) - len(entry[3].encode("utf-8"))
+            entry[1] += size
+            entry[3] = summary
+            entry[4] = summarized_count
+            self._total_bytes += size
+    
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            entry = self._conversations.pop(conversation_id, None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+    
+    def _evict(self) -> None:
+        """Drop idle conversations, then the least recently used over budget"""
+        now = time.monotonic()
+        while self._conversations:
+            conversation_id, (last_access, size, *_) = next(iter(self._conversations.items()))
+            expired = self.idle_ttl and now - last_access > self.idle_ttl
+            over_budget = (
+                len(self._conversations) > self.max_conversations
+                or self._total_bytes > self.max_bytes
+            )
+            if not (expired or over_budget):
+                break
+            del self._conversations[conversation_id]
+            self._total_bytes -= size
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "conversations": len(self._conversations),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class SQLConversationStore(ConversationStore):
+    """
+    Conversation store backed by a SQL database
+    
+    With SQLite the history survives restarts and is shared by every uvicorn
+    worker on the host.
+    """
+    
+    def __init__(
+        self,
+        database_url: str,
+        max_conversations: int,
+        idle_ttl: float,
+        max_bytes: int
+    ):
+        super().__init__(max_conversations, idle_ttl, max_bytes)
+        if database_url.startswith("sqlite:///"):
+            Path(database_url[len("sqlite:///"):]).parent.mkdir(parents=True, exist_ok=True)
+            self.engine = create_engine(database_url, connect_args={"timeout": 30})
+            # WAL lets workers read while another one writes
+            event.listen(self.engine, "connect", self._enable_wal)
+        else:
+            self.engine = create_engine(database_url, pool_pre_ping=True)
+        
+        self.metadata = MetaData()
+        self.conversations = Table(
+            "conversations",
+            self.metadata,
+            Column("id", String, primary_key=True),
+            Column("last_access", Float, nullable=False, index=True),
+            Column("size_bytes", Integer, nullable=False, default=0),
+            Column("summary", Text, nullable=False, default=""),
+            Column("summarized_count", Integer, nullable=False, default=0)
+        )
+        self.messages = Table(
+            "conversation_messages",
+            self.metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("conversation_id", String, nullable=False, index=True),
+            Column("role", String, nullable=False),
+            Column("content", Text, nullable=False)
+        )
+        self.metadata.create_all(self.engine)
+    
+    @staticmethod
+    def _enable_wal(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+    
+    def get_messages(self, conversation_id: str) -> List[ChatMessage]:
+        messages, _ = self.get_messages_since(conversation_id, 0)
+        return messages
+    
+    def get_messages_since(self, conversation_id: str, start: int) -> Tuple[List[ChatMessage], int]:
+        now = time.time()
+        with self.engine.begin() as connection:
+            last_access = connection.execute(
+                select(self.conversations.c.last_access)
+                .where(self.conversations.c.id == conversation_id)
+            ).scalar()
+            if last_access is None:
+                return [], 0
+            if self.idle_ttl and now - last_access > self.idle_ttl:
+                self._delete(connection, [conversation_id])
+                self.evictions += 1
+                return [], 0
+            
+            connection.execute(
+                update(self.conversations)
+                .where(self.conversations.c.id == conversation_id)
+                .values(last_access=now)
+            )
+            total = connection.execute(
+                select(func.count())
+                .select_from(self.messages)
+                .where(self.messages.c.conversation_id == conversation_id)
+            ).scalar()
+            if start >= total:
+                return [], total
+            rows = connection.execute(
+                select(self.messages.c.role, self.messages.c.content)
+                .where(self.messages.c.conversation_id == conversation_id)
+                .order_by(self.messages.c.id)
+                .offset(start)
+            )
+            return [ChatMessage(role=row.role, content=row.content) for row in rows], total
+    
+    def append_messages(self, conversation_id: str, messages: List[ChatMessage]) -> None:
+        size = sum(_message_size(message) for message in messages)
+        with self.engine.begin() as connection:
+            touched = connection.execute(
+                update(self.conversations)
+                .where(self.conversations.c.id == conversation_id)
+                .values(
+                    last_access=time.time(),
+                    size_bytes=self.conversations.c.size_bytes + size
+                )
+            )
+            if not touched.rowcount:
+                connection.execute(self.conversations.insert().values(
+                    id=conversation_id,
+                    last_access=time.time(),
+                    size_bytes=size,
+                    summary="",
+                    summarized_count=0
+                ))
+            connection.execute(self.messages.insert(), [
+                {
+                    "conversation_id": conversation_id,
+                    "role": message.role,
+                    "content": message.content
+                }
+                for message in messages
+            ])
+            self._evict(connection)
+    
+    def get_summary(self, conversation_id: str) -> Tuple[str, int]:
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                select(self.conversations.c.summary, self.conversations.c.summarized_count)
+                .where(self.conversations.c.id == conversation_id)
+            ).first()
+        if row is None:
+            return "", 0
+        return row.summary, row.summarized_count
+    
+    def set_summary(self, conversation_id: str, summary: str, summarized_count: int) -> None:
+        with self.engine.begin() as connection:
+            # Sized in UTF-8 bytes like messages; SQL length() counts characters
+            previous = connection.execute(
+                select(self.conversations.c.summary)
+                .where(self.conversations.c.id == conversation_id)
+            ).scalar()
+            if previous is None:
+                return
+            connection.execute(
+                update(self.conversations)
+                .where(self.conversations.c.id == conversation_id)
+                .values(
+                    size_bytes=(
+                        self.conversations.c.size_bytes
+                        + len(summary.encode("utf-8"))
+                        - len(previous.encode("utf-8"))
+                    ),
+                    summary=summary,
+                    summarized_count=summarized_count
+                )
+            )
+    
+    def delete(self, conversation_id: str) -> None:
+        with self.engine.begin() as connection:
+            self._delete(connection, [conversation_id])
+    
+    def _delete(self, connection, conversation_ids: List[str]) -> None:
+        connection.execute(
+            delete(self.messages)
+            .where(self.messages.c.conversation_id.in_(conversation_ids))
+        )
+        connection.execute(
+            delete(self.conversations)
+            .where(self.conversations.c.id.in_(conversation_ids))
+        )
+    
+    def _evict(self, connection) -> None:
+        """Drop idle conversations, then the least recently used over budget"""
+        if self.idle_ttl:
+            expired = connection.execute(
+                select(self.conversations.c.id)
+                .where(self.conversations.c.last_access < time.time() - self.idle_ttl)
+            ).scalars().all()
+            if expired:
+                self._delete(connection, expired)
+                self.evictions += len(expired)
+        
+        count, total_bytes = connection.execute(
+            select(func.count(), func.coalesce(func.sum(self.conversations.c.size_bytes), 0))
+        ).one()
+        if count <= self.max_conversations and total_bytes <= self.max_bytes:
+            return
+        
+        evicted = []
+        rows = connection.execute(
+            select(self.conversations.c.id, self.conversations.c.size_bytes)
+            .order_by(self.conversations.c.last_access)
+        )
+        for row in rows:
+            if count <= self.max_conversations and total_bytes <= self.max_bytes:
+                break
+            evicted.append(row.id)
+            count -= 1
+            total_bytes -= row.size_bytes
+        rows.close()
+        self._delete(connection, evicted)
+        self.evictions += len(evicted)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self.engine.connect() as connection:
+            count, total_bytes = connection.execute(
+                select(func.count(), func.coalesce(func.sum(self.conversations.c.size_bytes), 0))
+            ).one()
+        return {
+            "backend": "sql",
+            "conversations": count,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+def create_conversation_store() -> ConversationStore:
+    """Create the conversation store based on configuration"""
+    max_bytes = int(settings.CONVERSATION_MAX_MEMORY_MB * 1024 * 1024)
+    if settings.CONVERSATION_BACKEND == "memory":
+        return InMemoryConversationStore(
+            max_conversations=settings.CONVERSATION_MAX_CONVERSATIONS,
+            idle_ttl=settings.CONVERSATION_IDLE_TTL_SECONDS,
+            max_bytes=max_bytes
+        )
+    elif settings.CONVERSATION_BACKEND == "sqlite":
+        return SQLConversationStore(
+            database_url=settings.CONVERSATION_DATABASE_URL,
+            max_conversations=settings.CONVERSATION_MAX_CONVERSATIONS,
+            idle_ttl=settings.CONVERSATION_IDLE_TTL_SECONDS,
+            max_bytes=max_bytes
+        )
+    else:
+        raise ValueError(f"Unsupported conversation backend: {settings.CONVERSATION_BACKEND}")
@@ -0,0 +1,171 @@
+"""Embedding Scheduler - Micro-batches embedding requests across callers"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+
+class EmbeddingScheduler:
+    """
+    Gathers concurrent embedding requests into shared batches
+    
+    Texts from every caller are queued until either the batch window expires
+    or the queue reaches the maximum batch size. Each batch is embedded on a
+    worker pool off the event loop and the vectors are routed back to the
+    awaiting callers.
+    """
+    
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 32,
+        batch_window_ms: float = 5.0,
+        workers: int = 1
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window = batch_window_ms / 1000
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="embedding"
+        )
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # Metrics
+        self._batches = 0
+        self._texts = 0
+        self._largest_batch = 0
+        self._latency_samples = 0
+        self._queue_latency_total = 0.0
+        self._queue_latency_max = 0.0
+        self._compute_time_total = 0.0
+    
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a single query text"""
+        vectors = await self.embed_documents([text])
+        return vectors[0]
+    
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a list of texts, sharing batches with concurrent callers
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One vector per input text, in order
+        """
+        if not texts:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future, time.perf_counter()))
+            futures.append(future)
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+        
+        if self._pending and self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        
+        return list(await asyncio.gather(*futures))
+    
+    async def embed_bulk(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a large batch directly on the worker pool
+        
+        Bulk ingestion already has full batches, so it skips the
+        micro-batching queue and hands the whole list to the model.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            One vector per input text, in order
+        """
+        if not texts:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        enqueued = time.perf_counter()
+        started, elapsed, vectors = await loop.run_in_executor(
+            self._executor, self._embed_batch, texts
+        )
+        self._record_batch(len(texts), [started - enqueued], elapsed)
+        return vectors
+    
+    def _flush(self) -> None:
+        """Dispatch everything queued so far as one or more batches"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        pending, self._pending = self._pending, []
+        for start in range(0, len(pending), self.max_batch_size):
+            batch = pending[start:start + self.max_batch_size]
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    def _embed_batch(self, texts: List[str]) -> Tuple[float, float, List[List[float]]]:
+        """Embed a batch on a worker thread, reporting when work started"""
+        started = time.perf_counter()
+        vectors = self.embeddings.embed_documents(texts)
+        return started, time.perf_counter() - started, vectors
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]) -> None:
+        """Embed a batch and resolve the futures of its callers"""
+        texts = [text for text, _, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            started, elapsed, vectors = await loop.run_in_executor(
+                self._executor, self._embed_batch, texts
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        self._record_batch(
+            len(batch),
+            [started - enqueued for _, _, enqueued in batch],
+            elapsed
+        )
+        for (_, future, _), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+    
+    def _record_batch(self, size: int, latencies: List[float], elapsed: float) -> None:
+        """Update batch-size and queue-latency metrics"""
+        self._batches += 1
+        self._texts += size
+        self._largest_batch = max(self._largest_batch, size)
+        self._compute_time_total += elapsed
+        self._latency_samples += len(latencies)
+        self._queue_latency_total += sum(latencies)
+        self._queue_latency_max = max(self._queue_latency_max, *latencies)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return batching and latency metrics"""
+        return {
+            "batches": self._batches,
+            "texts": self._texts,
+            "pending": len(self._pending),
+            "avg_batch_size": self._texts / self._batches if self._batches else 0.0,
+            "max_batch_size": self._largest_batch,
+            "avg_queue_latency_ms": (
+                self._queue_latency_total / self._latency_samples * 1000
+                if self._latency_samples else 0.0
+            ),
+            "max_queue_latency_ms": self._queue_latency_max * 1000,
+            "avg_batch_compute_ms": (
+                self._compute_time_total / self._batches * 1000 if self._batches else 0.0
+            ),
+        }
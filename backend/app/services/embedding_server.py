@@ -0,0 +1,236 @@
+"""
+Embedding Server - Shares one embedding model between worker processes
+
+Run it next to the API workers, from the backend directory:
+    
+    python -m app.services.embedding_server
+
+and start the workers with EMBEDDING_MODE=server. Messages on the Unix
+socket are framed by a 4-byte big-endian length. A request is a JSON object,
+either {"texts": [...]} or {"op": "stats"}. The response is a JSON header,
+{"shape": [n, dim]}, {"stats": {...}} or {"error": "..."}, followed for
+embeddings by n * dim float32 values.
+"""
+import asyncio
+import json
+import logging
+import socket
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from ..core.config import settings
+from .embedding_scheduler import EmbeddingScheduler
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct("!I")
+
+
+def _frame(header: Dict[str, Any], body: bytes = b"") -> bytes:
+    encoded = json.dumps(header).encode("utf-8")
+    return _LENGTH.pack(len(encoded)) + encoded + body
+
+
+class EmbeddingServer:
+    """
+    Serves embeddings over a Unix socket from a single model instance
+    
+    Requests from every connected worker go through one EmbeddingScheduler,
+    so texts from different processes are embedded in shared batches.
+    """
+    
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        socket_path: str,
+        max_batch_size: int = 32,
+        batch_window_ms: float = 5.0,
+        workers: int = 1
+    ):
+        self.socket_path = socket_path
+        self.scheduler = EmbeddingScheduler(
+            embeddings,
+            max_batch_size=max_batch_size,
+            batch_window_ms=batch_window_ms,
+            workers=workers
+        )
+        self.connections = 0
+    
+    async def _respond(self, request: Dict[str, Any]) -> bytes:
+        if request.get("op") == "stats":
+            return _frame({"stats": {**self.scheduler.stats(), "connections": self.connections}})
+        vectors = np.asarray(
+            await self.scheduler.embed_documents(request["texts"]),
+            dtype=np.float32
+        )
+        return _frame({"shape": list(vectors.shape)}, vectors.tobytes())
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+                payload = await reader.readexactly(length)
+                try:
+                    response = await self._respond(json.loads(payload))
+                except Exception as e:
+                    response = _frame({"error": str(e)})
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # The worker closed its connection
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+    
+    async def serve_forever(self) -> None:
+        """Listen on the socket until cancelled"""
+        path = Path(self.socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._handle, path=str(path))
+        async with server:
+            await server.serve_forever()
+
+
+class EmbeddingClient(Embeddings):
+    """
+    LangChain embeddings backed by an EmbeddingServer
+    
+    Each thread keeps its own connection, so the scheduler's worker threads
+    can have requests in flight at the same time. A connection broken by a
+    server restart is re-established once per request.
+    
+    With a fallback, texts are embedded in this process while the server's
+    socket is missing or refuses connections. The fallback model is loaded
+    on first use, and every request still tries the server first.
+    """
+    
+    def __init__(
+        self,
+        socket_path: str,
+        timeout: float = 30.0,
+        fallback: Optional[Callable[[], Embeddings]] = None
+    ):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.fallback = fallback
+        self._local = threading.local()
+        self._fallback_embeddings: Optional[Embeddings] = None
+        self._fallback_lock = threading.Lock()
+        self.fallback_requests = 0
+    
+    def _connection(self) -> socket.socket:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.timeout)
+            try:
+                connection.connect(self.socket_path)
+            except OSError:
+                connection.close()
+                raise
+            self._local.connection = connection
+        return connection
+    
+    def _disconnect(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+    
+    @staticmethod
+    def _read_exactly(connection: socket.socket, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = connection.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Embedding server closed the connection")
+            data.extend(chunk)
+        return bytes(data)
+    
+    def _exchange(self, request: Dict[str, Any]) -> Tuple[Dict[str, Any], socket.socket]:
+        frame = _frame(request)
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.sendall(frame)
+                (length,) = _LENGTH.unpack(self._read_exactly(connection, _LENGTH.size))
+                header = json.loads(self._read_exactly(connection, length))
+                break
+            except ConnectionError:
+                self._disconnect()
+                if attempt:
+                    raise
+            except OSError:
+                # Timeouts and other failures leave the stream out of sync
+                self._disconnect()
+                raise
+        if "error" in header:
+            raise Exception(f"Embedding server error: {header['error']}")
+        return header, connection
+    
+    def _embed_locally(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the fallback model, loading it on first use"""
+        with self._fallback_lock:
+            if self._fallback_embeddings is None:
+                logger.warning(
+                    "Embedding server unavailable at %s, embedding in this process",
+                    self.socket_path
+                )
+                self._fallback_embeddings = self.fallback()
+            self.fallback_requests += 1
+        return self._fallback_embeddings.embed_documents(texts)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts on the server, or with the fallback if it is unreachable"""
+        if not texts:
+            return []
+        try:
+            header, connection = self._exchange({"texts": texts})
+        except (FileNotFoundError, ConnectionRefusedError):
+            if self.fallback is None:
+                raise
+            return self._embed_locally(texts)
+        rows, dim = header["shape"]
+        try:
+            body = self._read_exactly(connection, rows * dim * 4)
+        except OSError:
+            self._disconnect()
+            raise
+        return np.frombuffer(body, dtype=np.float32).reshape(rows, dim).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text on the server"""
+        return self.embed_documents([text])[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Batching metrics of the server"""
+        header, _ = self._exchange({"op": "stats"})
+        return header["stats"]
+
+
+def main() -> None:
+    """Load the model and serve it on EMBEDDING_SERVER_SOCKET"""
+    from .embeddings import create_local_embeddings
+    
+    server = EmbeddingServer(
+        create_local_embeddings(),
+        settings.EMBEDDING_SERVER_SOCKET,
+        max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+        batch_window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+        workers=settings.EMBEDDING_WORKERS
+    )
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Serving %s embeddings on %s", settings.EMBEDDING_MODEL, settings.EMBEDDING_SERVER_SOCKET)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Embeddings - Creates the embedding model configured in settings"""
+from langchain_core.embeddings import Embeddings
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from ..core.config import settings
+
+
+def create_local_embeddings() -> Embeddings:
+    """Load the embedding model into this process using EMBEDDING_BACKEND"""
+    if settings.EMBEDDING_BACKEND == "torch":
+        if settings.EMBEDDING_INTRA_OP_THREADS > 0:
+            import torch
+            
+            torch.set_num_threads(settings.EMBEDDING_INTRA_OP_THREADS)
+        return HuggingFaceEmbeddings(
+            model_name=settings.EMBEDDING_MODEL,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+    elif settings.EMBEDDING_BACKEND == "onnx":
+        from .onnx_embeddings import OnnxEmbeddings
+        
+        return OnnxEmbeddings(
+            settings.EMBEDDING_MODEL,
+            settings.EMBEDDING_ONNX_DIRECTORY,
+            quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+            intra_op_threads=settings.EMBEDDING_INTRA_OP_THREADS,
+            batch_size=settings.EMBEDDING_MAX_BATCH_SIZE
+        )
+    else:
+        raise ValueError(f"Unsupported embedding backend: {settings.EMBEDDING_BACKEND}")
+
+
+def create_embeddings() -> Embeddings:
+    """Create embeddings according to EMBEDDING_MODE"""
+    if settings.EMBEDDING_MODE == "local":
+        return create_local_embeddings()
+    elif settings.EMBEDDING_MODE == "server":
+        from .embedding_server import EmbeddingClient
+        
+        return EmbeddingClient(
+            settings.EMBEDDING_SERVER_SOCKET,
+            timeout=settings.EMBEDDING_SERVER_TIMEOUT_SECONDS,
+            fallback=create_local_embeddings if settings.EMBEDDING_SERVER_FALLBACK else None
+        )
+    else:
+        raise ValueError(f"Unsupported embedding mode: {settings.EMBEDDING_MODE}")
@@ -0,0 +1,316 @@
+"""Ingestion Jobs - Background document ingestion with on-disk checkpoints"""
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from .vector_service import VectorDBService, get_vector_db_service
+
+
+class IngestionJobManager:
+    """
+    Queues document ingestion work and runs it on background workers
+    
+    Each job lives in its own directory holding the submitted documents and a
+    state file. The state is checkpointed after every committed batch of
+    chunks, and chunk IDs are derived from the job ID and chunk position, so
+    a job interrupted by a crash resumes from its last committed chunk and
+    replaying a batch overwrites rather than duplicates it.
+    
+    The job directory may be shared by several app processes. A worker
+    claims a job by holding an exclusive lock on its lock file while it
+    runs, so each job runs in one process at a time, and the lock is
+    released by the OS if that process dies. Status is always read from
+    the state file, so any process can report on any job. Once a job
+    completes, its documents are deleted and only the state file is kept.
+    A failed job keeps its documents, so it can be retried from its last
+    checkpoint, until it is deleted.
+    """
+    
+    ACTIVE_STATUSES = ("queued", "running")
+    
+    def __init__(
+        self,
+        get_vector_service: Callable[[], Awaitable[VectorDBService]],
+        job_directory: str,
+        workers: int = 1,
+        batch_chunks: int = 256
+    ):
+        self.get_vector_service = get_vector_service
+        self.job_directory = Path(job_directory)
+        self.workers = max(1, workers)
+        self.batch_chunks = max(1, batch_chunks)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+    
+    def _job_path(self, job_id: str) -> Path:
+        return self.job_directory / job_id
+    
+    def _write_state(self, state: Dict[str, Any]) -> None:
+        """Atomically checkpoint a job's state to disk"""
+        state["updated_at"] = time.time()
+        path = self._job_path(state["job_id"]) / "state.json"
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    
+    def _read_state(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Read a job's last checkpointed state, or None if it does not exist"""
+        try:
+            # Only IDs this manager generated map to a job directory
+            uuid.UUID(job_id)
+            with open(self._job_path(job_id) / "state.json") as f:
+                return json.load(f)
+        except (ValueError, FileNotFoundError):
+            return None
+    
+    def _claim(self, job_id: str) -> Optional[int]:
+        """Lock a job for this process, returning the lock's descriptor or None if taken"""
+        fd = os.open(self._job_path(job_id) / "job.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+    
+    def _load_documents(self, job_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Read a job's submitted documents back from disk"""
+        documents = []
+        with open(self._job_path(job_id) / "documents.jsonl") as f:
+            for line in f:
+                record = json.loads(line)
+                documents.append((record["content"], record["metadata"]))
+        return documents
+    
+    def _create_job(self, documents: List[Tuple[str, Optional[Dict[str, Any]]]]) -> Dict[str, Any]:
+        """Persist a new job's documents and initial state"""
+        job_id = str(uuid.uuid4())
+        path = self._job_path(job_id)
+        path.mkdir(parents=True)
+        with open(path / "documents.jsonl", "w") as f:
+            for content, metadata in documents:
+                f.write(json.dumps({"content": content, "metadata": metadata or {}}) + "\n")
+        
+        state = {
+            "job_id": job_id,
+            "status": "queued",
+            "total_documents": len(documents),
+            "total_chunks": None,
+            "committed_chunks": 0,
+            "chunks_added": 0,
+            "chunks_reused": 0,
+            "processing_seconds": 0.0,
+            "document_ids": None,
+            "error": None,
+            "created_at": time.time(),
+        }
+        self._write_state(state)
+        return state
+    
+    async def start(self) -> None:
+        """Start the workers and re-queue jobs left unfinished on disk"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self.job_directory.mkdir(parents=True, exist_ok=True)
+        
+        unfinished = []
+        for state_path in self.job_directory.glob("*/state.json"):
+            with open(state_path) as f:
+                state = json.load(f)
+            if state["status"] in self.ACTIVE_STATUSES:
+                unfinished.append(state)
+        # Jobs running in another process are skipped when they are claimed
+        for state in sorted(unfinished, key=lambda s: s["created_at"]):
+            self._queue.put_nowait(state["job_id"])
+        
+        self._worker_tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+    
+    async def stop(self) -> None:
+        """Stop the workers; running jobs resume on the next start"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+    
+    async def submit(self, documents: List[Tuple[str, Optional[Dict[str, Any]]]]) -> Dict[str, Any]:
+        """
+        Queue documents for background ingestion
+        
+        Args:
+            documents: (content, metadata) pairs
+        
+        Returns:
+            The new job's status
+        """
+        await self.start()
+        state = await asyncio.to_thread(self._create_job, documents)
+        self._queue.put_nowait(state["job_id"])
+        return self._status(state)
+    
+    async def retry_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Queue a failed job again, resuming from its last committed chunk
+        
+        Returns:
+            The job's status, or None if it does not exist
+        """
+        if self._read_state(job_id) is None:
+            return None
+        await self.start()
+        lock_fd = await asyncio.to_thread(self._claim, job_id)
+        if lock_fd is None:
+            raise ValueError("Job is running")
+        try:
+            # Re-read under the lock in case another process retried it
+            state = await asyncio.to_thread(self._read_state, job_id)
+            if state["status"] != "failed":
+                raise ValueError(f"Only failed jobs can be retried, not {state['status']} ones")
+            if not (self._job_path(job_id) / "documents.jsonl").exists():
+                raise ValueError("The job's documents are no longer available")
+            state["status"] = "queued"
+            state["error"] = None
+            await asyncio.to_thread(self._write_state, state)
+        finally:
+            os.close(lock_fd)
+        self._queue.put_nowait(job_id)
+        return self._status(state)
+    
+    def delete_job(self, job_id: str) -> bool:
+        """
+        Delete a job's documents and state; chunks it ingested are kept
+        
+        Returns:
+            Whether the job existed
+        """
+        if self._read_state(job_id) is None:
+            return False
+        lock_fd = self._claim(job_id)
+        if lock_fd is None:
+            raise ValueError("Job is running")
+        try:
+            shutil.rmtree(self._job_path(job_id))
+        finally:
+            os.close(lock_fd)
+        return True
+    
+    @staticmethod
+    def _status(state: Dict[str, Any]) -> Dict[str, Any]:
+        seconds = state["processing_seconds"]
+        return {
+            **state,
+            "chunks_per_second": state["committed_chunks"] / seconds if seconds else 0.0,
+        }
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job's status, or None if it does not exist"""
+        state = self._read_state(job_id)
+        if state is None:
+            return None
+        return self._status(state)
+    
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Return the status of every known job, newest first"""
+        states = []
+        for state_path in self.job_directory.glob("*/state.json"):
+            state = self._read_state(state_path.parent.name)
+            if state is not None:
+                states.append(state)
+        states.sort(key=lambda s: s["created_at"], reverse=True)
+        return [self._status(state) for state in states]
+    
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                lock_fd = await asyncio.to_thread(self._claim, job_id)
+                if lock_fd is None:
+                    # Another process is running it
+                    continue
+                try:
+                    # Re-read under the lock in case another process finished it
+                    state = await asyncio.to_thread(self._read_state, job_id)
+                    if state is not None and state["status"] in self.ACTIVE_STATUSES:
+                        await self._run_job(state)
+                finally:
+                    os.close(lock_fd)
+            finally:
+                self._queue.task_done()
+    
+    async def _run_job(self, state: Dict[str, Any]) -> None:
+        """Ingest a job's remaining chunks, checkpointing after each batch"""
+        job_id = state["job_id"]
+        try:
+            state["status"] = "running"
+            await asyncio.to_thread(self._write_state, state)
+            vector_service = await self.get_vector_service()
+            documents = await asyncio.to_thread(self._load_documents, job_id)
+            split = await vector_service.split_documents(
+                [content for content, _ in documents]
+            )
+            
+            chunks = []
+            metadatas = []
+            first_chunks = {}
+            for position, ((_, metadata), doc_chunks) in enumerate(zip(documents, split)):
+                if doc_chunks:
+                    first_chunks[len(chunks)] = position
+                chunks.extend(doc_chunks)
+                metadatas.extend(metadata for _ in doc_chunks)
+            
+            state["total_chunks"] = len(chunks)
+            if state["document_ids"] is None:
+                state["document_ids"] = ["unknown"] * len(documents)
+            await asyncio.to_thread(self._write_state, state)
+            
+            for start in range(state["committed_chunks"], len(chunks), self.batch_chunks):
+                end = min(start + self.batch_chunks, len(chunks))
+                started = time.perf_counter()
+                ids, reused = await vector_service.ingest_chunks(
+                    chunks[start:end],
+                    metadatas[start:end],
+                    ids=[f"{job_id}-{index}" for index in range(start, end)]
+                )
+                
+                # The first chunk ID identifies each document
+                for index in range(start, end):
+                    if index in first_chunks:
+                        state["document_ids"][first_chunks[index]] = ids[index - start]
+                state["chunks_reused"] += sum(reused)
+                state["chunks_added"] += len(reused) - sum(reused)
+                state["committed_chunks"] = end
+                state["processing_seconds"] += time.perf_counter() - started
+                await asyncio.to_thread(self._write_state, state)
+            
+            state["status"] = "completed"
+        except Exception as e:
+            state["status"] = "failed"
+            state["error"] = str(e)
+        await asyncio.to_thread(self._finish, state)
+    
+    def _finish(self, state: Dict[str, Any]) -> None:
+        """Checkpoint a job's final state, deleting its documents once it has completed"""
+        self._write_state(state)
+        if state["status"] == "completed":
+            (self._job_path(state["job_id"]) / "documents.jsonl").unlink(missing_ok=True)
+
+
+# Singleton instance
+ingestion_job_manager = IngestionJobManager(
+    get_vector_db_service,
+    job_directory=settings.INGEST_JOB_DIRECTORY,
+    workers=settings.INGEST_JOB_WORKERS,
+    batch_chunks=settings.INGEST_JOB_BATCH_CHUNKS
+)
@@ -0,0 +1,370 @@
+"""LLM Clients - Pooled async HTTP clients for the LLM providers"""
+import asyncio
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from ..core.config import settings
+
+# Statuses worth retrying: rate limited, or the server is restarting or overloaded
+_RETRY_STATUSES = {429, 502, 503, 504}
+
+# Failures that happen before the server starts on the request, so a
+# retry cannot run a generation twice. Read timeouts are not retried.
+_RETRY_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    httpx.RemoteProtocolError
+)
+
+
+class HTTPTransport:
+    """
+    Pooled async HTTP client with timeouts and retries
+    
+    Connections are kept alive and reused across requests, up to the
+    configured pool size, instead of opening a connection per generation.
+    Requests that fail to connect, or that are rejected with a retryable
+    status, are retried with exponential backoff and jitter.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_seconds: float = 60.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        retries: int = 2,
+        retry_backoff: float = 0.5
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers or {}
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_seconds
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout)
+        self.retries = max(0, retries)
+        self.retry_backoff = retry_backoff
+        # Pooled connections belong to the event loop that opened them, so
+        # each loop gets its own client
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        
+        # Metrics
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._timed_requests = 0
+        self._request_time_total = 0.0
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the client, creating it for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Clients of closed loops can no longer be used or closed
+            for closed in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed]
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=self.limits,
+                timeout=self.timeout
+            )
+        return client
+    
+    async def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> None:
+        """Wait before retrying, honoring a numeric Retry-After header"""
+        self._retries += 1
+        delay = self.retry_backoff * 2 ** attempt + random.uniform(0, self.retry_backoff)
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("retry-after", 0)))
+            except ValueError:
+                pass
+        await asyncio.sleep(delay)
+    
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Send a request and yield the response before its body is read
+        
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            json: Optional JSON body
+            timeout: Optional read timeout overriding the default
+        
+        Returns:
+            The response, with a successful status
+        """
+        client = self._get_client()
+        request_timeout = self.timeout if timeout is None else httpx.Timeout(
+            timeout, connect=self.timeout.connect, pool=self.timeout.pool
+        )
+        self._requests += 1
+        attempt = 0
+        while True:
+            request = client.build_request(method, path, json=json, timeout=request_timeout)
+            try:
+                response = await client.send(request, stream=True)
+            except _RETRY_ERRORS:
+                if attempt >= self.retries:
+                    self._failures += 1
+                    raise
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+            except httpx.HTTPError:
+                self._failures += 1
+                raise
+            
+            if response.status_code in _RETRY_STATUSES and attempt < self.retries:
+                await response.aclose()
+                await self._backoff(attempt, response)
+                attempt += 1
+                continue
+            try:
+                if response.is_error:
+                    self._failures += 1
+                    await response.aread()
+                    response.raise_for_status()
+                yield response
+            finally:
+                await response.aclose()
+            return
+    
+    async def request(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Send a request and return its decoded JSON body
+        
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            json: Optional JSON body
+            timeout: Optional read timeout overriding the default
+        
+        Returns:
+            The decoded response body
+        """
+        started = time.perf_counter()
+        async with self.stream(method, path, json=json, timeout=timeout) as response:
+            await response.aread()
+        self._timed_requests += 1
+        self._request_time_total += time.perf_counter() - started
+        return response.json()
+    
+    async def aclose(self) -> None:
+        """Close pooled connections on every event loop"""
+        current = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for loop, client in clients.items():
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                # Connections must be closed on the loop that opened them
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+            # Otherwise the loop is stopped and its client cannot be awaited
+    
+    def stats(self) -> Dict[str, Any]:
+        """Request volume, retries and pool limits"""
+        return {
+            "base_url": self.base_url,
+            "requests": self._requests,
+            "retries": self._retries,
+            "failures": self._failures,
+            "avg_request_ms": (
+                self._request_time_total / self._timed_requests * 1000
+                if self._timed_requests else None
+            ),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections
+        }
+
+
+class LLMClient(ABC):
+    """
+    Generates text through a provider's HTTP API
+    
+    Subclasses implement generation, streaming and a lightweight ping.
+    Health checks ping the provider, and the result is cached so frequent
+    probes do not reach the provider every time.
+    """
+    
+    def __init__(self, transport: HTTPTransport, model: str, health_cache_seconds: float = 10.0):
+        self.transport = transport
+        self.model = model
+        self.health_cache_seconds = health_cache_seconds
+        self._health: Optional[bool] = None
+        self._health_checked = 0.0
+    
+    @abstractmethod
+    async def generate(self, prompt: str) -> str:
+        """Generate a completion for a prompt"""
+    
+    @abstractmethod
+    def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream a completion for a prompt, token by token"""
+    
+    @abstractmethod
+    async def ping(self) -> None:
+        """Make a cheap request, raising if the provider is unreachable"""
+    
+    async def healthy(self) -> bool:
+        """Whether the provider answered the last ping, refreshed when stale"""
+        if self._health is None or time.monotonic() - self._health_checked >= self.health_cache_seconds:
+            try:
+                await self.ping()
+                self._health = True
+            except Exception:
+                self._health = False
+            self._health_checked = time.monotonic()
+        return self._health
+    
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        await self.transport.aclose()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Transport metrics and the last health check result"""
+        return {**self.transport.stats(), "model": self.model, "healthy": self._health}
+
+
+class OllamaClient(LLMClient):
+    """Client for the Ollama generate API"""
+    
+    async def generate(self, prompt: str) -> str:
+        body = await self.transport.request(
+            "POST",
+            "/api/generate",
+            json={"model": self.model, "prompt": prompt, "stream": False}
+        )
+        return body["response"]
+    
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        async with self.transport.stream(
+            "POST",
+            "/api/generate",
+            json={"model": self.model, "prompt": prompt, "stream": True}
+        ) as response:
+            # One JSON object per line, the last with done set. The body
+            # is read to the end so the connection can be reused.
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    raise Exception(f"Ollama error: {event['error']}")
+                if event.get("response"):
+                    yield event["response"]
+    
+    async def ping(self) -> None:
+        # Lists the local models without loading one
+        await self.transport.request("GET", "/api/tags")
+
+
+class OpenAIClient(LLMClient):
+    """Client for the OpenAI chat completions API"""
+    
+    def _body(self, prompt: str, stream: bool) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream
+        }
+    
+    async def generate(self, prompt: str) -> str:
+        body = await self.transport.request("POST", "/chat/completions", json=self._body(prompt, False))
+        return body["choices"][0]["message"]["content"]
+    
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        async with self.transport.stream(
+            "POST",
+            "/chat/completions",
+            json=self._body(prompt, True)
+        ) as response:
+            # Server-sent events, ending with a [DONE] event
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    continue
+                choices = json.loads(data).get("choices")
+                token = choices[0].get("delta", {}).get("content") if choices else None
+                if token:
+                    yield token
+    
+    async def ping(self) -> None:
+        await self.transport.request("GET", "/models")
+
+
+def create_transport(base_url: str, headers: Optional[Dict[str, str]] = None) -> HTTPTransport:
+    """Create an HTTP transport configured from settings"""
+    return HTTPTransport(
+        base_url,
+        headers=headers,
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_seconds=settings.LLM_HTTP_KEEPALIVE_SECONDS,
+        connect_timeout=settings.LLM_HTTP_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.LLM_HTTP_READ_TIMEOUT_SECONDS,
+        retries=settings.LLM_HTTP_RETRIES,
+        retry_backoff=settings.LLM_HTTP_RETRY_BACKOFF_SECONDS
+    )
+
+
+def create_llm_clients(provider: str) -> List[LLMClient]:
+    """
+    Create a client per configured backend of an LLM provider
+    
+    Args:
+        provider: Provider name (ollama or openai)
+    
+    Returns:
+        Clients configured from settings
+    """
+    if provider == "ollama":
+        return [
+            OllamaClient(
+                create_transport(base_url),
+                settings.OLLAMA_MODEL,
+                health_cache_seconds=settings.LLM_HEALTH_CACHE_SECONDS
+            )
+            for base_url in settings.OLLAMA_BASE_URLS or [settings.OLLAMA_BASE_URL]
+        ]
+    elif provider == "openai":
+        return [
+            OpenAIClient(
+                create_transport(
+                    settings.OPENAI_BASE_URL,
+                    headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+                ),
+                settings.OPENAI_MODEL,
+                health_cache_seconds=settings.LLM_HEALTH_CACHE_SECONDS
+            )
+        ]
+    else:
+        raise ValueError(f"Unsupported LLM provider: {provider}")
@@ -0,0 +1,274 @@
+"""LLM Router - Balances generations across several LLM backends"""
+import hashlib
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+import httpx
+
+from ..core.config import settings
+from .llm_clients import LLMClient, create_llm_clients
+
+# Weight of the newest sample in a backend's latency average
+_LATENCY_DECAY = 0.3
+
+# Errors that say the backend itself is unreachable or broken. Anything
+# else, such as a read timeout on a long generation or a rejected request,
+# would fail the same way elsewhere, so it is raised without failing over.
+_BACKEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    """Whether an error should count against the backend and fail over"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, _BACKEND_ERRORS)
+
+
+class Backend:
+    """A routed client with its load, latency and failure state"""
+    
+    def __init__(self, client: LLMClient):
+        self.client = client
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.latency: Optional[float] = None
+    
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > time.monotonic()
+    
+    def record_latency(self, seconds: float) -> None:
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += _LATENCY_DECAY * (seconds - self.latency)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.client.stats(),
+            "outstanding": self.outstanding,
+            "routed_requests": self.requests,
+            "routed_failures": self.failures,
+            "ejections": self.ejections,
+            "ejected": self.ejected,
+            "latency_ms": self.latency * 1000 if self.latency is not None else None
+        }
+
+
+class LLMRouter:
+    """
+    Routes each generation to one of several equivalent backends
+    
+    With the least_outstanding policy a request goes to the backend with
+    the fewest requests in flight. The latency policy also weighs each
+    backend by a moving average of its recent latency (time to first token
+    when streaming), so slower backends receive proportionally less.
+    
+    A backend that fails max_failures times in a row is ejected for
+    eject_seconds, then readmitted once it answers a health check. Only
+    connection failures and 5xx or 429 responses count as failures; a
+    request failing that way before it has produced output is retried on
+    another backend. Other errors are raised to the caller. If every
+    backend is ejected, they are used anyway rather than failing every
+    request.
+    
+    With affinity, requests carrying a routing key, such as a conversation
+    ID, prefer the same backend by rendezvous hashing, so the backend can
+    reuse the conversation's cached prompt prefix. The preferred backend
+    is skipped while it has more than affinity_slack requests in flight
+    beyond the least loaded one.
+    """
+    
+    def __init__(
+        self,
+        clients: List[LLMClient],
+        policy: str = "least_outstanding",
+        affinity: bool = True,
+        affinity_slack: int = 2,
+        max_failures: int = 3,
+        eject_seconds: float = 30.0
+    ):
+        if not clients:
+            raise ValueError("The LLM router needs at least one backend")
+        if policy not in ("least_outstanding", "latency"):
+            raise ValueError(f"Unsupported LLM routing policy: {policy}")
+        self.backends = [Backend(client) for client in clients]
+        self.policy = policy
+        self.affinity = affinity
+        self.affinity_slack = affinity_slack
+        self.max_failures = max(1, max_failures)
+        self.eject_seconds = eject_seconds
+        # Round-robin offset to break ties between idle backends
+        self._turn = 0
+    
+    def _load(self, backend: Backend) -> float:
+        """Routing cost of sending one more request to a backend"""
+        if self.policy == "latency":
+            # Unmeasured backends cost nothing, so each gets probed early
+            return (backend.outstanding + 1) * (backend.latency or 0.0)
+        return backend.outstanding
+    
+    @staticmethod
+    def _affinity_score(key: str, backend: Backend) -> bytes:
+        return hashlib.blake2b(
+            f"{key}\n{backend.client.transport.base_url}".encode("utf-8"),
+            digest_size=8
+        ).digest()
+    
+    async def _available(self, exclude: Set[Backend]) -> List[Backend]:
+        """Backends not ejected, readmitting those that pass a health check"""
+        available = []
+        for backend in self.backends:
+            if backend in exclude or backend.ejected:
+                continue
+            if backend.consecutive_failures >= self.max_failures:
+                # Ejection has expired; readmit only a backend that answers,
+                # and eject it again on its next failure
+                if not await backend.client.healthy():
+                    self._eject(backend)
+                    continue
+                backend.consecutive_failures = self.max_failures - 1
+            available.append(backend)
+        if not available:
+            # Fail open, trying the backend due back soonest
+            remaining = [backend for backend in self.backends if backend not in exclude]
+            if remaining:
+                available = [min(remaining, key=lambda backend: backend.ejected_until)]
+        return available
+    
+    async def _select(self, routing_key: Optional[str], exclude: Set[Backend]) -> Optional[Backend]:
+        """Pick the backend for the next attempt, None when all have been tried"""
+        available = await self._available(exclude)
+        if not available:
+            return None
+        self._turn += 1
+        offset = self._turn % len(available)
+        best = min(available[offset:] + available[:offset], key=self._load)
+        if self.affinity and routing_key:
+            preferred = max(available, key=lambda backend: self._affinity_score(routing_key, backend))
+            if preferred.outstanding <= best.outstanding + self.affinity_slack:
+                return preferred
+        return best
+    
+    def _eject(self, backend: Backend) -> None:
+        backend.ejected_until = time.monotonic() + self.eject_seconds
+        backend.ejections += 1
+    
+    def _record_failure(self, backend: Backend) -> None:
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.max_failures:
+            self._eject(backend)
+    
+    async def generate(self, prompt: str, routing_key: Optional[str] = None) -> str:
+        """
+        Generate a completion on the selected backend
+        
+        Args:
+            prompt: Prompt text
+            routing_key: Optional key, such as a conversation ID, for affinity
+        
+        Returns:
+            Generated text
+        """
+        tried: Set[Backend] = set()
+        error: Optional[Exception] = None
+        while True:
+            backend = await self._select(routing_key, tried)
+            if backend is None:
+                raise error
+            tried.add(backend)
+            backend.outstanding += 1
+            backend.requests += 1
+            started = time.perf_counter()
+            try:
+                response = await backend.client.generate(prompt)
+            except Exception as e:
+                if not _is_backend_failure(e):
+                    raise
+                self._record_failure(backend)
+                error = e
+                continue
+            finally:
+                backend.outstanding -= 1
+            backend.consecutive_failures = 0
+            backend.record_latency(time.perf_counter() - started)
+            return response
+    
+    async def stream(self, prompt: str, routing_key: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream a completion from the selected backend, token by token
+        
+        A backend that fails after streaming has started is not retried,
+        since its tokens have already been passed on.
+        
+        Args:
+            prompt: Prompt text
+            routing_key: Optional key, such as a conversation ID, for affinity
+        """
+        tried: Set[Backend] = set()
+        error: Optional[Exception] = None
+        while True:
+            backend = await self._select(routing_key, tried)
+            if backend is None:
+                raise error
+            tried.add(backend)
+            backend.outstanding += 1
+            backend.requests += 1
+            started = time.perf_counter()
+            streamed = False
+            try:
+                async for token in backend.client.stream(prompt):
+                    if not streamed:
+                        streamed = True
+                        backend.record_latency(time.perf_counter() - started)
+                    yield token
+            except Exception as e:
+                if not _is_backend_failure(e):
+                    raise
+                self._record_failure(backend)
+                if streamed:
+                    raise
+                error = e
+                continue
+            finally:
+                backend.outstanding -= 1
+            backend.consecutive_failures = 0
+            return
+    
+    async def healthy(self) -> bool:
+        """Whether any backend answers its health check"""
+        for backend in self.backends:
+            if await backend.client.healthy():
+                return True
+        return False
+    
+    async def aclose(self) -> None:
+        """Close every backend's pooled connections"""
+        for backend in self.backends:
+            await backend.client.aclose()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Routing policy and per-backend load, latency and health"""
+        return {
+            "policy": self.policy,
+            "affinity": self.affinity,
+            "backends": [backend.stats() for backend in self.backends]
+        }
+
+
+def create_llm_router(provider: str) -> LLMRouter:
+    """Create a router over the provider's configured backends"""
+    return LLMRouter(
+        create_llm_clients(provider),
+        policy=settings.LLM_ROUTING_POLICY,
+        affinity=settings.LLM_ROUTING_AFFINITY,
+        affinity_slack=settings.LLM_ROUTING_AFFINITY_SLACK,
+        max_failures=settings.LLM_BACKEND_MAX_FAILURES,
+        eject_seconds=settings.LLM_BACKEND_EJECT_SECONDS
+    )
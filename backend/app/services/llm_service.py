@@ -1,13 +1,29 @@
 """LLM Service - Handles LLM interactions"""
-from typing import Optional, List
-from langchain_community.llms import Ollama
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import LLMChain
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, Optional, List, Set, Tuple
 
+from ..core.cache import TTLCache
 from ..core.config import settings
+from ..core.provider import ServiceProvider
+from ..core.singleflight import SingleFlight
 from ..models.schemas import ChatMessage
+from .conversation_store import create_conversation_store
+from .llm_router import LLMRouter, create_llm_router
+from .prompt_buffer import PromptBuffer
+from .semantic_cache import create_semantic_cache
+from .tokens import count_tokens
+
+
+SUMMARY_PROMPT = """Progressively summarize the conversation, adding the new lines to the existing summary. Keep the summary under {max_tokens} tokens and return only the summary.
+
+Existing summary:
+{summary}
+
+New lines:
+{transcript}
+
+New summary:"""
 
 
 class LLMService:
@@ -16,39 +32,194 @@ class LLMService:
     def __init__(self):
         self.provider = settings.LLM_PROVIDER
         self.llm = self._initialize_llm()
-        self.conversations = {}  # Store conversation memories
-    
-    def _initialize_llm(self):
-        """Initialize the LLM based on configuration"""
-        if self.provider == "ollama":
-            return Ollama(
-                base_url=settings.OLLAMA_BASE_URL,
-                model=settings.OLLAMA_MODEL
+        self.conversations = create_conversation_store()
+        self.response_cache = create_semantic_cache()
+        # Shares generations between identical concurrent first turns
+        self._inflight = SingleFlight()
+        # Bounds in-flight generations
+        self._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        # Rendered history per conversation, extended as turns are added
+        self._prompt_buffers = TTLCache(
+            maxsize=settings.CONVERSATION_MAX_CONVERSATIONS,
+            ttl=settings.CONVERSATION_IDLE_TTL_SECONDS
+        )
+        self._prompt_build_seconds = 0.0
+        self._prompts_built = 0
+        self._ttft_seconds = 0.0
+        self._streams = 0
+        # Conversations with a summary update in flight
+        self._summarizing: Set[str] = set()
+        self._background_tasks: Set[asyncio.Task] = set()
+    
+    def _initialize_llm(self) -> LLMRouter:
+        """Initialize the LLM backends based on configuration"""
+        return create_llm_router(self.provider)
+    
+    async def _ainvoke(self, prompt: str, conversation_id: Optional[str] = None) -> str:
+        """Generate a completion, routed by conversation to a backend"""
+        async with self._semaphore:
+            return await self.llm.generate(prompt, routing_key=conversation_id)
+    
+    async def _astream(self, prompt: str, conversation_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Stream a completion, routed by conversation to a backend"""
+        async with self._semaphore:
+            async for token in self.llm.stream(prompt, routing_key=conversation_id):
+                yield token
+    
+    async def get_conversation_history(self, conversation_id: str) -> List[ChatMessage]:
+        """Get a conversation's messages, oldest first"""
+        return await asyncio.to_thread(self.conversations.get_messages, conversation_id)
+    
+    async def _build_prompt(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        context: Optional[str] = None
+    ) -> Tuple[str, int, bool]:
+        """
+        Build the full prompt for a turn without touching conversation history
+        
+        History is trimmed to the newest messages that keep the prompt within
+        PROMPT_TOKEN_BUDGET, unless HISTORY_POLICY is "full". With the
+        "summary" policy, a running summary of older turns is included first.
+        
+        Returns:
+            The prompt, its token count and whether it includes earlier turns
+        """
+        # Build the prompt with context if provided
+        if context:
+            prompt = f"Context information:\n{context}\n\nUser question: {message}\n\nPlease answer the question based on the context provided."
+        else:
+            prompt = message
+        
+        if not conversation_id:
+            return prompt, count_tokens(prompt), False
+        
+        summary, summarized = "", 0
+        if settings.HISTORY_POLICY == "summary":
+            summary, summarized = await asyncio.to_thread(
+                self.conversations.get_summary, conversation_id
             )
-        elif self.provider == "openai":
-            from langchain_community.chat_models import ChatOpenAI
-            return ChatOpenAI(
-                api_key=settings.OPENAI_API_KEY,
-                model=settings.OPENAI_MODEL
+        summary_block = f"Summary of the earlier conversation:\n{summary}\n\n" if summary else ""
+        turn = f"{message}\n\nUser: {prompt}\nAssistant:"
+        turn_tokens = count_tokens(turn) + count_tokens(summary_block)
+        
+        # Extend the cached history with turns added since the last request
+        buffer = await self._get_prompt_buffer(conversation_id)
+        if settings.HISTORY_POLICY == "summary":
+            # Turns already folded into the summary are never repeated, and
+            # turns not yet folded in stay until the summary catches up
+            buffer.drop_before(summarized)
+            buffer.fit(settings.PROMPT_TOKEN_BUDGET - turn_tokens, limit=summarized)
+        elif settings.HISTORY_POLICY != "full":
+            buffer.fit(settings.PROMPT_TOKEN_BUDGET - turn_tokens)
+        
+        # Build prompt with history, followed by the pending user turn
+        full_prompt = summary_block + buffer.prefix + turn
+        return full_prompt, buffer.tokens + turn_tokens, buffer.message_count > 0
+    
+    async def _get_prompt_buffer(self, conversation_id: str) -> PromptBuffer:
+        """Return a conversation's prompt buffer, synced with the store"""
+        buffer = self._prompt_buffers.get(conversation_id)
+        if buffer is None:
+            buffer = PromptBuffer()
+            self._prompt_buffers.set(conversation_id, buffer)
+        
+        start = buffer.message_count
+        messages, total = await asyncio.to_thread(
+            self.conversations.get_messages_since, conversation_id, start
+        )
+        if total < start:
+            # The conversation was evicted or cleared; rebuild from scratch
+            buffer = PromptBuffer()
+            self._prompt_buffers.set(conversation_id, buffer)
+            messages, _ = await asyncio.to_thread(
+                self.conversations.get_messages_since, conversation_id, 0
             )
-        else:
-            raise ValueError(f"Unsupported LLM provider: {self.provider}")
-    
-    def get_conversation_memory(self, conversation_id: str) -> ConversationBufferMemory:
-        """Get or create conversation memory"""
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = ConversationBufferMemory(
-                return_messages=True,
-                memory_key="chat_history"
+            start = 0
+        # A concurrent request may have extended the buffer meanwhile
+        buffer.extend(messages[buffer.message_count - start:])
+        return buffer
+    
+    async def prepare_history(self, conversation_id: str) -> None:
+        """Load a conversation's new messages ahead of building its prompt"""
+        await self._get_prompt_buffer(conversation_id)
+    
+    async def _timed_build_prompt(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        context: Optional[str] = None
+    ) -> Tuple[str, int, bool]:
+        """Build the prompt, recording how long assembly took"""
+        started = time.perf_counter()
+        result = await self._build_prompt(message, conversation_id, context)
+        self._prompt_build_seconds += time.perf_counter() - started
+        self._prompts_built += 1
+        return result
+    
+    async def _save_turn(self, conversation_id: str, message: str, response: str) -> None:
+        """Record a completed user/assistant exchange in the conversation store"""
+        await asyncio.to_thread(self.conversations.append_messages, conversation_id, [
+            ChatMessage(role="user", content=message),
+            ChatMessage(role="assistant", content=response)
+        ])
+        if settings.HISTORY_POLICY == "summary" and conversation_id not in self._summarizing:
+            self._summarizing.add(conversation_id)
+            task = asyncio.create_task(self._update_summary(conversation_id))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+    
+    async def _update_summary(self, conversation_id: str) -> None:
+        """
+        Fold turns that have left the history window into the running summary
+        
+        Runs after a turn completes so it never delays a response. The window
+        is the one the last prompt was built with, so exactly the turns the
+        prompt buffer needs to drop are summarized; until then it keeps them,
+        even over budget. Only those turns are sent to the LLM together with
+        the previous summary, so each update costs the same no matter how
+        long the conversation is.
+        """
+        try:
+            buffer = self._prompt_buffers.get(conversation_id)
+            if buffer is None:
+                return
+            start = buffer.evict_to
+            summary, summarized = await asyncio.to_thread(
+                self.conversations.get_summary, conversation_id
             )
-        return self.conversations[conversation_id]
+            if start <= summarized:
+                return
+            
+            history = await self.get_conversation_history(conversation_id)
+            
+            transcript = "\n".join(
+                f"{msg.role.capitalize()}: {msg.content}" for msg in history[summarized:start]
+            )
+            new_summary = await self._ainvoke(SUMMARY_PROMPT.format(
+                max_tokens=settings.HISTORY_SUMMARY_MAX_TOKENS,
+                summary=summary or "(none)",
+                transcript=transcript
+            ))
+            await asyncio.to_thread(
+                self.conversations.set_summary,
+                conversation_id,
+                new_summary.strip(),
+                start
+            )
+        except Exception:
+            # A failed update is retried after the next turn
+            pass
+        finally:
+            self._summarizing.discard(conversation_id)
     
     async def chat(
         self,
         message: str,
         conversation_id: Optional[str] = None,
         context: Optional[str] = None
-    ) -> str:
+    ) -> Dict[str, Any]:
         """
         Generate a response using the LLM
         
@@ -58,53 +229,132 @@ class LLMService:
             context: Optional additional context (e.g., from vector DB)
         
         Returns:
-            LLM response
+            LLM response message, the prompt token count and whether the
+            answer came from the response cache
         """
         try:
-            # Build the prompt with context if provided
-            if context:
-                prompt = f"Context information:\n{context}\n\nUser question: {message}\n\nPlease answer the question based on the context provided."
+            prompt, prompt_tokens, has_history = await self._timed_build_prompt(
+                message, conversation_id, context
+            )
+            
+            # Answers depend on earlier turns, so only first turns are shared
+            if has_history:
+                response, cached = await self._ainvoke(prompt, conversation_id), False
             else:
-                prompt = message
+                response, cached = await self._inflight.do(
+                    prompt,
+                    lambda: self._answer_first_turn(prompt, message, context, conversation_id)
+                )
             
-            # Use conversation memory if provided
             if conversation_id:
-                memory = self.get_conversation_memory(conversation_id)
-                memory.chat_memory.add_user_message(message)
-                
-                # Get chat history
-                history = memory.load_memory_variables({}).get("chat_history", [])
-                
-                # Build prompt with history
-                full_prompt = ""
-                for msg in history:
-                    if hasattr(msg, 'content'):
-                        full_prompt += f"{msg.content}\n"
-                full_prompt += f"\nUser: {prompt}\nAssistant:"
-                
-                response = self.llm.invoke(full_prompt)
-                memory.chat_memory.add_ai_message(response)
-            else:
-                response = self.llm.invoke(prompt)
+                await self._save_turn(conversation_id, message, response)
             
-            return response
+            return {
+                "message": response,
+                "prompt_tokens": prompt_tokens,
+                "cached": cached
+            }
         except Exception as e:
             raise Exception(f"Error generating response: {str(e)}")
     
+    async def _answer_first_turn(
+        self,
+        prompt: str,
+        message: str,
+        context: Optional[str],
+        conversation_id: Optional[str] = None
+    ) -> Tuple[str, bool]:
+        """Answer a prompt without history, using the response cache if enabled"""
+        cache = self.response_cache
+        if cache:
+            question = await cache.embed_question(message)
+            cached = await cache.lookup(question, context)
+            if cached is not None:
+                return cached, True
+        
+        started = time.perf_counter()
+        response = await self._ainvoke(prompt, conversation_id)
+        if cache:
+            await cache.store(question, context, response, time.perf_counter() - started)
+        return response, False
+    
+    async def stream_chat(
+        self,
+        message: str,
+        conversation_id: Optional[str] = None,
+        context: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response from the LLM token by token
+        
+        Conversation history is only updated once the stream completes, so an
+        abandoned stream leaves the history untouched.
+        
+        Args:
+            message: User message
+            conversation_id: Optional conversation ID for context
+            context: Optional additional context (e.g., from vector DB)
+        
+        Yields:
+            {"token": ...} for each generated token, then a final
+            {"done": True, "prompt_tokens": ..., "ttft_ms": ...}
+        """
+        tokens = []
+        started = time.perf_counter()
+        ttft = None
+        try:
+            prompt, prompt_tokens, _ = await self._timed_build_prompt(message, conversation_id, context)
+            async for token in self._astream(prompt, conversation_id):
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    self._ttft_seconds += ttft
+                    self._streams += 1
+                tokens.append(token)
+                yield {"token": token}
+        except Exception as e:
+            raise Exception(f"Error streaming response: {str(e)}")
+        
+        if conversation_id:
+            await self._save_turn(conversation_id, message, "".join(tokens))
+        yield {
+            "done": True,
+            "prompt_tokens": prompt_tokens,
+            "ttft_ms": ttft * 1000 if ttft is not None else None
+        }
+    
     def clear_conversation(self, conversation_id: str) -> None:
         """Clear conversation history"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.conversations.delete(conversation_id)
+        self._prompt_buffers.pop(conversation_id)
     
-    def health_check(self) -> bool:
-        """Check if LLM service is healthy"""
-        try:
-            # Try a simple prompt
-            self.llm.invoke("Test")
-            return True
-        except:
-            return False
+    def stats(self) -> Dict[str, Any]:
+        """Return LLM service metrics"""
+        return {
+            "conversations": self.conversations.stats(),
+            "prompt_buffers": self._prompt_buffers.stats(),
+            "avg_prompt_build_ms": (
+                self._prompt_build_seconds / self._prompts_built * 1000
+                if self._prompts_built else 0.0
+            ),
+            "avg_ttft_ms": self._ttft_seconds / self._streams * 1000 if self._streams else 0.0,
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+            "coalescing": self._inflight.stats(),
+            "routing": self.llm.stats()
+        }
+    
+    async def health_check(self) -> bool:
+        """Check if any LLM backend is reachable, from recent pings if any"""
+        return await self.llm.healthy()
+    
+    async def aclose(self) -> None:
+        """Close pooled provider connections"""
+        await self.llm.aclose()
+
+
+# Lazily created instance
+llm_provider = ServiceProvider("llm", LLMService)
 
 
-# Singleton instance
-llm_service = LLMService()
+async def get_llm_service() -> LLMService:
+    """Return the LLM service, creating it on first use"""
+    return await llm_provider.get()
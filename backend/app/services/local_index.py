@@ -0,0 +1,455 @@
+"""Local Index - In-process vector index backed by a memory-mapped matrix"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .metadata_index import MetadataIndex
+
+
+class LocalVectorIndex:
+    """
+    Vector index stored as memory-mappable files in a local directory
+    
+    Vectors live in a contiguous float32 file and each row's ID, text and
+    metadata in a JSON blob file, located through a (start, length) offsets
+    file. All three are memory-mapped, so opening an index reads only a
+    small manifest regardless of its size, and processes opening the same
+    directory share the pages through the OS page cache. An exact top-k is
+    one matrix-vector product over the mapped vectors; records are decoded
+    only for the rows returned.
+    
+    Upserting an existing ID overwrites its vector in place and appends its
+    new record to the blob. The manifest, replaced atomically after every
+    write, marks how many rows are committed. An optional HNSW graph (via
+    hnswlib) answers unfiltered queries approximately; it is rebuilt from
+    the matrix when its saved copy is stale.
+    
+    A read-only index never writes and remaps the files when another
+    process commits new rows, so several workers can serve searches from
+    one directory maintained by a single writer. Its ID and metadata
+    indexes are extended across remaps rather than rebuilt: new rows are
+    decoded, and rows the writer overwrote are found by comparing their
+    offsets with the ones last indexed.
+    
+    Scores are squared L2 distances between normalized vectors, as Chroma
+    reports them, so lower is better.
+    """
+    
+    VECTORS_FILE = "vectors.f32"
+    RECORDS_FILE = "records.bin"
+    OFFSETS_FILE = "offsets.u64"
+    IDS_FILE = "ids.txt"
+    MANIFEST_FILE = "manifest.json"
+    HNSW_FILE = "hnsw.bin"
+    FILES = (VECTORS_FILE, RECORDS_FILE, OFFSETS_FILE, IDS_FILE, MANIFEST_FILE, HNSW_FILE)
+    
+    def __init__(
+        self,
+        directory: str,
+        hnsw: bool = False,
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 200,
+        hnsw_ef_search: int = 64,
+        read_only: bool = False
+    ):
+        self.directory = Path(directory)
+        if not read_only:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.use_hnsw = hnsw
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        # Bumped when rows are discarded, so searches in flight can tell
+        # that the rows they scored no longer exist
+        self._epoch = 0
+        self._load()
+    
+    def _reset(self) -> None:
+        self.dim: Optional[int] = None
+        self.count = 0
+        # Bumped on every write; tells whether the saved HNSW graph is current
+        self.generation = 0
+        self._hnsw_generation = -1
+        self._manifest_mtime = None
+        # Changes when the index is cleared and rebuilt from scratch
+        self._identity: Optional[str] = None
+        self._vectors: Optional[np.memmap] = None
+        self._offsets: Optional[np.memmap] = None
+        self._records: Optional[np.memmap] = None
+        # Built on first use: ID to row, and the metadata index for filters
+        self._positions: Optional[Dict[str, int]] = None
+        self._ids_size = 0
+        self._metadata_index: Optional[MetadataIndex] = None
+        # Read-only: offsets and generation of the rows in the metadata index
+        self._indexed_offsets: Optional[np.ndarray] = None
+        self._indexed_generation = -1
+        self._hnsw = None
+    
+    def _load(self) -> None:
+        """Map the index files left by a previous run, if any"""
+        previous_identity, previous_count = getattr(self, "_identity", None), getattr(self, "count", 0)
+        kept = (
+            getattr(self, "_positions", None),
+            getattr(self, "_ids_size", 0),
+            getattr(self, "_metadata_index", None),
+            getattr(self, "_indexed_offsets", None),
+            getattr(self, "_indexed_generation", -1)
+        )
+        self._reset()
+        manifest_path = self.directory / self.MANIFEST_FILE
+        if not manifest_path.exists():
+            if previous_count:
+                self._epoch += 1
+            return
+        self._manifest_mtime = manifest_path.stat().st_mtime_ns
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        self.dim = manifest["dim"]
+        self.count = manifest["count"]
+        self._identity = manifest.get("identity")
+        cleared = self._identity != previous_identity or self.count < previous_count
+        if cleared and previous_count:
+            # The writer cleared the index; rows seen so far are gone
+            self._epoch += 1
+        elif not cleared and self.read_only:
+            # Rows only grow or are overwritten in place, so extend what is indexed
+            (
+                self._positions,
+                self._ids_size,
+                self._metadata_index,
+                self._indexed_offsets,
+                self._indexed_generation
+            ) = kept
+        self.generation = manifest["generation"]
+        self._hnsw_generation = manifest.get("hnsw_generation", -1)
+        self._map_files()
+        
+        if self.use_hnsw:
+            self._open_hnsw()
+    
+    def _map_files(self) -> None:
+        """Map the committed rows; data written past them is ignored"""
+        if not self.count:
+            self._vectors = self._offsets = self._records = None
+            return
+        mode = "r" if self.read_only else "r+"
+        self._vectors = np.memmap(
+            self.directory / self.VECTORS_FILE, dtype=np.float32, mode=mode, shape=(self.count, self.dim)
+        )
+        self._offsets = np.memmap(
+            self.directory / self.OFFSETS_FILE, dtype=np.uint64, mode=mode, shape=(self.count, 2)
+        )
+        self._records = np.memmap(self.directory / self.RECORDS_FILE, dtype=np.uint8, mode="r")
+    
+    def _refresh(self) -> None:
+        """Pick up rows committed by the writer process"""
+        try:
+            mtime = (self.directory / self.MANIFEST_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._manifest_mtime:
+            self._load()
+    
+    def _write_manifest(self) -> None:
+        if self._identity is None:
+            self._identity = uuid.uuid4().hex
+        manifest = {
+            "identity": self._identity,
+            "dim": self.dim,
+            "count": self.count,
+            "generation": self.generation,
+            "hnsw_generation": self._hnsw_generation
+        }
+        path = self.directory / self.MANIFEST_FILE
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        self._manifest_mtime = path.stat().st_mtime_ns
+    
+    def _open_hnsw(self) -> None:
+        """Load the saved HNSW graph, or build it if missing or stale"""
+        import hnswlib
+        
+        index = hnswlib.Index(space="ip", dim=self.dim)
+        path = self.directory / self.HNSW_FILE
+        capacity = max(1024, self.count * 2)
+        if path.exists() and self._hnsw_generation == self.generation:
+            index.load_index(str(path), max_elements=capacity)
+        elif self.read_only:
+            # Only the writer builds the graph; search exactly meanwhile
+            return
+        else:
+            index.init_index(
+                max_elements=capacity,
+                ef_construction=self.hnsw_ef_construction,
+                M=self.hnsw_m
+            )
+            if self.count:
+                index.add_items(np.asarray(self._vectors), np.arange(self.count))
+        index.set_ef(self.hnsw_ef_search)
+        self._hnsw = index
+    
+    def _decode(self, offset: np.ndarray) -> Tuple[str, str, Dict[str, Any]]:
+        """Decode the (id, text, metadata) record at a (start, length) offset"""
+        start, length = (int(value) for value in offset)
+        if start + length > len(self._records):
+            # The record was rewritten by another process since the blob was mapped
+            self._records = np.memmap(self.directory / self.RECORDS_FILE, dtype=np.uint8, mode="r")
+        return tuple(json.loads(self._records[start:start + length].tobytes()))
+    
+    def _record(self, row: int) -> Tuple[str, str, Dict[str, Any]]:
+        """Decode a row's ID, text and metadata"""
+        return self._decode(self._offsets[row])
+    
+    def _get_positions(self) -> Dict[str, int]:
+        """Map IDs to rows, reading the ID list on first use and new IDs after a remap"""
+        if self._positions is None:
+            self._positions = {}
+            self._ids_size = 0
+        positions = self._positions
+        if len(positions) < self.count:
+            ids_path = self.directory / self.IDS_FILE
+            if ids_path.exists():
+                with open(ids_path, "rb") as f:
+                    f.seek(self._ids_size)
+                    for row, line in zip(range(len(positions), self.count), f):
+                        positions[line.decode("utf-8").rstrip("\n")] = row
+                        self._ids_size += len(line)
+        return positions
+    
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        """Insert new vectors and overwrite existing IDs in place"""
+        if self.read_only:
+            raise ValueError("The local index is open read-only")
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+            
+            positions = self._get_positions()
+            rows = []
+            new_rows = []
+            for i, doc_id in enumerate(ids):
+                row = positions.get(doc_id)
+                if row is None:
+                    row = self.count + len(new_rows)
+                    positions[doc_id] = row
+                    new_rows.append(i)
+                rows.append(row)
+            
+            # Append every record to the blob, new and replaced alike
+            offsets = np.empty((len(ids), 2), dtype=np.uint64)
+            with open(self.directory / self.RECORDS_FILE, "ab") as f:
+                position = f.tell()
+                for i, (doc_id, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                    record = json.dumps([doc_id, text, metadata]).encode("utf-8")
+                    f.write(record)
+                    offsets[i] = (position, len(record))
+                    position += len(record)
+            
+            # Truncate rows left uncommitted by a crash before appending
+            if new_rows:
+                for name, row_bytes in (
+                    (self.VECTORS_FILE, self.dim * 4),
+                    (self.OFFSETS_FILE, 16)
+                ):
+                    with open(self.directory / name, "ab") as f:
+                        f.truncate(self.count * row_bytes)
+                with open(self.directory / self.VECTORS_FILE, "ab") as f:
+                    f.write(vectors[new_rows].tobytes())
+                with open(self.directory / self.OFFSETS_FILE, "ab") as f:
+                    f.write(offsets[new_rows].tobytes())
+                with open(self.directory / self.IDS_FILE, "ab") as f:
+                    f.truncate(self._ids_size)
+                    added = "".join(f"{ids[i]}\n" for i in new_rows).encode("utf-8")
+                    f.write(added)
+                    self._ids_size += len(added)
+                self.count += len(new_rows)
+            self._map_files()
+            
+            appended = set(new_rows)
+            metadata_index = self._metadata_index
+            for i, row in enumerate(rows):
+                if i not in appended:
+                    if metadata_index is not None:
+                        metadata_index.remove(row, self._record(row)[2])
+                    self._vectors[row] = vectors[i]
+                    self._offsets[row] = offsets[i]
+                if metadata_index is not None:
+                    metadata_index.add(row, metadatas[i])
+            
+            if self._hnsw is None and self.use_hnsw:
+                self._open_hnsw()
+            elif self._hnsw is not None:
+                if self.count > self._hnsw.get_max_elements():
+                    self._hnsw.resize_index(self.count * 2)
+                self._hnsw.add_items(vectors, np.asarray(rows))
+            
+            self._vectors.flush()
+            self._offsets.flush()
+            self.generation += 1
+            self._write_manifest()
+    
+    def get(self, ids: List[str]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Look up (id, text, metadata) records by ID, skipping unknown IDs"""
+        with self._lock:
+            if self.read_only:
+                self._refresh()
+            positions = self._get_positions()
+            return [self._record(positions[doc_id]) for doc_id in ids if doc_id in positions]
+    
+    def _filter_rows(self, where: Dict[str, Any], count: int) -> np.ndarray:
+        """Rows matching a metadata filter, from the metadata index"""
+        if self.read_only:
+            self._sync_metadata_index()
+        elif self._metadata_index is None:
+            # Kept up to date by upsert from here on
+            metadata_index = MetadataIndex()
+            for row in range(self.count):
+                metadata_index.add(row, self._record(row)[2])
+            self._metadata_index = metadata_index
+        return np.flatnonzero(self._metadata_index.mask(where, count))
+    
+    def _sync_metadata_index(self) -> None:
+        """Index a reader's rows added or overwritten since the last filtered search"""
+        if self._metadata_index is None:
+            self._metadata_index = MetadataIndex()
+            self._indexed_offsets = np.empty((0, 2), dtype=np.uint64)
+        elif self._indexed_generation == self.generation:
+            return
+        metadata_index = self._metadata_index
+        indexed = self._indexed_offsets
+        offsets = np.array(self._offsets[:self.count])
+        # An overwritten row points at its new record; its old one is still in the blob
+        for row in np.flatnonzero((offsets[:len(indexed)] != indexed).any(axis=1)):
+            metadata_index.remove(int(row), self._decode(indexed[row])[2])
+            metadata_index.add(int(row), self._decode(offsets[row])[2])
+        for row in range(len(indexed), self.count):
+            metadata_index.add(row, self._decode(offsets[row])[2])
+        self._indexed_offsets = offsets
+        self._indexed_generation = self.generation
+    
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, str, Dict[str, Any], float]]:
+        """
+        Find the k nearest vectors, optionally restricted by metadata
+        
+        Returns:
+            (id, text, metadata, distance) tuples, nearest first
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if self.read_only:
+                self._refresh()
+            vectors, count, hnsw, epoch = self._vectors, self.count, self._hnsw, self._epoch
+            if not count or k <= 0:
+                return []
+            if filter_metadata:
+                rows = self._filter_rows(filter_metadata, count)
+        
+        if filter_metadata:
+            # Filtered queries scan only the matching rows exactly
+            if not len(rows):
+                return []
+            if len(rows) * 4 > count:
+                # Copying out most of the matrix costs more than scoring it all
+                similarities = (vectors @ query)[rows]
+            else:
+                similarities = vectors[rows] @ query
+        elif hnsw is not None:
+            labels, distances = hnsw.knn_query(query, k=min(k, count))
+            rows, similarities = labels[0].astype(np.int64), 1.0 - distances[0]
+        else:
+            rows = None
+            similarities = vectors @ query
+        
+        k = min(k, len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        results = []
+        with self._lock:
+            if self._epoch != epoch:
+                # Cleared while scoring
+                return []
+            for position in top:
+                row = int(rows[position]) if rows is not None else int(position)
+                doc_id, text, metadata = self._record(row)
+                results.append((
+                    doc_id,
+                    text,
+                    metadata,
+                    max(0.0, float(2.0 - 2.0 * similarities[position]))
+                ))
+        return results
+    
+    def persist(self) -> None:
+        """Flush written vectors to disk"""
+        with self._lock:
+            if self._vectors is not None and not self.read_only:
+                self._vectors.flush()
+                self._offsets.flush()
+    
+    def _save_hnsw(self) -> None:
+        if self.read_only:
+            return
+        if self._hnsw is not None and self._hnsw_generation != self.generation:
+            self._hnsw.save_index(str(self.directory / self.HNSW_FILE))
+            self._hnsw_generation = self.generation
+            self._write_manifest()
+    
+    def snapshot(self, destination: str) -> None:
+        """Copy a consistent snapshot of the index to another directory"""
+        destination = Path(destination)
+        destination.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._save_hnsw()
+            for name in self.FILES:
+                if (self.directory / name).exists():
+                    shutil.copy2(self.directory / name, destination / name)
+    
+    @classmethod
+    def load(cls, directory: str, **kwargs) -> "LocalVectorIndex":
+        """Open an index or snapshot directory"""
+        return cls(directory, **kwargs)
+    
+    def close(self) -> None:
+        """Save the HNSW graph so the next start can reuse it"""
+        with self._lock:
+            self._save_hnsw()
+    
+    def clear(self) -> None:
+        """Delete every vector"""
+        if self.read_only:
+            raise ValueError("The local index is open read-only")
+        with self._lock:
+            self._vectors = self._offsets = self._records = None
+            for name in self.FILES:
+                (self.directory / name).unlink(missing_ok=True)
+            self._reset()
+            self._epoch += 1
+    
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,147 @@
+"""Metadata Index - Inverted index used to pre-filter vector search"""
+import json
+from array import array
+from typing import Any, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+
+def _compare(value: Any, condition: Any) -> bool:
+    """Evaluate one Chroma-style metadata condition"""
+    if not isinstance(condition, dict):
+        return value == condition
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            matched = value == operand
+        elif operator == "$ne":
+            matched = value != operand
+        elif operator == "$in":
+            matched = value in operand
+        elif operator == "$nin":
+            matched = value not in operand
+        elif value is None:
+            matched = False
+        elif operator == "$gt":
+            matched = value > operand
+        elif operator == "$gte":
+            matched = value >= operand
+        elif operator == "$lt":
+            matched = value < operand
+        elif operator == "$lte":
+            matched = value <= operand
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        if not matched:
+            return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], where: Dict[str, Any]) -> bool:
+    """Check metadata against a Chroma-style `where` filter"""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, clause) for clause in condition):
+                return False
+        elif not _compare(metadata.get(key), condition):
+            return False
+    return True
+
+
+def _value_key(value: Any) -> Hashable:
+    """Dictionary key for a metadata value; lists and dicts are keyed by their JSON"""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("json", json.dumps(value, sort_keys=True, default=str))
+
+
+class MetadataIndex:
+    """
+    Inverted index from metadata key and value to row numbers
+    
+    Evaluates the same Chroma-style filters as matches_filter, but touches
+    only the postings of the filtered keys: an equality or $in condition
+    is a dictionary lookup, and other operators are checked once per
+    distinct value rather than once per row. Rows lacking a key are
+    treated as having the value None, as in matches_filter.
+    """
+    
+    def __init__(self):
+        # key -> value key -> (value, rows)
+        self._postings: Dict[str, Dict[Hashable, Tuple[Any, array]]] = {}
+    
+    def add(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Index a row's metadata"""
+        for key, value in metadata.items():
+            values = self._postings.setdefault(key, {})
+            entry = values.get(_value_key(value))
+            if entry is None:
+                entry = values[_value_key(value)] = (value, array("I"))
+            entry[1].append(row)
+    
+    def remove(self, row: int, metadata: Dict[str, Any]) -> None:
+        """Remove a row previously indexed with this metadata"""
+        for key, value in metadata.items():
+            values = self._postings.get(key, {})
+            entry = values.get(_value_key(value))
+            if entry is None:
+                continue
+            entry[1].remove(row)
+            if not entry[1]:
+                del values[_value_key(value)]
+    
+    def _mark(self, mask: np.ndarray, rows: array) -> None:
+        mask[np.frombuffer(rows, dtype=np.uint32)] = True
+    
+    def _key_mask(self, key: str, condition: Any, count: int) -> np.ndarray:
+        values = self._postings.get(key, {})
+        mask = np.zeros(count, dtype=bool)
+        if not isinstance(condition, dict) or set(condition) <= {"$eq", "$in"}:
+            # Look matching values up instead of testing every distinct value
+            if isinstance(condition, dict):
+                candidates: List[Any] = [condition["$eq"]] if "$eq" in condition else list(condition["$in"])
+            else:
+                candidates = [condition]
+            for candidate in candidates:
+                entry = values.get(_value_key(candidate))
+                if entry is not None and _compare(entry[0], condition):
+                    self._mark(mask, entry[1])
+        else:
+            for value, rows in values.values():
+                if _compare(value, condition):
+                    self._mark(mask, rows)
+        if _compare(None, condition):
+            present = np.zeros(count, dtype=bool)
+            for _, rows in values.values():
+                self._mark(present, rows)
+            mask |= ~present
+        return mask
+    
+    def mask(self, where: Dict[str, Any], count: int) -> np.ndarray:
+        """
+        Evaluate a filter over the first count rows
+        
+        Args:
+            where: Chroma-style filter
+            count: Number of rows
+        
+        Returns:
+            Boolean mask of the matching rows
+        """
+        mask = np.ones(count, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.mask(clause, count)
+            elif key == "$or":
+                matched = np.zeros(count, dtype=bool)
+                for clause in condition:
+                    matched |= self.mask(clause, count)
+                mask &= matched
+            else:
+                mask &= self._key_mask(key, condition, count)
+        return mask
@@ -0,0 +1,201 @@
+"""
+ONNX Embeddings - Runs a sentence-transformers model with ONNX Runtime
+
+The model is exported to ONNX once, optionally quantized to int8 weights,
+and cached on disk. Later starts only need onnxruntime and the tokenizer,
+not PyTorch.
+"""
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def export_onnx_model(model_name: str, directory: Path) -> None:
+    """
+    Export a sentence-transformers model to ONNX with an int8 copy
+    
+    Writes model.onnx, model.int8.onnx, the tokenizer files and
+    embedding.json (pooling mode, inputs and maximum sequence length)
+    to the directory. Requires torch, sentence-transformers and onnx.
+    
+    Args:
+        model_name: Name or path of the sentence-transformers model
+        directory: Where to write the exported files
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    pooling = "mean"
+    if len(model) > 1:
+        pooling_module = model[1]
+        if hasattr(pooling_module, "get_pooling_mode_str"):
+            pooling = pooling_module.get_pooling_mode_str()
+        else:
+            # Newer sentence-transformers releases name the mode directly
+            pooling = pooling_module.pooling_mode
+    if pooling not in ("mean", "cls", "max"):
+        raise ValueError(f"Unsupported pooling mode: {pooling}")
+    
+    sample = tokenizer(["warm up"], return_tensors="pt")
+    inputs = [name for name in tokenizer.model_input_names if name in sample]
+    
+    class Encoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+        
+        def forward(self, *args):
+            return self.transformer(**dict(zip(inputs, args))).last_hidden_state
+    
+    options = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # Keep the TorchScript exporter, which handles dynamic_axes everywhere
+        options["dynamo"] = False
+    
+    directory.mkdir(parents=True, exist_ok=True)
+    fp32_path = directory / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            Encoder(),
+            tuple(sample[name] for name in inputs),
+            str(fp32_path),
+            input_names=inputs,
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                name: {0: "batch", 1: "sequence"}
+                for name in inputs + ["last_hidden_state"]
+            },
+            opset_version=17,
+            **options
+        )
+    quantize_dynamic(str(fp32_path), str(directory / "model.int8.onnx"), weight_type=QuantType.QInt8)
+    
+    tokenizer.save_pretrained(str(directory))
+    (directory / "embedding.json").write_text(json.dumps({
+        "model": model_name,
+        "pooling": pooling,
+        "inputs": inputs,
+        "max_seq_length": model.max_seq_length
+    }))
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings computed with ONNX Runtime
+    
+    Texts are sorted by token length and padded per batch only to the
+    longest text in that batch, so short texts don't pay for long ones.
+    Vectors are pooled like the source model and L2-normalized, matching
+    the torch backend with normalize_embeddings=True.
+    """
+    
+    def __init__(
+        self,
+        model_name: str,
+        cache_directory: str,
+        quantize: bool = True,
+        intra_op_threads: int = 0,
+        batch_size: int = 32,
+        sort_by_length: bool = True
+    ):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        
+        directory = Path(cache_directory) / model_name.strip("/").replace("/", "--")
+        if not (directory / "embedding.json").exists():
+            export_onnx_model(model_name, directory)
+        config = json.loads((directory / "embedding.json").read_text())
+        self.pooling = config["pooling"]
+        self.inputs = config["inputs"]
+        self.max_seq_length = config["max_seq_length"]
+        self.batch_size = max(1, batch_size)
+        self.sort_by_length = sort_by_length
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(str(directory))
+        self.pad_token_id = self.tokenizer.pad_token_id or 0
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(directory / ("model.int8.onnx" if quantize else "model.onnx")),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        
+        # Metrics
+        self.tokens = 0
+        self.padded_tokens = 0
+    
+    def _pad(self, encoded: Dict[str, List[List[int]]], rows: List[int]) -> Dict[str, np.ndarray]:
+        width = max(len(encoded["input_ids"][i]) for i in rows)
+        batch = {}
+        for name in self.inputs:
+            fill = self.pad_token_id if name == "input_ids" else 0
+            array = np.full((len(rows), width), fill, dtype=np.int64)
+            for position, i in enumerate(rows):
+                values = encoded[name][i]
+                array[position, :len(values)] = values
+            batch[name] = array
+        self.padded_tokens += batch["input_ids"].size
+        return batch
+    
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            vectors = hidden[:, 0]
+        elif self.pooling == "max":
+            vectors = np.where(mask[:, :, None], hidden, -np.inf).max(axis=1)
+        else:
+            weights = mask[:, :, None].astype(hidden.dtype)
+            vectors = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in length-sorted, dynamically padded batches"""
+        if not texts:
+            return []
+        encoded = self.tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_attention_mask=True
+        )
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+        self.tokens += sum(lengths)
+        order = list(range(len(texts)))
+        if self.sort_by_length:
+            order.sort(key=lengths.__getitem__)
+        
+        vectors = None
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            batch = self._pad(encoded, rows)
+            width = batch["input_ids"].shape[1]
+            mask = np.arange(width)[None, :] < np.array([lengths[i] for i in rows])[:, None]
+            (hidden,) = self.session.run(None, batch)
+            pooled = self._pool(hidden, mask)
+            if vectors is None:
+                vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            vectors[rows] = pooled
+        return vectors.tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text"""
+        return self.embed_documents([text])[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Share of computed tokens that were real rather than padding"""
+        return {
+            "tokens": self.tokens,
+            "padded_tokens": self.padded_tokens,
+            "padding_efficiency": self.tokens / self.padded_tokens if self.padded_tokens else None
+        }
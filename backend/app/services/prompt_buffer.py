@@ -0,0 +1,83 @@
+"""Prompt Buffer - Incrementally rendered conversation history"""
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from ..models.schemas import ChatMessage
+from .tokens import count_tokens
+
+
+class PromptBuffer:
+    """
+    Rendered history prefix for one conversation, extended turn by turn
+    
+    Each message is rendered and token-counted once, when it is appended,
+    and the joined prefix is cached between turns. When the history outgrows
+    its budget, the oldest messages are dropped down to a low-water mark
+    rather than one turn at a time. The prefix then stays byte-identical for
+    several turns, which lets the model server reuse its KV cache for it.
+    
+    A trim can be limited to messages before a given store index, such as
+    the end of a running summary, so messages not yet summarized are never
+    dropped. `evict_to` then records where the trim would have stopped.
+    """
+    
+    # Fraction of the budget kept after trimming
+    LOW_WATER_RATIO = 0.6
+    
+    def __init__(self):
+        self.message_count = 0  # Messages consumed from the store
+        self.start = 0  # Store index of the oldest rendered message
+        self.evict_to = 0  # Store index the history must start at to fit its budget
+        self.tokens = 0
+        self._segments: Deque[Tuple[str, int]] = deque()
+        self._prefix = ""
+    
+    @property
+    def prefix(self) -> str:
+        """The rendered history"""
+        return self._prefix
+    
+    def extend(self, messages: List[ChatMessage]) -> None:
+        """Render and append new messages"""
+        for message in messages:
+            rendered = f"{message.content}\n"
+            tokens = count_tokens(message.content) + 1
+            self._segments.append((rendered, tokens))
+            self._prefix += rendered
+            self.tokens += tokens
+        self.message_count += len(messages)
+    
+    def drop_before(self, index: int) -> None:
+        """Drop rendered messages older than the given store index"""
+        dropped = False
+        while self.start < index and self._segments:
+            _, tokens = self._segments.popleft()
+            self.tokens -= tokens
+            self.start += 1
+            dropped = True
+        if dropped:
+            self._render()
+    
+    def fit(self, budget: int, limit: Optional[int] = None) -> None:
+        """
+        Trim the oldest messages if the history exceeds the token budget
+        
+        Args:
+            budget: Max history tokens
+            limit: Optional store index; messages from it on are kept even over budget
+        """
+        if self.tokens <= budget:
+            return
+        low_water = int(budget * self.LOW_WATER_RATIO)
+        tokens = self.tokens
+        end = self.start
+        for _, segment_tokens in self._segments:
+            if tokens <= low_water:
+                break
+            tokens -= segment_tokens
+            end += 1
+        self.evict_to = max(self.evict_to, end)
+        self.drop_before(end if limit is None else min(end, limit))
+    
+    def _render(self) -> None:
+        self._prefix = "".join(rendered for rendered, _ in self._segments)
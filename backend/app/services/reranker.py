@@ -0,0 +1,90 @@
+"""Reranker - Rescores retrieved chunks with a cross-encoder"""
+import threading
+import time
+from typing import Any, Dict, List
+
+from ..core.config import settings
+from ..core.provider import ServiceProvider
+from ..models.search_hit import SearchHit
+
+
+class CrossEncoderReranker:
+    """
+    Scores (query, chunk) pairs jointly with a small CPU cross-encoder
+    
+    A cross-encoder reads the query and chunk together, which ranks far
+    better than comparing independently computed embeddings, but costs a
+    model pass per candidate. It is therefore run only on the candidates
+    returned by vector search. Pairs are scored in length-sorted batches
+    so short chunks are not padded to the longest one, and one call runs
+    at a time since each already uses every core.
+    """
+    
+    def __init__(self, model_name: str, batch_size: int = 16, max_length: int = 512):
+        from sentence_transformers import CrossEncoder
+        
+        self.model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+        self.batch_size = max(1, batch_size)
+        self._lock = threading.Lock()
+        
+        # Metrics
+        self._calls = 0
+        self._pairs = 0
+        self._time_total = 0.0
+    
+    def rerank(self, query: str, candidates: List[SearchHit]) -> List[SearchHit]:
+        """
+        Order search results by cross-encoder relevance to the query
+        
+        Args:
+            query: Search query
+            candidates: Search hits
+        
+        Returns:
+            Copies of the hits with rerank_score set, most relevant first
+        """
+        if not candidates:
+            return []
+        order = sorted(range(len(candidates)), key=lambda i: len(candidates[i].content))
+        started = time.perf_counter()
+        with self._lock:
+            scores = self.model.predict(
+                [(query, candidates[i].content) for i in order],
+                batch_size=self.batch_size,
+                show_progress_bar=False
+            )
+            self._calls += 1
+            self._pairs += len(order)
+            self._time_total += time.perf_counter() - started
+        
+        # Copies, since the hits may be shared with the search cache
+        reranked = [
+            SearchHit(candidates[i].content, candidates[i].score, candidates[i].metadata, float(score))
+            for i, score in zip(order, scores)
+        ]
+        reranked.sort(key=lambda hit: hit.rerank_score, reverse=True)
+        return reranked
+    
+    def stats(self) -> Dict[str, Any]:
+        """Reranking volume and latency"""
+        return {
+            "calls": self._calls,
+            "pairs": self._pairs,
+            "avg_rerank_ms": self._time_total / self._calls * 1000 if self._calls else None
+        }
+
+
+# Lazily created instance, loaded on the first reranked request
+reranker_provider = ServiceProvider(
+    "reranker",
+    lambda: CrossEncoderReranker(
+        settings.RERANK_MODEL,
+        batch_size=settings.RERANK_BATCH_SIZE,
+        max_length=settings.RERANK_MAX_LENGTH
+    )
+)
+
+
+async def get_reranker() -> CrossEncoderReranker:
+    """Return the reranker, loading the model on first use"""
+    return await reranker_provider.get()
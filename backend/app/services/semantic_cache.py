@@ -0,0 +1,321 @@
+"""Semantic Cache - Reuses LLM answers for semantically similar questions"""
+import asyncio
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    bindparam,
+    create_engine,
+    delete,
+    inspect,
+    select,
+    update,
+)
+
+from ..core.config import settings
+
+# Hits whose recency is kept in memory before being written to the database
+_PENDING_HITS_FLUSH = 64
+
+
+class SemanticCache:
+    """
+    Cache of LLM answers keyed by question embedding and retrieved context
+    
+    A lookup hits when a stored question's embedding is at least `threshold`
+    cosine-similar to the new one and both were asked with the same context.
+    Requiring identical context keeps RAG answers grounded in the documents
+    actually retrieved for the new question. Entries are persisted in SQLite
+    and their embeddings kept in memory as a normalized matrix, so a lookup
+    is a single matrix-vector product.
+    
+    Entries are tagged with the embedding model that produced them; entries
+    from another model, or of another dimension, are dropped. Lookups only
+    read the database. Expired entries are skipped and deleted on the next
+    store, and hit times for LRU eviction are written in batches.
+    """
+    
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[List[float]]],
+        database_url: str,
+        model: str,
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+        ttl: float = 86400.0
+    ):
+        if database_url.startswith("sqlite:///"):
+            Path(database_url[len("sqlite:///"):]).parent.mkdir(parents=True, exist_ok=True)
+        self.embed = embed
+        self.model = model
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.engine = create_engine(database_url)
+        self.metadata = MetaData()
+        self.table = Table(
+            "semantic_cache",
+            self.metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("model", String(255), nullable=False),
+            Column("context_hash", String(64), nullable=False),
+            Column("embedding", LargeBinary, nullable=False),
+            Column("response", Text, nullable=False),
+            Column("latency", Float, nullable=False),
+            Column("created_at", Float, nullable=False),
+            Column("last_hit_at", Float, nullable=False)
+        )
+        inspector = inspect(self.engine)
+        if inspector.has_table(self.table.name) and "model" not in {
+            column["name"] for column in inspector.get_columns(self.table.name)
+        }:
+            # Written before entries were tagged with their model
+            self.table.drop(self.engine)
+        self.metadata.create_all(self.engine)
+        
+        self._lock = threading.Lock()
+        self._loaded = False
+        # Row i of the matrix belongs to entry self._ids[i]
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids: List[int] = []
+        self._context_hashes: List[str] = []
+        self._created_at: List[float] = []
+        self._last_hit_at: List[float] = []
+        # Entry ID to hit time, not yet written to the database
+        self._pending_hits: Dict[int, float] = {}
+        
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.latency_saved = 0.0
+    
+    @staticmethod
+    def _hash_context(context: Optional[str]) -> str:
+        return hashlib.sha256((context or "").encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _load(self) -> None:
+        """Read stored entries into memory on first use"""
+        if self._loaded:
+            return
+        with self.engine.begin() as connection:
+            # Embeddings from another model are not comparable
+            connection.execute(delete(self.table).where(self.table.c.model != self.model))
+            rows = connection.execute(
+                select(
+                    self.table.c.id,
+                    self.table.c.context_hash,
+                    self.table.c.embedding,
+                    self.table.c.created_at,
+                    self.table.c.last_hit_at
+                ).order_by(self.table.c.id)
+            ).all()
+            # Keep the dimension of the newest entries
+            size = len(rows[-1].embedding) if rows else 0
+            stale = [row.id for row in rows if len(row.embedding) != size]
+            if stale:
+                connection.execute(delete(self.table).where(self.table.c.id.in_(stale)))
+                rows = [row for row in rows if len(row.embedding) == size]
+        if rows:
+            self._matrix = np.stack([np.frombuffer(row.embedding, dtype=np.float32) for row in rows])
+        self._ids = [row.id for row in rows]
+        self._context_hashes = [row.context_hash for row in rows]
+        self._created_at = [row.created_at for row in rows]
+        self._last_hit_at = [row.last_hit_at for row in rows]
+        self._loaded = True
+    
+    def _remove_positions(self, connection, positions: List[int]) -> None:
+        """Drop entries by matrix row"""
+        if not positions:
+            return
+        connection.execute(
+            delete(self.table).where(self.table.c.id.in_([self._ids[p] for p in positions]))
+        )
+        for position in positions:
+            self._pending_hits.pop(self._ids[position], None)
+        keep = np.ones(len(self._ids), dtype=bool)
+        keep[positions] = False
+        self._matrix = self._matrix[keep]
+        for name in ("_ids", "_context_hashes", "_created_at", "_last_hit_at"):
+            values = getattr(self, name)
+            setattr(self, name, [v for v, k in zip(values, keep) if k])
+    
+    def _flush_hits(self, connection) -> None:
+        """Write pending hit times, which order LRU eviction"""
+        if not self._pending_hits:
+            return
+        connection.execute(
+            update(self.table)
+            .where(self.table.c.id == bindparam("entry_id"))
+            .values(last_hit_at=bindparam("hit_at")),
+            [
+                {"entry_id": entry_id, "hit_at": hit_at}
+                for entry_id, hit_at in self._pending_hits.items()
+            ]
+        )
+        self._pending_hits = {}
+    
+    def _lookup(self, vector: np.ndarray, context_hash: str) -> Optional[str]:
+        with self._lock:
+            self._load()
+            if not self._ids or self._matrix.shape[1] != vector.shape[0]:
+                return None
+            now = time.time()
+            scores = self._matrix @ vector
+            if self.ttl:
+                # Deleted on the next store
+                scores[now - np.asarray(self._created_at) > self.ttl] = -np.inf
+            for position in np.argsort(-scores):
+                if scores[position] < self.threshold:
+                    return None
+                if self._context_hashes[position] == context_hash:
+                    break
+            else:
+                return None
+            
+            entry_id = self._ids[position]
+            with self.engine.connect() as connection:
+                row = connection.execute(
+                    select(self.table.c.response, self.table.c.latency)
+                    .where(self.table.c.id == entry_id)
+                ).one()
+            self._last_hit_at[position] = now
+            self._pending_hits[entry_id] = now
+            if len(self._pending_hits) >= _PENDING_HITS_FLUSH:
+                with self.engine.begin() as connection:
+                    self._flush_hits(connection)
+            self.latency_saved += row.latency
+            return row.response
+    
+    def _store(self, vector: np.ndarray, context_hash: str, response: str, latency: float) -> None:
+        with self._lock:
+            self._load()
+            now = time.time()
+            with self.engine.begin() as connection:
+                if self._ids and self._matrix.shape[1] != vector.shape[0]:
+                    # The embedding dimension changed; old entries cannot match
+                    self.evictions += len(self._ids)
+                    self._remove_positions(connection, list(range(len(self._ids))))
+                if self.ttl:
+                    expired = [i for i, created in enumerate(self._created_at) if now - created > self.ttl]
+                    self._remove_positions(connection, expired)
+                    self.evictions += len(expired)
+                self._flush_hits(connection)
+                
+                # Make room by evicting the least recently used entries
+                overflow = len(self._ids) + 1 - self.max_entries
+                if overflow > 0:
+                    oldest = sorted(range(len(self._ids)), key=self._last_hit_at.__getitem__)
+                    self._remove_positions(connection, oldest[:overflow])
+                    self.evictions += overflow
+                
+                entry_id = connection.execute(
+                    self.table.insert().values(
+                        model=self.model,
+                        context_hash=context_hash,
+                        embedding=vector.tobytes(),
+                        response=response,
+                        latency=latency,
+                        created_at=now,
+                        last_hit_at=now
+                    )
+                ).inserted_primary_key[0]
+            
+            self._matrix = np.vstack([self._matrix.reshape(-1, vector.shape[0]), vector])
+            self._ids.append(entry_id)
+            self._context_hashes.append(context_hash)
+            self._created_at.append(now)
+            self._last_hit_at.append(now)
+    
+    async def embed_question(self, message: str) -> np.ndarray:
+        """Embed a question for lookup and storage"""
+        return self._normalize(await self.embed(message))
+    
+    async def lookup(self, vector: np.ndarray, context: Optional[str] = None) -> Optional[str]:
+        """
+        Find a cached answer for a question
+        
+        Args:
+            vector: Question embedding from embed_question
+            context: Context the question is asked with
+        
+        Returns:
+            The cached answer, or None on a miss
+        """
+        self.lookups += 1
+        response = await asyncio.to_thread(self._lookup, vector, self._hash_context(context))
+        if response is not None:
+            self.hits += 1
+        return response
+    
+    async def store(
+        self,
+        vector: np.ndarray,
+        context: Optional[str],
+        response: str,
+        latency: float
+    ) -> None:
+        """Cache an answer along with how long it took to generate"""
+        await asyncio.to_thread(self._store, vector, self._hash_context(context), response, latency)
+    
+    def clear(self) -> None:
+        """Drop every cached answer"""
+        with self._lock:
+            with self.engine.begin() as connection:
+                connection.execute(delete(self.table))
+            self._matrix = np.empty((0, 0), dtype=np.float32)
+            self._ids = []
+            self._context_hashes = []
+            self._created_at = []
+            self._last_hit_at = []
+            self._pending_hits = {}
+            self._loaded = True
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache size, hit rate and generation time saved"""
+        return {
+            "entries": len(self._ids),
+            "max_entries": self.max_entries,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "evictions": self.evictions,
+            "latency_saved_ms": self.latency_saved * 1000
+        }
+
+
+def create_semantic_cache() -> Optional[SemanticCache]:
+    """Create the response cache if it is enabled"""
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    from .vector_service import get_vector_db_service
+    
+    async def embed(text: str) -> List[float]:
+        vector_db = await get_vector_db_service()
+        return await vector_db.embed_query(text)
+    
+    return SemanticCache(
+        embed,
+        database_url=settings.SEMANTIC_CACHE_DATABASE_URL,
+        model=settings.EMBEDDING_MODEL,
+        threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl=settings.SEMANTIC_CACHE_TTL_SECONDS
+    )
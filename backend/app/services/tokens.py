@@ -0,0 +1,32 @@
+"""Token counting helpers"""
+import re
+from functools import lru_cache
+from typing import Optional
+
+_WORD_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding() -> Optional[object]:
+    """Load the tiktoken encoding if the optional package is available"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens in a piece of text
+    
+    Uses tiktoken when it is installed. Otherwise the count is estimated from
+    words and punctuation, or from characters for long words, whichever is
+    larger. That is close enough for budgeting prompts.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(len(_WORD_PIECES.findall(text)), len(text) // 4)
@@ -1,11 +1,24 @@
 """Vector Database Service - Handles vector storage and retrieval"""
-from typing import List, Dict, Any, Optional
+import asyncio
+import json
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
+from ..core.cache import TTLCache
 from ..core.config import settings
+from ..core.provider import ServiceProvider
+from ..core.singleflight import SingleFlight
+from ..models.search_hit import SearchHit
+from .bm25_index import BM25Index
+from .chunk_index import ChunkHashIndex
+from .chunking import StreamingTextSplitter, create_text_splitter, split_texts
+from .embedding_scheduler import EmbeddingScheduler
+from .embeddings import create_embeddings
+from .metadata_index import matches_filter
 
 
 class VectorDBService:
@@ -14,20 +27,47 @@ class VectorDBService:
     def __init__(self):
         self.provider = settings.VECTOR_DB_PROVIDER
         self.embeddings = self._initialize_embeddings()
+        self.embedding_scheduler = EmbeddingScheduler(
+            self.embeddings,
+            max_batch_size=settings.EMBEDDING_MAX_BATCH_SIZE,
+            batch_window_ms=settings.EMBEDDING_BATCH_WINDOW_MS,
+            workers=settings.EMBEDDING_WORKERS
+        )
         self.vector_store = self._initialize_vector_store()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len
+        self.query_embedding_cache = TTLCache(
+            maxsize=settings.SEARCH_CACHE_SIZE,
+            ttl=settings.SEARCH_CACHE_TTL_SECONDS
+        )
+        self.search_cache = TTLCache(
+            maxsize=settings.SEARCH_CACHE_SIZE,
+            ttl=settings.SEARCH_CACHE_TTL_SECONDS
+        )
+        # Bumped on every write so searches racing a write don't cache
+        # results computed against the old collection
+        self._store_generation = 0
+        self._inflight_searches = SingleFlight()
+        self.text_splitter = create_text_splitter(
+            settings.CHUNK_SIZE,
+            settings.CHUNK_OVERLAP
+        )
+        self._split_pool: Optional[ProcessPoolExecutor] = None
+        self.chunk_index = (
+            ChunkHashIndex(settings.CHUNK_INDEX_DATABASE_URL)
+            if settings.CHUNK_DEDUP_ENABLED else None
+        )
+        self.bm25_index = (
+            BM25Index(
+                settings.BM25_INDEX_PATH,
+                k1=settings.BM25_K1,
+                b=settings.BM25_B,
+                read_only=self.provider == "local" and settings.LOCAL_INDEX_READ_ONLY
+            )
+            if settings.BM25_ENABLED else None
         )
     
     def _initialize_embeddings(self):
         """Initialize embeddings model"""
-        return HuggingFaceEmbeddings(
-            model_name=settings.EMBEDDING_MODEL,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        return create_embeddings()
     
     def _initialize_vector_store(self):
         """Initialize vector store based on configuration"""
@@ -48,14 +88,329 @@ class VectorDBService:
                 index_name=settings.PINECONE_INDEX_NAME,
                 embedding=self.embeddings
             )
+        elif self.provider == "local":
+            from .local_index import LocalVectorIndex
+            
+            return LocalVectorIndex(
+                settings.LOCAL_INDEX_DIRECTORY,
+                hnsw=settings.LOCAL_INDEX_HNSW,
+                hnsw_m=settings.LOCAL_INDEX_HNSW_M,
+                hnsw_ef_construction=settings.LOCAL_INDEX_HNSW_EF_CONSTRUCTION,
+                hnsw_ef_search=settings.LOCAL_INDEX_HNSW_EF_SEARCH,
+                read_only=settings.LOCAL_INDEX_READ_ONLY
+            )
+        else:
+            raise ValueError(f"Unsupported vector DB provider: {self.provider}")
+    
+    def _add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Write pre-computed embeddings to the vector store"""
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        if self.provider == "chroma":
+            # Chroma rejects empty metadata dicts, so write those records
+            # without metadata
+            with_metadata = [i for i, m in enumerate(metadatas) if m]
+            without_metadata = [i for i, m in enumerate(metadatas) if not m]
+            collection = self.vector_store._collection
+            if with_metadata:
+                collection.upsert(
+                    ids=[ids[i] for i in with_metadata],
+                    embeddings=[embeddings[i] for i in with_metadata],
+                    documents=[texts[i] for i in with_metadata],
+                    metadatas=[metadatas[i] for i in with_metadata]
+                )
+            if without_metadata:
+                collection.upsert(
+                    ids=[ids[i] for i in without_metadata],
+                    embeddings=[embeddings[i] for i in without_metadata],
+                    documents=[texts[i] for i in without_metadata]
+                )
+        elif self.provider == "pinecone":
+            text_key = self.vector_store._text_key
+            self.vector_store._index.upsert(
+                vectors=[
+                    (doc_id, embedding, {**metadata, text_key: text})
+                    for doc_id, embedding, metadata, text in zip(ids, embeddings, metadatas, texts)
+                ],
+                namespace=self.vector_store._namespace
+            )
+        elif self.provider == "local":
+            self.vector_store.upsert(ids, embeddings, texts, metadatas)
         else:
             raise ValueError(f"Unsupported vector DB provider: {self.provider}")
+        return ids
+    
+    def _search_by_vector(
+        self,
+        embedding: List[float],
+        k: int,
+        filter_metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Optional[str], str, Dict[str, Any], float]]:
+        """Run a similarity search for a pre-computed query embedding"""
+        if self.provider == "chroma":
+            results = self.vector_store._collection.query(
+                query_embeddings=[embedding],
+                n_results=k,
+                where=filter_metadata,
+                include=["documents", "metadatas", "distances"]
+            )
+            return list(zip(
+                results["ids"][0],
+                results["documents"][0],
+                [metadata or {} for metadata in results["metadatas"][0]],
+                results["distances"][0]
+            ))
+        elif self.provider == "pinecone":
+            results = self.vector_store.similarity_search_by_vector_with_score(
+                embedding,
+                k=k,
+                filter=filter_metadata
+            )
+            return [
+                (None, doc.page_content, doc.metadata, score)
+                for doc, score in results
+            ]
+        elif self.provider == "local":
+            return self.vector_store.search(embedding, k, filter_metadata)
+        else:
+            raise ValueError(f"Unsupported vector DB provider: {self.provider}")
+    
+    def _get_by_ids(self, ids: List[str]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Fetch stored chunks by ID, skipping unknown IDs"""
+        if self.provider == "chroma":
+            results = self.vector_store._collection.get(
+                ids=ids,
+                include=["documents", "metadatas"]
+            )
+            return list(zip(
+                results["ids"],
+                results["documents"],
+                [metadata or {} for metadata in results["metadatas"]]
+            ))
+        elif self.provider == "pinecone":
+            text_key = self.vector_store._text_key
+            results = self.vector_store._index.fetch(
+                ids=ids,
+                namespace=self.vector_store._namespace
+            )
+            records = []
+            for doc_id, vector in results.vectors.items():
+                metadata = dict(vector.metadata or {})
+                records.append((doc_id, metadata.pop(text_key, ""), metadata))
+            return records
+        elif self.provider == "local":
+            return self.vector_store.get(ids)
+        else:
+            raise ValueError(f"Unsupported vector DB provider: {self.provider}")
+    
+    def _invalidate_search_cache(self) -> None:
+        """Drop cached search results after the collection changes"""
+        self._store_generation += 1
+        self.search_cache.clear()
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing cached embeddings"""
+        embedding = self.query_embedding_cache.get(query)
+        if embedding is None:
+            embedding = await self.embedding_scheduler.embed_query(query)
+            self.query_embedding_cache.set(query, embedding)
+        return embedding
+    
+    async def _store_chunks(
+        self,
+        chunks: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Write embedded chunks in one store call and persist once"""
+        try:
+            # Add to vector store
+            ids = await asyncio.to_thread(
+                self._add_embeddings,
+                chunks,
+                embeddings,
+                metadatas,
+                ids
+            )
+            if self.bm25_index is not None:
+                await asyncio.to_thread(self.bm25_index.add, ids, chunks)
+            
+            # Persist if using Chroma or the local index
+            if self.provider in ("chroma", "local"):
+                await asyncio.to_thread(self.vector_store.persist)
+        finally:
+            self._invalidate_search_cache()
+        return ids
+    
+    def _get_split_pool(self) -> ProcessPoolExecutor:
+        """Create the chunking process pool on first use"""
+        if self._split_pool is None:
+            # Spawned workers only import the light chunking module
+            self._split_pool = ProcessPoolExecutor(
+                max_workers=settings.INGEST_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._split_pool
+    
+    async def split_documents(self, contents: List[str]) -> List[List[str]]:
+        """
+        Split documents into chunks across the chunking process pool
+        
+        Args:
+            contents: Document contents
+        
+        Returns:
+            The chunks of each document, in input order
+        """
+        if not contents:
+            return []
+        
+        workers = max(1, settings.INGEST_PROCESS_WORKERS)
+        slice_size = -(-len(contents) // workers)
+        loop = asyncio.get_running_loop()
+        pool = self._get_split_pool()
+        parts = await asyncio.gather(*[
+            loop.run_in_executor(
+                pool,
+                split_texts,
+                contents[start:start + slice_size],
+                settings.CHUNK_SIZE,
+                settings.CHUNK_OVERLAP
+            )
+            for start in range(0, len(contents), slice_size)
+        ])
+        return [chunks for part in parts for chunks in part]
+    
+    async def ingest_chunks(
+        self,
+        chunks: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[List[str]] = None,
+        bulk: bool = True
+    ) -> Tuple[List[str], List[bool]]:
+        """
+        Embed and store already-split chunks as one batch
+        
+        Chunks whose content hash is already indexed are neither embedded nor
+        stored again; their existing IDs are returned instead. Passing
+        explicit IDs makes the write idempotent, so a batch can be safely
+        replayed after a crash.
+        
+        Args:
+            chunks: Chunk texts
+            metadatas: Metadata for each chunk
+            ids: Optional chunk IDs
+            bulk: Embed in one large batch instead of sharing micro-batches
+                with concurrent requests
+        
+        Returns:
+            Chunk IDs in order, and whether each chunk was reused
+        """
+        if not chunks:
+            return [], []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in chunks]
+        reused = [False] * len(chunks)
+        
+        if self.chunk_index is not None:
+            hashes = [
+                ChunkHashIndex.hash_chunk(chunk, metadata)
+                for chunk, metadata in zip(chunks, metadatas)
+            ]
+            known = await asyncio.to_thread(self.chunk_index.lookup, set(hashes))
+            for position, chunk_hash in enumerate(hashes):
+                if chunk_hash in known:
+                    ids[position] = known[chunk_hash]
+                    reused[position] = True
+                else:
+                    # Repeats within the batch share the first occurrence
+                    known[chunk_hash] = ids[position]
+        
+        new_positions = [position for position, hit in enumerate(reused) if not hit]
+        if new_positions:
+            new_chunks = [chunks[position] for position in new_positions]
+            embed = (
+                self.embedding_scheduler.embed_bulk if bulk
+                else self.embedding_scheduler.embed_documents
+            )
+            embeddings = await embed(new_chunks)
+            await self._store_chunks(
+                new_chunks,
+                embeddings,
+                [metadatas[position] for position in new_positions],
+                [ids[position] for position in new_positions]
+            )
+            if self.chunk_index is not None:
+                await asyncio.to_thread(self.chunk_index.record, {
+                    hashes[position]: ids[position] for position in new_positions
+                })
+        
+        return ids, reused
+    
+    async def add_documents(
+        self,
+        documents: List[Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Add many documents to the vector database
+        
+        Documents are processed in batches of INGEST_BATCH_SIZE: each batch is
+        split in a process pool, embedded in one call, written to the store in
+        one call and persisted once.
+        
+        Args:
+            documents: (content, metadata) pairs
+        
+        Returns:
+            Document ID and new/reused chunk counts for each input document,
+            in order
+        """
+        try:
+            results = []
+            batch_size = max(1, settings.INGEST_BATCH_SIZE)
+            for start in range(0, len(documents), batch_size):
+                batch = documents[start:start + batch_size]
+                split = await self.split_documents([content for content, _ in batch])
+                
+                chunks = []
+                metadatas = []
+                for (_, metadata), doc_chunks in zip(batch, split):
+                    chunks.extend(doc_chunks)
+                    metadatas.extend(metadata or {} for _ in doc_chunks)
+                
+                ids, reused = await self.ingest_chunks(chunks, metadatas)
+                
+                offset = 0
+                for doc_chunks in split:
+                    end = offset + len(doc_chunks)
+                    results.append(self._document_result(ids[offset:end], reused[offset:end]))
+                    offset = end
+            
+            return results
+        except Exception as e:
+            raise Exception(f"Error adding documents: {str(e)}")
+    
+    @staticmethod
+    def _document_result(ids: List[str], reused: List[bool]) -> Dict[str, Any]:
+        """Summarize a document's ingested chunks"""
+        reused_count = sum(reused)
+        return {
+            # The first chunk ID identifies the document
+            "id": ids[0] if ids else "unknown",
+            "chunks_added": len(ids) - reused_count,
+            "chunks_reused": reused_count
+        }
     
     async def add_document(
         self,
         content: str,
         metadata: Optional[Dict[str, Any]] = None
-    ) -> str:
+    ) -> Dict[str, Any]:
         """
         Add a document to the vector database
         
@@ -64,38 +419,77 @@ class VectorDBService:
             metadata: Optional metadata
         
         Returns:
-            Document ID
+            Document ID and the number of new and reused chunks
         """
         try:
             # Split document into chunks
             chunks = self.text_splitter.split_text(content)
             
-            # Create documents with metadata
-            documents = [
-                Document(
-                    page_content=chunk,
-                    metadata=metadata or {}
-                )
-                for chunk in chunks
-            ]
+            # Embed new chunks in shared batches off the event loop
+            ids, reused = await self.ingest_chunks(
+                chunks,
+                [metadata or {} for _ in chunks],
+                bulk=False
+            )
             
-            # Add to vector store
-            ids = self.vector_store.add_documents(documents)
+            return self._document_result(ids, reused)
+        except Exception as e:
+            raise Exception(f"Error adding document: {str(e)}")
+    
+    async def add_document_stream(
+        self,
+        pieces: AsyncIterator[str],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Add a document read in pieces, such as a large upload
+        
+        The text is split as it arrives and chunks are embedded and stored
+        in batches of INGEST_STREAM_BATCH_CHUNKS, so memory use does not
+        grow with the size of the document.
+        
+        Args:
+            pieces: Consecutive pieces of the document text
+            metadata: Optional metadata
+        
+        Returns:
+            Document ID and the number of new and reused chunks
+        """
+        try:
+            splitter = StreamingTextSplitter(settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+            batch_size = max(1, settings.INGEST_STREAM_BATCH_CHUNKS)
+            batch: List[str] = []
+            result = {"id": "unknown", "chunks_added": 0, "chunks_reused": 0}
             
-            # Persist if using Chroma
-            if self.provider == "chroma":
-                self.vector_store.persist()
+            async def flush(chunks: List[str]):
+                ids, reused = await self.ingest_chunks(chunks, [metadata or {} for _ in chunks])
+                summary = self._document_result(ids, reused)
+                if result["id"] == "unknown":
+                    result["id"] = summary["id"]
+                result["chunks_added"] += summary["chunks_added"]
+                result["chunks_reused"] += summary["chunks_reused"]
+            
+            async for piece in pieces:
+                # Splitting a window takes milliseconds; keep it off the event loop
+                batch.extend(await asyncio.to_thread(list, splitter.feed(piece)))
+                while len(batch) >= batch_size:
+                    await flush(batch[:batch_size])
+                    del batch[:batch_size]
+            batch.extend(await asyncio.to_thread(list, splitter.finish()))
+            if batch:
+                await flush(batch)
             
-            return ids[0] if ids else "unknown"
+            return result
         except Exception as e:
-            raise Exception(f"Error adding document: {str(e)}")
+            raise Exception(f"Error adding document stream: {str(e)}")
     
     async def search(
         self,
         query: str,
         top_k: int = 5,
-        filter_metadata: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        alpha: Optional[float] = None
+    ) -> List[SearchHit]:
         """
         Search for similar documents
         
@@ -103,50 +497,187 @@ class VectorDBService:
             query: Search query
             top_k: Number of results to return
             filter_metadata: Optional metadata filters
+            alpha: Weight of vector similarity against BM25 keyword
+                matching, from 1 (vector only) to 0 (keywords only);
+                defaults to HYBRID_ALPHA
         
         Returns:
-            List of search results with content, score, and metadata
+            Search hits with content, score and metadata, best first
         """
         try:
-            # Perform similarity search with scores
-            results = self.vector_store.similarity_search_with_score(
+            if alpha is None:
+                alpha = settings.HYBRID_ALPHA
+            if not 0.0 <= alpha <= 1.0:
+                raise ValueError("alpha must be between 0 and 1")
+            cache_key = (
                 query,
-                k=top_k,
-                filter=filter_metadata
+                top_k,
+                json.dumps(filter_metadata, sort_keys=True, default=str),
+                alpha
             )
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                return list(cached)
             
-            # Format results
-            formatted_results = [
-                {
-                    "content": doc.page_content,
-                    "score": float(score),
-                    "metadata": doc.metadata
-                }
-                for doc, score in results
-            ]
+            # Identical searches against the same collection state share one run
+            generation = self._store_generation
+            formatted_results = await self._inflight_searches.do(
+                (generation, cache_key),
+                lambda: self._run_search(query, top_k, filter_metadata, alpha)
+            )
             
-            return formatted_results
+            if generation == self._store_generation:
+                self.search_cache.set(cache_key, formatted_results)
+            
+            return list(formatted_results)
         except Exception as e:
             raise Exception(f"Error searching documents: {str(e)}")
     
+    async def _run_search(
+        self,
+        query: str,
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]],
+        alpha: float
+    ) -> List[SearchHit]:
+        """Embed a query and search the vector store"""
+        if alpha < 1:
+            return await self._hybrid_search(query, top_k, filter_metadata, alpha)
+        
+        # Embed the query in a shared batch, then search off the event loop
+        embedding = await self.embed_query(query)
+        results = await asyncio.to_thread(
+            self._search_by_vector,
+            embedding,
+            top_k,
+            filter_metadata
+        )
+        
+        # Format results
+        return [
+            SearchHit(content, float(score), metadata)
+            for _, content, metadata, score in results
+        ]
+    
+    async def _hybrid_search(
+        self,
+        query: str,
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]],
+        alpha: float
+    ) -> List[SearchHit]:
+        """
+        Fuse vector and BM25 rankings with weighted reciprocal rank fusion
+        
+        Each retriever contributes weight / (HYBRID_RRF_K + rank) for every
+        candidate it ranks, so scores are higher-is-better fusion scores
+        rather than distances. Keyword-only hits are fetched from the store
+        by ID and checked against the metadata filter.
+        """
+        if self.bm25_index is None:
+            raise ValueError("Hybrid search requires BM25_ENABLED")
+        depth = top_k * max(1, settings.HYBRID_CANDIDATES)
+        
+        async def vector_candidates():
+            if alpha <= 0:
+                return []
+            embedding = await self.embed_query(query)
+            return await asyncio.to_thread(self._search_by_vector, embedding, depth, filter_metadata)
+        
+        vector_results, keyword_results = await asyncio.gather(
+            vector_candidates(),
+            asyncio.to_thread(self.bm25_index.search, query, depth)
+        )
+        
+        records = {}
+        scores = {}
+        for rank, (doc_id, content, metadata, _) in enumerate(vector_results, start=1):
+            key = doc_id or content
+            records[key] = (content, metadata)
+            scores[key] = alpha / (settings.HYBRID_RRF_K + rank)
+        
+        missing = [doc_id for doc_id, _ in keyword_results if doc_id not in records]
+        if missing:
+            for doc_id, content, metadata in await asyncio.to_thread(self._get_by_ids, missing):
+                if not filter_metadata or matches_filter(metadata, filter_metadata):
+                    records[doc_id] = (content, metadata)
+        rank = 0
+        for doc_id, _ in keyword_results:
+            if doc_id in records:
+                rank += 1
+                scores[doc_id] = scores.get(doc_id, 0.0) + (1 - alpha) / (settings.HYBRID_RRF_K + rank)
+        
+        results = []
+        seen = set()
+        for key in sorted(scores, key=scores.get, reverse=True):
+            content, metadata = records[key]
+            # Pinecone returns no IDs, so its hits are matched by content
+            if content in seen:
+                continue
+            seen.add(content)
+            results.append(SearchHit(content, scores[key], metadata))
+            if len(results) == top_k:
+                break
+        return results
+    
     async def delete_collection(self) -> None:
         """Delete all documents from the collection"""
         try:
             if self.provider == "chroma":
                 self.vector_store.delete_collection()
                 self.vector_store = self._initialize_vector_store()
+            elif self.provider == "local":
+                await asyncio.to_thread(self.vector_store.clear)
+            else:
+                # Nothing was deleted, so the stored chunks stay indexed
+                return
+            if self.chunk_index is not None:
+                self.chunk_index.clear()
+            if self.bm25_index is not None:
+                self.bm25_index.clear()
+            self._invalidate_search_cache()
         except Exception as e:
             raise Exception(f"Error deleting collection: {str(e)}")
     
+    def stats(self) -> Dict[str, Any]:
+        """Return vector DB service metrics"""
+        return {
+            "embeddings": self.embedding_scheduler.stats(),
+            "query_embedding_cache": self.query_embedding_cache.stats(),
+            "search_cache": self.search_cache.stats(),
+            "bm25": self.bm25_index.stats() if self.bm25_index is not None else None,
+            "coalescing": self._inflight_searches.stats()
+        }
+    
+    def close(self) -> None:
+        """Release worker processes and flush the local index"""
+        if self._split_pool is not None:
+            self._split_pool.shutdown()
+            self._split_pool = None
+        if self.provider == "local":
+            self.vector_store.close()
+    
     def health_check(self) -> bool:
         """Check if vector DB service is healthy"""
         try:
             # Try a simple search
-            self.vector_store.similarity_search("test", k=1)
+            self._search_by_vector(self.embeddings.embed_query("test"), 1)
             return True
         except:
             return False
 
 
-# Singleton instance
-vector_db_service = VectorDBService()
+def _create_vector_db_service() -> VectorDBService:
+    service = VectorDBService()
+    # Run one embedding so the first request doesn't pay for model warm-up
+    service.embeddings.embed_query("warm up")
+    return service
+
+
+# Lazily created instance
+vector_db_provider = ServiceProvider("vector_db", _create_vector_db_service)
+
+
+async def get_vector_db_service() -> VectorDBService:
+    """Return the vector DB service, creating it on first use"""
+    return await vector_db_provider.get()
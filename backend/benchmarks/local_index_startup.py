@@ -0,0 +1,126 @@
+"""
+Benchmark local index startup time and memory per worker
+
+Builds a local index of random vectors, then starts several worker
+processes that each open it and run searches, the way uvicorn workers
+would. Reports the open time and resident memory of every worker, split
+into private (anonymous) memory and file-backed pages shared through the
+OS page cache, and compares against reading the vectors into memory.
+
+Run from the backend directory:
+
+    python -m benchmarks.local_index_startup --rows 200000 --workers 4
+"""
+import argparse
+import multiprocessing
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.local_index import LocalVectorIndex
+
+
+def _memory_kb() -> dict:
+    """Resident memory of this process by kind (Linux only)"""
+    memory = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                memory[key] = int(value.split()[0])
+    return memory
+
+
+def _worker(directory: str, dim: int, searches: int, in_memory: bool, results) -> None:
+    baseline = _memory_kb()
+    started = time.perf_counter()
+    if in_memory:
+        vectors = np.fromfile(Path(directory) / LocalVectorIndex.VECTORS_FILE, dtype=np.float32)
+        vectors = vectors.reshape(-1, dim)
+        search = lambda query: np.argpartition(-(vectors @ query), 5)[:5]
+    else:
+        index = LocalVectorIndex(directory, read_only=True)
+        search = lambda query: index.search(query, 5)
+    open_seconds = time.perf_counter() - started
+    
+    rng = np.random.default_rng()
+    started = time.perf_counter()
+    for _ in range(searches):
+        query = rng.standard_normal(dim).astype(np.float32)
+        search(query / np.linalg.norm(query))
+    search_seconds = (time.perf_counter() - started) / searches
+    
+    memory = _memory_kb()
+    results.put({
+        "open_ms": open_seconds * 1000,
+        "search_ms": search_seconds * 1000,
+        "rss_mb": (memory["VmRSS"] - baseline["VmRSS"]) / 1024,
+        "private_mb": (memory["RssAnon"] - baseline["RssAnon"]) / 1024,
+        "shared_mb": (memory["RssFile"] - baseline["RssFile"]) / 1024,
+    })
+
+
+def build_index(directory: str, rows: int, dim: int, batch: int = 10000) -> None:
+    """Write an index of random normalized vectors"""
+    shutil.rmtree(directory, ignore_errors=True)
+    index = LocalVectorIndex(directory)
+    rng = np.random.default_rng(0)
+    for start in range(0, rows, batch):
+        count = min(batch, rows - start)
+        vectors = rng.standard_normal((count, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index.upsert(
+            [f"doc-{i}" for i in range(start, start + count)],
+            vectors,
+            [f"Chunk {i}" for i in range(start, start + count)],
+            [{"group": i % 10} for i in range(start, start + count)]
+        )
+    index.close()
+
+
+def run(directory: str, dim: int, workers: int, searches: int, in_memory: bool) -> None:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(directory, dim, searches, in_memory, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    
+    label = "in-memory copy" if in_memory else "memory-mapped"
+    print(f"\n{label} ({workers} workers)")
+    print(f"{'worker':>6} {'open ms':>9} {'search ms':>10} {'rss MB':>8} {'private MB':>11} {'shared MB':>10}")
+    for number, report in enumerate(reports):
+        print(
+            f"{number:>6} {report['open_ms']:>9.1f} {report['search_ms']:>10.2f} {report['rss_mb']:>8.1f} "
+            f"{report['private_mb']:>11.1f} {report['shared_mb']:>10.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directory", default="./data/benchmark_index")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--searches", type=int, default=20)
+    parser.add_argument("--skip-build", action="store_true", help="Reuse an existing index")
+    args = parser.parse_args()
+    
+    if not args.skip_build:
+        started = time.perf_counter()
+        build_index(args.directory, args.rows, args.dim)
+        print(f"Built {args.rows} x {args.dim} index in {time.perf_counter() - started:.1f}s")
+    
+    run(args.directory, args.dim, args.workers, args.searches, in_memory=False)
+    run(args.directory, args.dim, args.workers, args.searches, in_memory=True)
+
+
+if __name__ == "__main__":
+    main()
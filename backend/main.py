@@ -1,4 +1,7 @@
 """Main FastAPI application"""
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from strawberry.fastapi import GraphQLRouter
@@ -6,6 +9,37 @@ from strawberry.fastapi import GraphQLRouter
 from app.core.config import settings
 from app.api.rest.endpoints import router as rest_router
 from app.api.graphql.schema import schema
+from app.services.chat_pipeline import get_chat_pipeline
+from app.services.ingestion_jobs import ingestion_job_manager
+from app.services.llm_service import llm_provider
+from app.services.reranker import get_reranker
+from app.services.vector_service import vector_db_provider
+
+
+async def warm_up() -> None:
+    """Create the services and load models ahead of the first request"""
+    try:
+        await get_chat_pipeline()
+        if settings.RERANK_ENABLED:
+            await get_reranker()
+    except Exception:
+        # Reported by /health/ready and retried on the next request
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers and warm up services in the background"""
+    await ingestion_job_manager.start()
+    warm_up_task = asyncio.create_task(warm_up()) if settings.SERVICE_WARMUP else None
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    await ingestion_job_manager.stop()
+    if vector_db_provider.ready:
+        vector_db_provider.instance.close()
+    if llm_provider.ready:
+        await llm_provider.instance.aclose()
 
 
 def create_app() -> FastAPI:
@@ -14,7 +48,8 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.APP_NAME,
         version=settings.APP_VERSION,
-        debug=settings.DEBUG
+        debug=settings.DEBUG,
+        lifespan=lifespan
     )
     
     # CORS middleware
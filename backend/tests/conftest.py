@@ -0,0 +1,222 @@
+"""Shared test fixtures"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+from app.services.chat_pipeline import ChatPipeline, chat_pipeline_provider
+from app.services.llm_service import SUMMARY_PROMPT, LLMService
+from app.services.vector_service import VectorDBService
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings, so tests need no model"""
+    
+    dim = 32
+    
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+    
+    def embed_query(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[hashlib.md5(word.encode("utf-8")).digest()[0] % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="Run tests marked slow")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: needs the real models and services; run with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow; run with --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+class LocalVectorDBService(VectorDBService):
+    def _initialize_embeddings(self):
+        return HashEmbeddings()
+
+
+@pytest.fixture
+def local_vector_service(tmp_path, monkeypatch):
+    """A vector service on the local index, with its files under tmp_path"""
+    monkeypatch.setattr(settings, "VECTOR_DB_PROVIDER", "local")
+    monkeypatch.setattr(settings, "LOCAL_INDEX_DIRECTORY", str(tmp_path / "local_index"))
+    monkeypatch.setattr(settings, "LOCAL_INDEX_HNSW", False)
+    monkeypatch.setattr(settings, "LOCAL_INDEX_READ_ONLY", False)
+    monkeypatch.setattr(settings, "CHUNK_INDEX_DATABASE_URL", f"sqlite:///{tmp_path / 'chunk_index.db'}")
+    monkeypatch.setattr(settings, "BM25_INDEX_PATH", str(tmp_path / "bm25_index.jsonl"))
+    service = LocalVectorDBService()
+    yield service
+    service.close()
+
+
+class FakeLLMRouter:
+    """In-process LLM backend that records prompts and answers from a script"""
+    
+    def __init__(self):
+        self.prompts = []
+        self.summaries = []
+        self.error = None
+    
+    def answer(self, prompt):
+        if prompt.startswith(SUMMARY_PROMPT[:30]):
+            self.summaries.append(prompt)
+            return f"summary {len(self.summaries)}"
+        self.prompts.append(prompt)
+        return f"answer {len(self.prompts)}"
+    
+    async def generate(self, prompt, routing_key=None):
+        if self.error is not None:
+            raise self.error
+        return self.answer(prompt)
+    
+    async def stream(self, prompt, routing_key=None):
+        if self.error is not None:
+            raise self.error
+        for token in self.answer(prompt).split(" "):
+            yield token + " "
+    
+    async def healthy(self):
+        return True
+    
+    async def aclose(self):
+        pass
+    
+    def stats(self):
+        return {}
+
+
+class FakeLLMService(LLMService):
+    def _initialize_llm(self):
+        return FakeLLMRouter()
+
+
+@pytest.fixture
+def llm_service_factory(monkeypatch):
+    """Create LLM services on fake backends, with in-memory history and no response cache"""
+    monkeypatch.setattr(settings, "CONVERSATION_BACKEND", "memory")
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+    return FakeLLMService
+
+
+@pytest.fixture
+def llm_service(llm_service_factory):
+    """An LLM service on a fake backend"""
+    return llm_service_factory()
+
+
+@pytest.fixture
+def chat_pipeline(llm_service, local_vector_service, monkeypatch):
+    """A chat pipeline over the fake LLM and local index, served by the APIs"""
+    pipeline = ChatPipeline(llm_service, local_vector_service)
+    monkeypatch.setattr(chat_pipeline_provider, "_instance", pipeline)
+    return pipeline
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Minimal Ollama and OpenAI API over keep-alive connections"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _record(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.connections.add(self.client_address)
+        if server.failures > 0:
+            server.failures -= 1
+            self._send(503, {"error": "overloaded"})
+            return False
+        return True
+    
+    def do_GET(self):
+        if not self._record():
+            return
+        if self.path == "/api/tags":
+            self._send(200, {"models": [{"name": "stub"}]})
+        elif self.path == "/v1/models":
+            self._send(200, {"data": [{"id": "stub"}]})
+        else:
+            self._send(404, {"error": "not found"})
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if not self._record():
+            return
+        if self.path == "/api/generate":
+            prompt = body["prompt"]
+            if prompt == "slow":
+                time.sleep(1)
+            tokens = ["echo ", prompt]
+            if body["stream"]:
+                lines = "".join(
+                    json.dumps({"response": token, "done": False}) + "\n" for token in tokens
+                ) + json.dumps({"response": "", "done": True}) + "\n"
+                self._send(200, lines, "application/x-ndjson")
+            else:
+                self._send(200, {"response": "".join(tokens), "done": True})
+        elif self.path == "/v1/chat/completions":
+            prompt = body["messages"][0]["content"]
+            if body["stream"]:
+                events = "".join(
+                    f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n"
+                    for token in ["echo ", prompt]
+                ) + "data: [DONE]\n\n"
+                self._send(200, events, "text/event-stream")
+            else:
+                self._send(200, {"choices": [{"message": {"content": f"echo {prompt}"}}]})
+        else:
+            self._send(404, {"error": "not found"})
+
+
+@pytest.fixture
+def stub_server_factory():
+    """Start stub API servers on free local ports, shut down after the test"""
+    servers = []
+    
+    def start():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        server.requests = []
+        server.connections = set()
+        server.failures = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+    
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub_server(stub_server_factory):
+    """Run the stub API on a free local port"""
+    return stub_server_factory()
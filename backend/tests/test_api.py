@@ -1,8 +1,11 @@
 """Tests for REST API endpoints"""
+import json
+
 import pytest
 from httpx import AsyncClient
 from fastapi import status
 
+from app.core.config import settings
 from main import app
 
 
@@ -30,3 +33,146 @@ async def test_root_endpoint():
         data = response.json()
         assert "message" in data
         assert "version" in data
+
+
+class _CollectingVectorService:
+    """Reads uploads and ingestion batches as the vector service would"""
+    
+    def __init__(self):
+        self.text = None
+        self.batches = []
+    
+    async def add_document_stream(self, pieces, metadata=None):
+        self.text = "".join([piece async for piece in pieces])
+        return {"id": "doc-1", "chunks_added": 1, "chunks_reused": 0}
+    
+    async def add_documents(self, documents):
+        self.batches.append(documents)
+        start = sum(len(batch) for batch in self.batches[:-1])
+        return [
+            {"id": f"doc-{start + i}", "chunks_added": 1, "chunks_reused": 0}
+            for i in range(len(documents))
+        ]
+
+
+@pytest.fixture
+def collecting_service(monkeypatch):
+    """Serve documents from a collecting vector service"""
+    from app.api.rest import endpoints
+    
+    service = _CollectingVectorService()
+    
+    async def get_service():
+        return service
+    
+    monkeypatch.setattr(endpoints, "get_vector_db_service", get_service)
+    return service
+
+
+@pytest.fixture
+def upload_service(collecting_service, monkeypatch):
+    """Serve uploads from a collecting vector service, reading 3 bytes at a time"""
+    from app.api.rest import endpoints
+    
+    monkeypatch.setattr(endpoints, "_UPLOAD_READ_SIZE", 3)
+    return collecting_service
+
+
+@pytest.mark.asyncio
+async def test_upload_decodes_characters_split_across_reads(upload_service):
+    """Test that multibyte characters straddling reads are decoded intact"""
+    text = "Größe: 日本語 😀 ok"
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/documents/upload",
+            files={"file": ("notes.txt", text.encode("utf-8"), "text/plain")},
+            data={"metadata": '{"source": "notes"}'}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["size"] == len(text.encode("utf-8"))
+        assert data["metadata"] == {"source": "notes"}
+        assert upload_service.text == text
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content,metadata,detail", [
+    (b"text", "{not json", "Invalid metadata"),
+    (b"text", "[1, 2]", "Invalid metadata: expected a JSON object"),
+    ("Größe".encode("latin-1"), None, "Invalid document: expected UTF-8 text"),
+])
+async def test_upload_rejects_invalid_input(upload_service, content, metadata, detail):
+    """Test that bad metadata and non-UTF-8 files are rejected with 400"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/documents/upload",
+            files={"file": ("notes.txt", content, "text/plain")},
+            data={"metadata": metadata} if metadata is not None else {}
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"].startswith(detail)
+
+
+def _ndjson(documents):
+    return "".join(json.dumps(document) + "\n" for document in documents)
+
+
+@pytest.mark.asyncio
+async def test_ndjson_documents_are_ingested_in_order(collecting_service):
+    """Test that every NDJSON line becomes a document, blank lines skipped"""
+    body = _ndjson([
+        {"content": "first", "metadata": {"n": 1}},
+        {"content": "second"}
+    ]) + "\n" + json.dumps({"content": "last, without a newline"})
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post(
+            "/api/v1/documents/bulk/ndjson",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "ids": ["doc-0", "doc-1", "doc-2"],
+            "count": 3,
+            "chunks_added": 3,
+            "chunks_reused": 0
+        }
+        assert collecting_service.batches == [[
+            ("first", {"n": 1}),
+            ("second", {}),
+            ("last, without a newline", {})
+        ]]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_malformed_line_is_named(collecting_service):
+    """Test that an invalid line is rejected with its line number"""
+    body = "\n".join(['{"content": "first"}', "", '{"content": "broken"', '{"content": "after"}'])
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/v1/documents/bulk/ndjson", content=body)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"].startswith("Invalid NDJSON document: line 3:")
+        
+        response = await client.post("/api/v1/documents/bulk/ndjson", content='{"metadata": {}}')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "line 1:" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_batches_are_limited(collecting_service, monkeypatch):
+    """Test that documents are ingested in batches of at most INGEST_BATCH_SIZE"""
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 4)
+    body = _ndjson([{"content": f"document {i}"} for i in range(10)])
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/v1/documents/bulk/ndjson", content=body)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["ids"] == [f"doc-{i}" for i in range(10)]
+        assert [len(batch) for batch in collecting_service.batches] == [4, 4, 2]
+        assert [content for batch in collecting_service.batches for content, _ in batch] == [
+            f"document {i}" for i in range(10)
+        ]
@@ -0,0 +1,110 @@
+"""Tests for the BM25 keyword index"""
+import pytest
+
+from app.core.config import settings
+from app.services.bm25_index import BM25Index, tokenize
+
+
+def test_concurrent_writers_share_the_log(tmp_path):
+    """Test that two processes appending to one log keep each other's entries"""
+    path = tmp_path / "bm25.jsonl"
+    first = BM25Index(str(path))
+    second = BM25Index(str(path))
+    
+    first.add(["a"], ["Error E-1042 in the billing service"])
+    second.add(["b"], ["Shipping delays for SKU_77.3"])
+    
+    assert [doc_id for doc_id, _ in first.search("sku_77.3", 5)] == ["b"]
+    assert [doc_id for doc_id, _ in second.search("E-1042", 5)] == ["a"]
+    
+    reopened = BM25Index(str(path))
+    assert reopened.stats()["chunks"] == 2
+    assert [doc_id for doc_id, _ in reopened.search("E-1042", 5)] == ["a"]
+
+
+def test_partial_entry_is_dropped_on_write(tmp_path):
+    """Test that a write cut short by a crash is replaced by the next append"""
+    path = tmp_path / "bm25.jsonl"
+    BM25Index(str(path)).add(["a"], ["alpha"])
+    with open(path, "ab") as f:
+        f.write(b'["b", {"bet')
+    
+    index = BM25Index(str(path))
+    index.add(["c"], ["gamma"])
+    
+    reopened = BM25Index(str(path))
+    assert reopened.stats()["chunks"] == 2
+    assert [doc_id for doc_id, _ in reopened.search("gamma", 5)] == ["c"]
+
+
+def test_replaced_rows_do_not_count_towards_idf(tmp_path):
+    """Test that re-adding a chunk scores as if it was added once"""
+    replaced = BM25Index(str(tmp_path / "replaced.jsonl"))
+    for _ in range(5):
+        replaced.add(["a"], ["rare term"])
+    replaced.add(["b"], ["common words"])
+    fresh = BM25Index(str(tmp_path / "fresh.jsonl"))
+    fresh.add(["a", "b"], ["rare term", "common words"])
+    
+    assert replaced.search("rare", 5) == fresh.search("rare", 5)
+
+
+def test_clear_is_seen_by_other_processes(tmp_path):
+    """Test that clearing the log resets another process's index"""
+    path = tmp_path / "bm25.jsonl"
+    writer = BM25Index(str(path))
+    reader = BM25Index(str(path), read_only=True)
+    writer.add(["a", "b"], ["alpha", "beta"])
+    assert reader.search("alpha", 5)
+    
+    writer.clear()
+    
+    assert reader.search("alpha", 5) == []
+    assert reader.stats()["chunks"] == 0
+
+
+def test_codes_are_tokenized_whole_and_in_parts():
+    """Test that product and error codes match whole or by their parts"""
+    assert tokenize("Error E-1042!") == ["error", "e-1042", "e", "1042"]
+    assert tokenize("SKU_77.3 shipped") == ["sku_77.3", "sku", "77", "3", "shipped"]
+    assert tokenize("trailing-dash- and _under") == ["trailing-dash", "trailing", "dash", "and", "under"]
+
+
+def test_exact_code_ranks_first(tmp_path):
+    """Test that a rare code outranks documents sharing only common words"""
+    index = BM25Index(str(tmp_path / "bm25.jsonl"))
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Order failed with error E-1042 during checkout",
+            "Order failed with error E-2001 during checkout",
+            "Checkout error for SKU_77.3 orders",
+        ]
+    )
+    
+    assert [doc_id for doc_id, _ in index.search("error E-1042", 3)][0] == "a"
+    assert [doc_id for doc_id, _ in index.search("sku_77.3", 3)] == ["c"]
+    assert [doc_id for doc_id, _ in index.search("77", 3)] == ["c"]
+
+
+@pytest.mark.asyncio
+async def test_reciprocal_rank_fusion(local_vector_service, monkeypatch):
+    """Test that hybrid scores add each retriever's weighted reciprocal rank"""
+    monkeypatch.setattr(settings, "HYBRID_RRF_K", 60)
+    service = local_vector_service
+    await service.add_document("invoice E-1042 overdue", {"team": "billing"})
+    await service.add_document("shipping SKU_77.3 delayed", {"team": "logistics"})
+    
+    keyword_only = await service.search("E-1042", top_k=2, alpha=0.0)
+    assert [hit.content for hit in keyword_only] == ["invoice E-1042 overdue"]
+    assert keyword_only[0].score == pytest.approx(1 / 61)
+    
+    hybrid = await service.search("E-1042", top_k=2, alpha=0.25)
+    assert hybrid[0].content == "invoice E-1042 overdue"
+    # First for both retrievers
+    assert hybrid[0].score == pytest.approx(0.25 / 61 + 0.75 / 61)
+    # Second for the vector search only
+    assert hybrid[1].score == pytest.approx(0.25 / 62)
+    
+    filtered = await service.search("E-1042", top_k=2, filter_metadata={"team": "logistics"}, alpha=0.0)
+    assert filtered == []
@@ -0,0 +1,83 @@
+"""Tests for the in-process caches"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.cache import TTLCache
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    """Test that an entry is dropped once its time-to-live has passed"""
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=4, ttl=10)
+    
+    cache.set("a", 1)
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_zero_ttl_never_expires(monkeypatch):
+    """Test that a ttl of 0 disables expiry"""
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=4, ttl=0)
+    
+    cache.set("a", 1)
+    now[0] += 10 ** 6
+    assert cache.get("a") == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Test LRU eviction, with reads refreshing recency"""
+    cache = TTLCache(maxsize=2, ttl=0)
+    
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_zero_maxsize_disables_cache():
+    """Test that nothing is stored when maxsize is 0"""
+    cache = TTLCache(maxsize=0)
+    
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_search_racing_a_write_is_not_cached(local_vector_service):
+    """Test that results computed before a write are not cached after it"""
+    service = local_vector_service
+    await service.add_document("alpha beta gamma")
+    
+    gate = asyncio.Event()
+    run_search = service._run_search
+    
+    async def gated_search(*args):
+        await gate.wait()
+        return await run_search(*args)
+    
+    service._run_search = gated_search
+    search = asyncio.create_task(service.search("alpha", 3))
+    await asyncio.sleep(0)
+    await service.add_document("alpha delta")
+    gate.set()
+    await search
+    
+    assert len(service.search_cache) == 0
+    hits = await service.search("alpha", 3)
+    assert len(hits) == 2
+    assert len(service.search_cache) == 1
+    assert await service.search("alpha", 3) == hits
+    assert service.search_cache.stats()["hits"] == 1
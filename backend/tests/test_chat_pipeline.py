@@ -0,0 +1,130 @@
+"""Tests for the retrieval-augmented chat pipeline and its API wiring"""
+import pytest
+import pytest_asyncio
+from fastapi import status
+from httpx import AsyncClient
+
+from main import app
+
+DOCUMENTS = [
+    "The warehouse ships orders every weekday morning",
+    "Refunds are issued within five business days",
+    "Support is reachable by email and phone",
+    "Orders over fifty dollars ship for free",
+]
+
+
+@pytest_asyncio.fixture
+async def documents(local_vector_service):
+    for content in DOCUMENTS:
+        await local_vector_service.add_document(content)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_matches_sequential_path(
+    chat_pipeline, llm_service_factory, local_vector_service, documents
+):
+    """Test that answers, prompts and sources match searching, then generating"""
+    sequential = llm_service_factory()
+    
+    for message in ["when do orders ship", "and refunds"]:
+        result = await chat_pipeline.chat(message, "c1", use_vector_db=True)
+        
+        hits = await local_vector_service.search(query=message, top_k=3)
+        context = "\n\n".join(hit.content for hit in hits)
+        expected = await sequential.chat(message, "c1", context)
+        
+        assert result["message"] == expected["message"]
+        assert result["prompt_tokens"] == expected["prompt_tokens"]
+        assert [hit.content for hit in result["sources"]] == [hit.content for hit in hits]
+        assert result["conversation_id"] == "c1"
+        assert set(result["timings"]) >= {"history_ms", "retrieval_ms", "generation_ms", "total_ms"}
+    
+    assert chat_pipeline.llm.llm.prompts == sequential.llm.prompts
+
+
+@pytest.mark.asyncio
+async def test_pipeline_without_retrieval_starts_conversation(chat_pipeline):
+    """Test that a turn without retrieval has no sources and gets a new conversation ID"""
+    result = await chat_pipeline.chat("hello")
+    
+    assert result["sources"] is None
+    assert result["conversation_id"]
+    assert chat_pipeline.llm.llm.prompts == ["hello\n\nUser: hello\nAssistant:"]
+
+
+@pytest.mark.asyncio
+async def test_generation_errors_propagate(chat_pipeline, documents):
+    """Test that a failing backend fails the turn without saving it"""
+    chat_pipeline.llm.llm.error = RuntimeError("backend down")
+    
+    with pytest.raises(Exception, match="backend down"):
+        await chat_pipeline.chat("when do orders ship", "c1", use_vector_db=True)
+    assert chat_pipeline.llm.conversations.get_messages("c1") == []
+
+
+@pytest.mark.asyncio
+async def test_retrieval_errors_propagate(chat_pipeline, monkeypatch):
+    """Test that a failing search fails the turn before generation"""
+    async def search(query, top_k):
+        raise RuntimeError("index unavailable")
+    
+    monkeypatch.setattr(chat_pipeline.vector_db, "search", search)
+    
+    with pytest.raises(RuntimeError, match="index unavailable"):
+        await chat_pipeline.chat("when do orders ship", use_vector_db=True)
+    assert chat_pipeline.llm.llm.prompts == []
+
+
+@pytest.mark.asyncio
+async def test_rest_chat_uses_pipeline(chat_pipeline, documents):
+    """Test the REST chat endpoint's answer and its errors"""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/v1/chat", json={
+            "message": "when do orders ship",
+            "conversation_id": "c1",
+            "use_vector_db": True
+        })
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["message"] == "answer 1"
+        assert data["conversation_id"] == "c1"
+        assert len(data["sources"]) == 3
+        assert {"content", "score", "metadata"} <= set(data["sources"][0])
+        
+        chat_pipeline.llm.llm.error = RuntimeError("backend down")
+        response = await client.post("/api/v1/chat", json={"message": "hello"})
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert "backend down" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_graphql_chat_uses_pipeline(chat_pipeline, documents):
+    """Test the GraphQL chat mutation's answer and its errors"""
+    query = """
+        mutation Chat($message: String!) {
+            chat(input: {message: $message, conversationId: "c1", useVectorDb: true}) {
+                message
+                conversationId
+                sources
+            }
+        }
+    """
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/graphql", json={
+            "query": query,
+            "variables": {"message": "when do orders ship"}
+        })
+        
+        data = response.json()
+        assert "errors" not in data
+        assert data["data"]["chat"]["message"] == "answer 1"
+        assert len(data["data"]["chat"]["sources"]) == 3
+        
+        chat_pipeline.llm.llm.error = RuntimeError("backend down")
+        response = await client.post("/graphql", json={
+            "query": query,
+            "variables": {"message": "hello"}
+        })
+        assert "backend down" in response.json()["errors"][0]["message"]
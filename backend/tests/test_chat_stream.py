@@ -0,0 +1,117 @@
+"""Tests for streamed chat over SSE and the GraphQL subscription"""
+import json
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.api.graphql.schema import schema
+from app.services.chat_pipeline import ChatPipeline, chat_pipeline_provider
+from app.services.ingestion_jobs import ingestion_job_manager
+from app.services.llm_service import LLMService, llm_provider
+from main import app
+
+
+@pytest.fixture
+def stream_pipeline(stub_server, local_vector_service, monkeypatch, tmp_path):
+    """A chat pipeline whose LLM service talks to the stub Ollama server"""
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "ollama")
+    monkeypatch.setattr(settings, "OLLAMA_BASE_URL", f"http://127.0.0.1:{stub_server.server_address[1]}")
+    monkeypatch.setattr(settings, "OLLAMA_BASE_URLS", [])
+    monkeypatch.setattr(settings, "LLM_HTTP_RETRIES", 0)
+    monkeypatch.setattr(settings, "CONVERSATION_BACKEND", "memory")
+    monkeypatch.setattr(settings, "SEMANTIC_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "SERVICE_WARMUP", False)
+    monkeypatch.setattr(ingestion_job_manager, "job_directory", tmp_path / "jobs")
+    
+    pipeline = ChatPipeline(LLMService(), local_vector_service)
+    monkeypatch.setattr(llm_provider, "_instance", pipeline.llm)
+    monkeypatch.setattr(chat_pipeline_provider, "_instance", pipeline)
+    return pipeline
+
+
+def _events(response):
+    """Parse server-sent events into (event, data) pairs"""
+    events = []
+    for block in response.text.split("\n\n"):
+        if not block:
+            continue
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_sse_stream_sends_tokens_in_order_then_saves_turn(stream_pipeline, stub_server):
+    """Test that tokens arrive in order, then a done event, and the turn is saved"""
+    with TestClient(app) as client:
+        with client.stream("POST", "/api/v1/chat/stream", json={
+            "message": "hello",
+            "conversation_id": "c1"
+        }) as response:
+            assert response.status_code == status.HTTP_200_OK
+            assert response.headers["content-type"].startswith("text/event-stream")
+            response.read()
+        
+        events = _events(response)
+        prompt = "hello\n\nUser: hello\nAssistant:"
+        assert events[:-1] == [("token", {"token": "echo "}), ("token", {"token": prompt})]
+        done_event, done = events[-1]
+        assert done_event == "done"
+        assert done["conversation_id"] == "c1"
+        assert done["prompt_tokens"] > 0 and done["ttft_ms"] is not None
+        
+        messages = stream_pipeline.llm.conversations.get_messages("c1")
+        assert [(m.role, m.content) for m in messages] == [
+            ("user", "hello"),
+            ("assistant", f"echo {prompt}")
+        ]
+        
+        # The saved turn is part of the next prompt
+        with client.stream("POST", "/api/v1/chat/stream", json={
+            "message": "again",
+            "conversation_id": "c1"
+        }) as response:
+            response.read()
+        assert _events(response)[1][1]["token"].startswith(f"hello\necho {prompt}\n")
+    assert stub_server.requests == ["/api/generate", "/api/generate"]
+
+
+def test_sse_stream_reports_backend_errors(stream_pipeline, stub_server):
+    """Test that a failing backend ends the stream with an error event and saves nothing"""
+    stub_server.failures = 100
+    with TestClient(app) as client:
+        with client.stream("POST", "/api/v1/chat/stream", json={
+            "message": "hello",
+            "conversation_id": "c1"
+        }) as response:
+            response.read()
+    
+    events = _events(response)
+    assert [event for event, _ in events] == ["error"]
+    assert "503" in events[0][1]["detail"]
+    assert stream_pipeline.llm.conversations.get_messages("c1") == []
+
+
+@pytest.mark.asyncio
+async def test_graphql_subscription_streams_tokens(stream_pipeline):
+    """Test that the subscription yields tokens in order, then a done marker"""
+    subscription = await schema.subscribe("""
+        subscription {
+            chatStream(input: {message: "hello", conversationId: "c1"}) {
+                token
+                conversationId
+                done
+                promptTokens
+            }
+        }
+    """)
+    results = [result async for result in subscription]
+    
+    assert all(result.errors is None for result in results)
+    tokens = [result.data["chatStream"] for result in results]
+    assert [token["token"] for token in tokens] == ["echo ", "hello\n\nUser: hello\nAssistant:", ""]
+    assert [token["done"] for token in tokens] == [False, False, True]
+    assert tokens[-1]["promptTokens"] > 0
+    assert len(stream_pipeline.llm.conversations.get_messages("c1")) == 2
+    await stream_pipeline.llm.aclose()
@@ -0,0 +1,70 @@
+"""Tests for chunk deduplication by content hash"""
+import pytest
+
+from app.services.chunk_index import ChunkHashIndex
+
+
+def test_record_inserts_and_overwrites(tmp_path):
+    """Test that recording a known hash replaces its chunk ID"""
+    index = ChunkHashIndex(f"sqlite:///{tmp_path / 'chunks.db'}")
+    
+    index.record({"a": "chunk-1", "b": "chunk-2"})
+    index.record({"b": "chunk-3", "c": "chunk-4"})
+    
+    assert index.lookup(["a", "b", "c", "d"]) == {"a": "chunk-1", "b": "chunk-3", "c": "chunk-4"}
+    index.clear()
+    assert index.lookup(["a"]) == {}
+
+
+def test_hash_includes_metadata():
+    """Test that identical text under different metadata hashes differently"""
+    first = ChunkHashIndex.hash_chunk("text", {"tenant": "a"})
+    
+    assert first == ChunkHashIndex.hash_chunk("text", {"tenant": "a"})
+    assert first != ChunkHashIndex.hash_chunk("text", {"tenant": "b"})
+    assert first != ChunkHashIndex.hash_chunk("text", {})
+
+
+@pytest.mark.asyncio
+async def test_reingested_chunks_reuse_their_ids(local_vector_service):
+    """Test that re-adding a document embeds only the chunks that changed"""
+    service = local_vector_service
+    
+    first = await service.add_document("alpha beta", {"source": "a"})
+    await service.add_document("gamma", {"source": "a"})
+    again = await service.add_document("alpha beta", {"source": "a"})
+    
+    assert again == {"id": first["id"], "chunks_added": 0, "chunks_reused": 1}
+    assert len(service.vector_store) == 2
+    
+    other_tenant = await service.add_document("alpha beta", {"source": "b"})
+    assert other_tenant["chunks_reused"] == 0
+    assert other_tenant["id"] != first["id"]
+    assert len(service.vector_store) == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_collection_forgets_chunks(local_vector_service):
+    """Test that chunks are embedded again after the collection is deleted"""
+    service = local_vector_service
+    await service.add_document("alpha beta")
+    
+    await service.delete_collection()
+    result = await service.add_document("alpha beta")
+    
+    assert result["chunks_added"] == 1
+    assert len(service.vector_store) == 1
+
+
+@pytest.mark.asyncio
+async def test_indexes_are_kept_when_nothing_is_deleted(local_vector_service):
+    """Test that a provider without collection deletion keeps its dedup and keyword indexes"""
+    service = local_vector_service
+    await service.add_document("alpha beta")
+    service.provider = "pinecone"
+    
+    await service.delete_collection()
+    
+    assert service.bm25_index.stats()["chunks"] == 1
+    service.provider = "local"
+    assert (await service.add_document("alpha beta"))["chunks_reused"] == 1
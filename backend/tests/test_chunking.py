@@ -0,0 +1,66 @@
+"""Tests for splitting documents into chunks"""
+import random
+
+import pytest
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from app.services.chunking import StreamingTextSplitter
+
+
+def _document(seed, paragraph_break="\n\n"):
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "délta", "ε", "zeta", "日本語", "E-1042"]
+    paragraphs = [
+        "\n".join(
+            " ".join(rng.choice(words) for _ in range(rng.randint(1, 60)))
+            for _ in range(rng.randint(1, 4))
+        )
+        for _ in range(200)
+    ]
+    return paragraph_break + paragraph_break.join(paragraphs)
+
+
+def _stream(text, chunk_size, chunk_overlap, piece_size):
+    splitter = StreamingTextSplitter(chunk_size, chunk_overlap, window_chunks=4)
+    chunks = []
+    for start in range(0, len(text), piece_size):
+        chunks.extend(splitter.feed(text[start:start + piece_size]))
+    chunks.extend(splitter.finish())
+    return chunks
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(200, 40), (100, 0), (500, 100)])
+@pytest.mark.parametrize("piece_size", [1, 7, 333, 100000])
+def test_streaming_matches_whole_text_split(chunk_size, chunk_overlap, piece_size):
+    """Test that chunk boundaries and overlap match splitting the whole text"""
+    text = _document(chunk_size)
+    expected = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len
+    ).split_text(text)
+    
+    assert _stream(text, chunk_size, chunk_overlap, piece_size) == expected
+
+
+@pytest.mark.parametrize("paragraph_break", ["\n", " "])
+def test_streaming_without_paragraph_breaks(paragraph_break):
+    """Test that text without blank lines is split on lines or words"""
+    text = _document(1, paragraph_break).replace("\n", paragraph_break)
+    expected = RecursiveCharacterTextSplitter(
+        chunk_size=120,
+        chunk_overlap=20,
+        length_function=len
+    ).split_text(text)
+    
+    assert _stream(text, 120, 20, 50) == expected
+
+
+def test_short_text_is_split_on_finish():
+    """Test that text shorter than the window is split once it ends"""
+    splitter = StreamingTextSplitter(100, 10)
+    
+    assert list(splitter.feed("one two")) == []
+    assert list(splitter.feed(" three")) == []
+    assert list(splitter.finish()) == ["one two three"]
+    assert list(splitter.finish()) == []
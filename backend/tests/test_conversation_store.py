@@ -0,0 +1,112 @@
+"""Tests for the bounded conversation history backends"""
+import time
+
+import pytest
+
+from app.models.schemas import ChatMessage
+from app.services.conversation_store import (
+    ConversationStore,
+    InMemoryConversationStore,
+    SQLConversationStore,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable clock for both backends"""
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sql"])
+def make_store(request, tmp_path):
+    def make(max_conversations=100, idle_ttl=0, max_bytes=10 ** 6):
+        if request.param == "memory":
+            return InMemoryConversationStore(max_conversations, idle_ttl, max_bytes)
+        return SQLConversationStore(
+            f"sqlite:///{tmp_path / 'conversations.db'}", max_conversations, idle_ttl, max_bytes
+        )
+    return make
+
+
+def _message(content, role="user"):
+    return ChatMessage(role=role, content=content)
+
+
+def test_messages_are_appended_and_read_since(make_store):
+    """Test appending turns and reading the ones after an index"""
+    store = make_store()
+    
+    store.append_messages("c1", [_message("hi"), _message("hello", "assistant")])
+    store.append_messages("c1", [_message("more")])
+    
+    assert [m.content for m in store.get_messages("c1")] == ["hi", "hello", "more"]
+    messages, total = store.get_messages_since("c1", 2)
+    assert [m.content for m in messages] == ["more"] and total == 3
+    assert store.get_messages_since("c1", 3) == ([], 3)
+    assert store.get_messages_since("missing", 0) == ([], 0)
+    
+    store.delete("c1")
+    assert store.get_messages("c1") == []
+    assert store.stats()["conversations"] == 0
+
+
+def test_idle_conversations_expire(make_store, clock):
+    """Test that a conversation idle past the TTL is evicted, and reads keep it alive"""
+    store = make_store(idle_ttl=60)
+    store.append_messages("active", [_message("a")])
+    store.append_messages("idle", [_message("b")])
+    
+    clock[0] += 40
+    store.get_messages("active")
+    clock[0] += 40
+    
+    assert store.get_messages("idle") == []
+    assert [m.content for m in store.get_messages("active")] == ["a"]
+    assert store.stats()["evictions"] == 1
+
+
+def test_least_recently_used_is_evicted_over_count(make_store, clock):
+    """Test eviction of the least recently used conversation beyond max_conversations"""
+    store = make_store(max_conversations=2)
+    store.append_messages("a", [_message("a")])
+    clock[0] += 1
+    store.append_messages("b", [_message("b")])
+    clock[0] += 1
+    store.get_messages("a")
+    clock[0] += 1
+    store.append_messages("c", [_message("c")])
+    
+    assert store.get_messages("b") == []
+    assert store.get_messages("a") and store.get_messages("c")
+    assert store.stats()["conversations"] == 2
+
+
+def test_least_recently_used_is_evicted_over_bytes(make_store, clock):
+    """Test eviction by total UTF-8 size, summaries included"""
+    store = make_store(max_bytes=100)
+    store.append_messages("a", [_message("x" * 30)])
+    clock[0] += 1
+    store.append_messages("b", [_message("é" * 15)])
+    # role plus 30 bytes each
+    assert store.stats()["bytes"] == 2 * (len("user") + 30)
+    
+    store.set_summary("b", "日本" * 5, 2)
+    assert store.stats()["bytes"] == 2 * (len("user") + 30) + 30
+    assert store.get_summary("b") == ("日本" * 5, 2)
+    store.set_summary("b", "ok", 3)
+    assert store.stats()["bytes"] == 2 * (len("user") + 30) + 2
+    
+    clock[0] += 1
+    store.append_messages("c", [_message("y" * 30)])
+    assert store.get_messages("a") == []
+    assert store.get_messages("b") and store.get_messages("c")
+    assert store.stats()["bytes"] <= 100
+
+
+def test_base_class_is_abstract():
+    """Test that backends must implement the whole interface"""
+    with pytest.raises(TypeError):
+        ConversationStore(1, 0, 1)
@@ -0,0 +1,58 @@
+"""Tests for micro-batching embedding requests"""
+import asyncio
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.services.embedding_scheduler import EmbeddingScheduler
+
+
+class RecordingEmbeddings(Embeddings):
+    """Encodes each text's number as its vector and records every batch"""
+    
+    def __init__(self):
+        self.batches = []
+    
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(text.split("-")[1]), float(len(text))] for text in texts]
+    
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_get_their_own_vectors():
+    """Test that callers sharing batches each get the vectors of their texts"""
+    embeddings = RecordingEmbeddings()
+    scheduler = EmbeddingScheduler(embeddings, max_batch_size=8, batch_window_ms=20)
+    requests = [
+        [f"text-{caller * 10 + i}" for i in range(caller % 4 + 1)]
+        for caller in range(12)
+    ]
+    
+    results = await asyncio.gather(*[scheduler.embed_documents(texts) for texts in requests])
+    
+    for texts, vectors in zip(requests, results):
+        assert vectors == [[float(text.split("-")[1]), float(len(text))] for text in texts]
+    # 30 texts from 12 callers, in full batches of 8 and one remainder
+    assert sorted(len(batch) for batch in embeddings.batches) == [6, 8, 8, 8]
+    assert scheduler.stats()["texts"] == 30
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller():
+    """Test that an embedding error is raised to each caller in the batch"""
+    class FailingEmbeddings(RecordingEmbeddings):
+        def embed_documents(self, texts):
+            raise RuntimeError("model unavailable")
+    
+    scheduler = EmbeddingScheduler(FailingEmbeddings(), batch_window_ms=5)
+    
+    results = await asyncio.gather(
+        scheduler.embed_query("text-1"),
+        scheduler.embed_query("text-2"),
+        return_exceptions=True
+    )
+    
+    assert [str(result) for result in results] == ["model unavailable"] * 2
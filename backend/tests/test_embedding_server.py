@@ -0,0 +1,124 @@
+"""Tests for sharing one embedding model over a Unix socket"""
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.services.embedding_server import EmbeddingClient, EmbeddingServer
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeds a text as its length and word count, failing on request"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def embed_documents(self, texts):
+        self.calls += 1
+        if "fail" in texts:
+            raise ValueError("cannot embed")
+        return [[len(text) / 3, float(len(text.split())), 0.5] for text in texts]
+    
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def embedding_server(tmp_path):
+    """Run an embedding server on a socket under tmp_path in a background loop"""
+    socket_path = tmp_path / "embedding.sock"
+    server = EmbeddingServer(CountingEmbeddings(), str(socket_path), batch_window_ms=1)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    serving = asyncio.run_coroutine_threadsafe(server.serve_forever(), loop)
+    deadline = time.monotonic() + 5
+    while not socket_path.exists():
+        assert time.monotonic() < deadline and not serving.done()
+        time.sleep(0.01)
+    yield server
+    
+    async def shutdown():
+        # The listener and every open connection's handler
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_round_trip(embedding_server):
+    """Test that vectors, stats and errors come back over the socket"""
+    client = EmbeddingClient(embedding_server.socket_path, timeout=5)
+    texts = ["short", "a longer text with words", "ünïcödé"]
+    
+    vectors = client.embed_documents(texts)
+    expected = np.asarray(CountingEmbeddings().embed_documents(texts), dtype=np.float32)
+    assert np.array_equal(np.asarray(vectors, dtype=np.float32), expected)
+    assert client.embed_query("short") == vectors[0]
+    assert client.embed_documents([]) == []
+    
+    with pytest.raises(Exception, match="Embedding server error: cannot embed"):
+        client.embed_documents(["fail"])
+    # The connection stays usable after an error response
+    assert client.embed_documents(["short"]) == [vectors[0]]
+    
+    stats = client.stats()
+    assert stats["connections"] == 1
+    assert client.fallback_requests == 0
+
+
+def test_concurrent_threads_share_the_server(embedding_server):
+    """Test that threads on their own connections each get their own vectors"""
+    client = EmbeddingClient(embedding_server.socket_path, timeout=5)
+    results = {}
+    
+    def embed(i):
+        results[i] = client.embed_documents(["x" * i, "y"])
+    
+    threads = [threading.Thread(target=embed, args=(i,)) for i in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert all(results[i][0][0] == pytest.approx(i / 3) for i in range(1, 9))
+    assert all(results[i][1] == results[1][1] for i in range(1, 9))
+    assert embedding_server.scheduler.stats()["texts"] == 16
+
+
+def test_missing_socket_falls_back_to_local_model(tmp_path):
+    """Test that a missing socket embeds in-process, or fails without a fallback"""
+    socket_path = str(tmp_path / "missing.sock")
+    
+    with pytest.raises(FileNotFoundError):
+        EmbeddingClient(socket_path).embed_documents(["short"])
+    
+    loaded = []
+    
+    def load():
+        loaded.append(CountingEmbeddings())
+        return loaded[-1]
+    
+    client = EmbeddingClient(socket_path, fallback=load)
+    assert client.embed_documents(["short"]) == CountingEmbeddings().embed_documents(["short"])
+    assert client.embed_query("two words") == CountingEmbeddings().embed_query("two words")
+    assert len(loaded) == 1 and loaded[0].calls == 2
+    assert client.fallback_requests == 2
+
+
+def test_server_is_preferred_over_fallback(embedding_server):
+    """Test that a client with a fallback still prefers the server"""
+    fallback = CountingEmbeddings()
+    client = EmbeddingClient(embedding_server.socket_path, timeout=5, fallback=lambda: fallback)
+    
+    client.embed_documents(["short"])
+    assert fallback.calls == 0
+    assert embedding_server.scheduler.stats()["batches"] == 1
@@ -0,0 +1,129 @@
+"""Tests for background ingestion jobs shared between processes"""
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.services.ingestion_jobs import IngestionJobManager
+
+
+class FakeVectorService:
+    """Splits documents into words and records every ingested chunk ID"""
+    
+    def __init__(self):
+        self.ingested = Counter()
+        self.fail_after = None
+    
+    async def split_documents(self, texts):
+        return [text.split() for text in texts]
+    
+    async def ingest_chunks(self, chunks, metadatas, ids):
+        await asyncio.sleep(0.01)
+        if self.fail_after is not None:
+            if self.fail_after == 0:
+                raise RuntimeError("index unavailable")
+            self.fail_after -= 1
+        self.ingested.update(ids)
+        return ids, [False] * len(ids)
+
+
+async def _wait_for(manager, job_ids, status="completed"):
+    for _ in range(500):
+        if all(manager.get_job(job_id)["status"] == status for job_id in job_ids):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Jobs did not reach {status}")
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_once_across_managers(tmp_path):
+    """Test that two managers sharing a directory each run a job only once"""
+    service = FakeVectorService()
+    
+    async def get_service():
+        return service
+    
+    managers = [
+        IngestionJobManager(get_service, str(tmp_path), workers=2, batch_chunks=2)
+        for _ in range(2)
+    ]
+    job_ids = [
+        managers[0]._create_job([("one two three four five", {"n": i})])["job_id"]
+        for i in range(6)
+    ]
+    
+    await asyncio.gather(*[manager.start() for manager in managers])
+    try:
+        await _wait_for(managers[1], job_ids)
+    finally:
+        await asyncio.gather(*[manager.stop() for manager in managers])
+    
+    assert len(service.ingested) == 30
+    assert set(service.ingested.values()) == {1}
+    assert [job["job_id"] for job in managers[1].list_jobs()] == job_ids[::-1]
+    for job_id in job_ids:
+        assert not (tmp_path / job_id / "documents.jsonl").exists()
+        assert managers[1].get_job(job_id)["document_ids"] == [f"{job_id}-0"]
+
+
+@pytest.mark.asyncio
+async def test_status_is_read_from_disk(tmp_path):
+    """Test that any manager can report a job submitted through another"""
+    service = FakeVectorService()
+    
+    async def get_service():
+        return service
+    
+    submitter = IngestionJobManager(get_service, str(tmp_path))
+    observer = IngestionJobManager(get_service, str(tmp_path))
+    
+    job = await submitter.submit([("alpha beta", None)])
+    try:
+        await _wait_for(observer, [job["job_id"]])
+    finally:
+        await submitter.stop()
+    
+    assert observer.get_job(job["job_id"])["chunks_added"] == 2
+    assert observer.get_job("../state") is None
+    assert observer.get_job("00000000-0000-0000-0000-000000000000") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_job_resumes_from_checkpoint(tmp_path):
+    """Test that a failed job keeps its documents and a retry resumes where it stopped"""
+    service = FakeVectorService()
+    service.fail_after = 2
+    
+    async def get_service():
+        return service
+    
+    manager = IngestionJobManager(get_service, str(tmp_path), batch_chunks=2)
+    try:
+        job = await manager.submit([("one two three four five six seven", None)])
+        job_id = job["job_id"]
+        await _wait_for(manager, [job_id], status="failed")
+        
+        failed = manager.get_job(job_id)
+        assert failed["error"] == "index unavailable"
+        assert failed["committed_chunks"] == 4
+        assert (tmp_path / job_id / "documents.jsonl").exists()
+        
+        service.fail_after = None
+        retried = await manager.retry_job(job_id)
+        assert retried["status"] == "queued" and retried["error"] is None
+        await _wait_for(manager, [job_id])
+        with pytest.raises(ValueError, match="completed"):
+            await manager.retry_job(job_id)
+    finally:
+        await manager.stop()
+    
+    # Batches committed before the failure are not ingested again
+    assert service.ingested == Counter(f"{job_id}-{index}" for index in range(7))
+    assert manager.get_job(job_id)["committed_chunks"] == 7
+    assert manager.get_job(job_id)["document_ids"] == [f"{job_id}-0"]
+    assert not (tmp_path / job_id / "documents.jsonl").exists()
+    
+    assert manager.delete_job(job_id)
+    assert manager.get_job(job_id) is None
+    assert not manager.delete_job(job_id)
+    assert await manager.retry_job(job_id) is None
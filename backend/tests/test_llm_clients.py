@@ -0,0 +1,139 @@
+"""Tests for the pooled LLM HTTP clients against a local stub server"""
+import asyncio
+import socket
+import threading
+
+import httpx
+import pytest
+
+from app.services.llm_clients import HTTPTransport, OllamaClient, OpenAIClient
+
+
+def _url(server, path=""):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+@pytest.mark.asyncio
+async def test_ollama_generate_and_stream(stub_server):
+    """Test generation and streaming over the Ollama API"""
+    client = OllamaClient(HTTPTransport(_url(stub_server)), "stub")
+    
+    assert await client.generate("hello") == "echo hello"
+    assert [token async for token in client.stream("hello")] == ["echo ", "hello"]
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_openai_generate_and_stream(stub_server):
+    """Test generation and streaming over the OpenAI API"""
+    client = OpenAIClient(HTTPTransport(_url(stub_server, "/v1")), "stub")
+    
+    assert await client.generate("hello") == "echo hello"
+    assert [token async for token in client.stream("hello")] == ["echo ", "hello"]
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(stub_server):
+    """Test that sequential requests share one keep-alive connection"""
+    client = OllamaClient(HTTPTransport(_url(stub_server)), "stub")
+    
+    for _ in range(5):
+        await client.generate("hello")
+        async for _ in client.stream("hello"):
+            pass
+    
+    assert len(stub_server.requests) == 10
+    assert len(stub_server.connections) == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_retryable_status_is_retried(stub_server):
+    """Test that 503 responses are retried with backoff"""
+    transport = HTTPTransport(_url(stub_server), retries=2, retry_backoff=0.01)
+    client = OllamaClient(transport, "stub")
+    
+    stub_server.failures = 2
+    assert await client.generate("hello") == "echo hello"
+    assert transport.stats()["retries"] == 2
+    
+    stub_server.failures = 3
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.generate("hello")
+    assert transport.stats()["failures"] == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_connection_errors_are_retried():
+    """Test that refused connections are retried, then raised"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+    transport = HTTPTransport(url, retries=2, retry_backoff=0.01)
+    
+    with pytest.raises(httpx.ConnectError):
+        await transport.request("GET", "/api/tags")
+    assert transport.stats()["retries"] == 2
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_read_timeout_is_not_retried(stub_server):
+    """Test that a slow generation times out without being repeated"""
+    transport = HTTPTransport(_url(stub_server), read_timeout=0.2, retries=2, retry_backoff=0.01)
+    client = OllamaClient(transport, "stub")
+    
+    with pytest.raises(httpx.ReadTimeout):
+        await client.generate("slow")
+    assert stub_server.requests == ["/api/generate"]
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_health_check_is_cached(stub_server):
+    """Test that health checks ping the model list and reuse the result"""
+    transport = HTTPTransport(_url(stub_server), retries=0)
+    client = OllamaClient(transport, "stub", health_cache_seconds=60)
+    
+    assert await client.healthy()
+    assert await client.healthy()
+    assert stub_server.requests == ["/api/tags"]
+    
+    client.health_cache_seconds = 0
+    stub_server.failures = 1
+    assert not await client.healthy()
+    assert await client.healthy()
+    await client.aclose()
+
+
+def test_client_per_event_loop(stub_server):
+    """Test that each event loop gets a client, and that all are closed"""
+    transport = HTTPTransport(_url(stub_server))
+    
+    asyncio.run(transport.request("GET", "/api/tags"))
+    asyncio.run(transport.request("GET", "/api/tags"))
+    # The first loop's client is dropped once that loop has closed
+    assert len(transport._clients) == 1
+    
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(transport.request("GET", "/api/tags"), other_loop).result()
+        
+        async def use_and_close():
+            await transport.request("GET", "/api/tags")
+            clients = list(transport._clients.values())
+            await transport.aclose()
+            return clients
+        
+        clients = asyncio.run(use_and_close())
+        assert len(clients) == 2
+        assert all(client.is_closed for client in clients)
+        assert not transport._clients
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
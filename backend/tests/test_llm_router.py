@@ -0,0 +1,229 @@
+"""Tests for routing generations across several LLM backends"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.llm_clients import HTTPTransport, LLMClient, OllamaClient
+from app.services.llm_router import LLMRouter
+
+
+class FakeClient(LLMClient):
+    """In-process backend with a fixed latency that can be made to fail"""
+
+    def __init__(self, name: str, delay: float = 0.01):
+        super().__init__(HTTPTransport(f"http://{name}"), "fake", health_cache_seconds=0)
+        self.name = name
+        self.delay = delay
+        self.down = False
+        self.calls = 0
+        self.fail_after_first_token = False
+        self.error = None
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.down:
+            raise httpx.ConnectError(f"{self.name} is down")
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+    async def stream(self, prompt: str):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.down:
+            raise httpx.ConnectError(f"{self.name} is down")
+        yield self.name
+        if self.fail_after_first_token:
+            raise httpx.RemoteProtocolError(f"{self.name} dropped the stream")
+        yield "!"
+
+    async def ping(self) -> None:
+        if self.down:
+            raise httpx.ConnectError(f"{self.name} is down")
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_spreads_concurrent_requests():
+    """Test that concurrent requests are spread evenly"""
+    clients = [FakeClient(name) for name in ("a", "b", "c")]
+    router = LLMRouter(clients, affinity=False)
+
+    await asyncio.gather(*[router.generate("hi") for _ in range(30)])
+
+    assert [client.calls for client in clients] == [10, 10, 10]
+    assert all(backend["outstanding"] == 0 for backend in router.stats()["backends"])
+
+
+@pytest.mark.asyncio
+async def test_latency_policy_prefers_faster_backend():
+    """Test that the latency policy sends more requests to a faster backend"""
+    fast, slow = FakeClient("fast", delay=0.005), FakeClient("slow", delay=0.05)
+    router = LLMRouter([fast, slow], policy="latency", affinity=False)
+
+    for _ in range(10):
+        await asyncio.gather(*[router.generate("hi") for _ in range(4)])
+
+    assert fast.calls > 2 * slow.calls
+    latencies = {b["base_url"]: b["latency_ms"] for b in router.stats()["backends"]}
+    assert latencies["http://fast"] < latencies["http://slow"]
+
+
+@pytest.mark.asyncio
+async def test_failing_backend_is_ejected_and_readmitted():
+    """Test failover, ejection and readmission after a health check"""
+    healthy, failing = FakeClient("healthy"), FakeClient("failing")
+    failing.down = True
+    router = LLMRouter([healthy, failing], affinity=False, max_failures=2, eject_seconds=0.2)
+
+    results = [await router.generate("hi") for _ in range(10)]
+
+    assert results == ["healthy"] * 10
+    assert failing.calls == 2
+    stats = router.stats()["backends"][1]
+    assert stats["ejected"] and stats["ejections"] == 1
+
+    # Still down when the ejection expires, so it stays out
+    await asyncio.sleep(0.25)
+    await router.generate("hi")
+    assert failing.calls == 2
+    assert router.stats()["backends"][1]["ejections"] == 2
+
+    failing.down = False
+    await asyncio.sleep(0.25)
+    await asyncio.gather(*[router.generate("hi") for _ in range(4)])
+    assert failing.calls > 2
+
+
+@pytest.mark.asyncio
+async def test_all_backends_ejected_fails_open():
+    """Test that requests still reach a backend when all are ejected"""
+    client = FakeClient("only")
+    client.down = True
+    router = LLMRouter([client], max_failures=1, eject_seconds=60)
+
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectError):
+            await router.generate("hi")
+    assert client.calls == 3
+
+    client.down = False
+    assert await router.generate("hi") == "only"
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://backend/api/generate")
+    return httpx.HTTPStatusError(
+        f"{status} response", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_is_not_failed_over():
+    """Test that a 4xx response is raised without counting against the backend"""
+    first, second = FakeClient("first"), FakeClient("second")
+    first.error = second.error = _status_error(400)
+    router = LLMRouter([first, second], affinity=False, max_failures=1)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await router.generate("hi")
+    assert first.calls + second.calls == 1
+    assert all(
+        backend["routed_failures"] == 0 and not backend["ejected"]
+        for backend in router.stats()["backends"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_timeout_is_not_failed_over():
+    """Test that a slow generation is not repeated on another backend"""
+    first, second = FakeClient("first"), FakeClient("second")
+    first.error = second.error = httpx.ReadTimeout("timed out")
+    router = LLMRouter([first, second], affinity=False, max_failures=1)
+
+    with pytest.raises(httpx.ReadTimeout):
+        await router.generate("hi")
+    assert first.calls + second.calls == 1
+    assert all(backend["routed_failures"] == 0 for backend in router.stats()["backends"])
+
+
+@pytest.mark.asyncio
+async def test_overloaded_backend_is_failed_over():
+    """Test that 503 and 429 responses move the request to another backend"""
+    first, second = FakeClient("first"), FakeClient("second")
+    first.error = _status_error(503)
+    router = LLMRouter([first, second], affinity=False, max_failures=1)
+
+    assert {await router.generate("hi") for _ in range(2)} == {"second"}
+    assert router.stats()["backends"][0]["ejected"]
+
+    second.error = _status_error(429)
+    with pytest.raises(httpx.HTTPStatusError):
+        await router.generate("hi")
+    assert router.stats()["backends"][1]["routed_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_conversation_affinity():
+    """Test that a conversation stays on one backend unless it is busy"""
+    clients = [FakeClient(name) for name in ("a", "b", "c", "d")]
+    router = LLMRouter(clients, affinity=True, affinity_slack=1)
+
+    chosen = {await router.generate("hi", routing_key="conversation-1") for _ in range(10)}
+    assert len(chosen) == 1
+
+    spread = {await router.generate("hi", routing_key=f"conversation-{i}") for i in range(40)}
+    assert len(spread) > 1
+
+    # Concurrent turns overflow to other backends past the slack
+    results = await asyncio.gather(*[
+        router.generate("hi", routing_key="conversation-1") for _ in range(8)
+    ])
+    assert len(set(results)) > 1
+
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_token():
+    """Test that streams move to another backend only before output starts"""
+    first, second = FakeClient("first"), FakeClient("second")
+    router = LLMRouter([first, second], affinity=False)
+
+    first.down = True
+    tokens = [token async for token in router.stream("hi")]
+    tokens += [token async for token in router.stream("hi")]
+    assert tokens == ["second", "!", "second", "!"]
+
+    first.down = False
+    second.fail_after_first_token = True
+    first.fail_after_first_token = True
+    received = []
+    with pytest.raises(httpx.RemoteProtocolError):
+        async for token in router.stream("hi"):
+            received.append(token)
+    assert len(received) == 1
+
+
+@pytest.mark.asyncio
+async def test_routes_across_local_http_backends(stub_server_factory):
+    """Test balancing and failover across two stub Ollama servers"""
+    servers = [stub_server_factory() for _ in range(2)]
+    clients = [
+        OllamaClient(HTTPTransport(f"http://127.0.0.1:{s.server_address[1]}", retries=0), "stub")
+        for s in servers
+    ]
+    router = LLMRouter(clients, affinity=False, max_failures=1, eject_seconds=60)
+
+    try:
+        results = await asyncio.gather(*[router.generate("hello") for _ in range(10)])
+        assert results == ["echo hello"] * 10
+        assert all(server.requests for server in servers)
+
+        servers[0].failures = 100
+        served = len(servers[1].requests)
+        results = await asyncio.gather(*[router.generate("hello") for _ in range(10)])
+        assert results == ["echo hello"] * 10
+        assert len(servers[1].requests) == served + 10
+        assert router.stats()["backends"][0]["ejected"]
+    finally:
+        await router.aclose()
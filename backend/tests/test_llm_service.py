@@ -0,0 +1,109 @@
+"""Tests for conversation history windows and running summaries"""
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.tokens import count_tokens
+
+
+def _question(i):
+    return f"question q{i}x about the alpha beta gamma delta service"
+
+
+async def _settle(service):
+    """Wait for background summary updates to finish"""
+    while service._background_tasks:
+        await asyncio.gather(*list(service._background_tasks))
+
+
+async def _converse(service, turns, start=0, context=None):
+    for i in range(start, start + turns):
+        await service.chat(_question(i), "c1", context)
+        await _settle(service)
+
+
+def _summarized_lines(service):
+    """Transcript lines sent to the summarizer, in order"""
+    lines = []
+    for prompt in service.llm.summaries:
+        transcript = prompt.split("New lines:\n", 1)[1].rsplit("\n\nNew summary:", 1)[0]
+        lines.extend(transcript.split("\n"))
+    return lines
+
+
+def _assert_nothing_lost(service):
+    """Every stored message is either summarized exactly once or in the window"""
+    history = service.conversations.get_messages("c1")
+    summary, summarized = service.conversations.get_summary("c1")
+    buffer = service._prompt_buffers.get("c1")
+    assert _summarized_lines(service) == [
+        f"{msg.role.capitalize()}: {msg.content}" for msg in history[:summarized]
+    ]
+    assert buffer.start <= summarized
+    assert buffer.prefix == "".join(
+        f"{msg.content}\n" for msg in history[buffer.start:buffer.message_count]
+    )
+
+
+@pytest.mark.asyncio
+async def test_window_keeps_newest_turns_within_budget(llm_service, monkeypatch):
+    """Test that the window policy keeps a contiguous run of the newest turns"""
+    monkeypatch.setattr(settings, "HISTORY_POLICY", "window")
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET", 80)
+    
+    await _converse(llm_service, 12)
+    result = await llm_service.chat(_question(12), "c1")
+    
+    assert result["prompt_tokens"] <= 80
+    history = llm_service.conversations.get_messages("c1")
+    buffer = llm_service._prompt_buffers.get("c1")
+    assert 0 < buffer.start < len(history) - 2
+    kept = "".join(f"{msg.content}\n" for msg in history[buffer.start:-2])
+    assert llm_service.llm.prompts[-1].startswith(kept)
+    assert _question(0) not in llm_service.llm.prompts[-1]
+    assert llm_service.llm.summaries == []
+
+
+@pytest.mark.asyncio
+async def test_summary_rolls_up_dropped_turns(llm_service, monkeypatch):
+    """Test that the summary takes in exactly the turns that left the window"""
+    monkeypatch.setattr(settings, "HISTORY_POLICY", "summary")
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET", 120)
+    
+    await _converse(llm_service, 12)
+    
+    summary, summarized = llm_service.conversations.get_summary("c1")
+    assert len(llm_service.llm.summaries) > 1
+    assert summary == f"summary {len(llm_service.llm.summaries)}"
+    assert summarized > 0
+    _assert_nothing_lost(llm_service)
+    
+    # The next prompt starts with the summary, then the unsummarized turns
+    await llm_service.chat(_question(12), "c1")
+    history = llm_service.conversations.get_messages("c1")
+    prompt = llm_service.llm.prompts[-1]
+    assert prompt.startswith(f"Summary of the earlier conversation:\n{summary}\n\n{history[summarized].content}")
+    assert all(msg.content not in prompt for msg in history[:summarized] if msg.role == "user")
+    await _settle(llm_service)
+
+
+@pytest.mark.asyncio
+async def test_large_context_turn_loses_no_history(llm_service, monkeypatch):
+    """Test that turns pushed out by a large context are all summarized"""
+    monkeypatch.setattr(settings, "HISTORY_POLICY", "summary")
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET", 200)
+    
+    await _converse(llm_service, 5)
+    assert llm_service.llm.summaries == []
+    
+    context = " ".join(f"fact{i}" for i in range(150))
+    assert count_tokens(context) > 100
+    await _converse(llm_service, 1, start=5, context=context)
+    # Over budget, but every turn the summary had not taken in is kept
+    assert all(_question(i) in llm_service.llm.prompts[-1] for i in range(5))
+    _assert_nothing_lost(llm_service)
+    assert llm_service.conversations.get_summary("c1")[1] > 0
+    
+    await _converse(llm_service, 3, start=6)
+    _assert_nothing_lost(llm_service)
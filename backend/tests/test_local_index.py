@@ -0,0 +1,171 @@
+"""Tests for the memory-mapped local vector index"""
+import threading
+
+import numpy as np
+import pytest
+
+from app.services.local_index import LocalVectorIndex
+
+
+def _vectors(count, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_search_survives_concurrent_clear(tmp_path):
+    """Test that searches racing clear() and re-ingestion never fail"""
+    index = LocalVectorIndex(str(tmp_path / "index"))
+    vectors = _vectors(200)
+    ids = [f"doc-{i}" for i in range(200)]
+    texts = [f"text {i}" for i in range(200)]
+    metadatas = [{"source": f"file-{i % 4}"} for i in range(200)]
+    index.upsert(ids, vectors.tolist(), texts, metadatas)
+    
+    errors = []
+    stop = threading.Event()
+    
+    def search():
+        try:
+            while not stop.is_set():
+                for doc_id, text, metadata, _ in index.search(vectors[3].tolist(), 5):
+                    assert text == f"text {doc_id.split('-')[1]}"
+                index.search(vectors[3].tolist(), 5, filter_metadata={"source": "file-3"})
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(50):
+        index.clear()
+        index.upsert(ids, vectors.tolist(), texts, metadatas)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+
+
+def test_upsert_and_search(tmp_path):
+    """Test exact top-k over inserted vectors, with and without a filter"""
+    index = LocalVectorIndex(str(tmp_path))
+    vectors = _vectors(50)
+    index.upsert(
+        [f"doc-{i}" for i in range(50)],
+        vectors.tolist(),
+        [f"text {i}" for i in range(50)],
+        [{"even": i % 2 == 0} for i in range(50)]
+    )
+    
+    expected = np.argsort(-(vectors @ vectors[7]))[:3]
+    results = index.search(vectors[7].tolist(), 3)
+    assert [doc_id for doc_id, *_ in results] == [f"doc-{i}" for i in expected]
+    assert results[0][1:] == ("text 7", {"even": False}, pytest.approx(0.0, abs=1e-5))
+    
+    filtered = index.search(vectors[7].tolist(), 5, filter_metadata={"even": True})
+    assert len(filtered) == 5
+    assert all(metadata["even"] for _, _, metadata, _ in filtered)
+    assert len(index) == 50
+
+
+def test_overwrite_replaces_vector_and_record(tmp_path):
+    """Test that upserting a known ID overwrites it in place"""
+    index = LocalVectorIndex(str(tmp_path))
+    vectors = _vectors(3)
+    index.upsert(["a", "b"], vectors[:2].tolist(), ["first", "second"], [{"v": 1}, {"v": 1}])
+    
+    index.upsert(["a"], vectors[2:].tolist(), ["replaced"], [{"v": 2}])
+    
+    assert len(index) == 2
+    assert index.get(["a", "b"]) == [("a", "replaced", {"v": 2}), ("b", "second", {"v": 1})]
+    assert index.search(vectors[2].tolist(), 1)[0][0] == "a"
+    assert index.search(vectors[0].tolist(), 2, filter_metadata={"v": 1})[0][0] == "b"
+    
+    reopened = LocalVectorIndex.load(str(tmp_path))
+    assert reopened.get(["a"]) == [("a", "replaced", {"v": 2})]
+
+
+def test_uncommitted_rows_are_truncated(tmp_path):
+    """Test that rows written past the manifest by a crash are discarded"""
+    index = LocalVectorIndex(str(tmp_path))
+    vectors = _vectors(3)
+    index.upsert(["a"], vectors[:1].tolist(), ["a"], [{}])
+    # A crash after appending a row but before committing the manifest
+    for name, data in (
+        (LocalVectorIndex.VECTORS_FILE, vectors[1].tobytes()),
+        (LocalVectorIndex.OFFSETS_FILE, np.zeros(2, dtype=np.uint64).tobytes()),
+        (LocalVectorIndex.IDS_FILE, b"lost\n"),
+    ):
+        with open(tmp_path / name, "ab") as f:
+            f.write(data)
+    
+    reopened = LocalVectorIndex(str(tmp_path))
+    assert len(reopened) == 1
+    reopened.upsert(["b"], vectors[2:].tolist(), ["b"], [{}])
+    
+    assert (tmp_path / LocalVectorIndex.VECTORS_FILE).stat().st_size == 2 * 8 * 4
+    assert reopened.get(["a", "b", "lost"]) == [("a", "a", {}), ("b", "b", {})]
+    assert LocalVectorIndex(str(tmp_path)).search(vectors[2].tolist(), 1)[0][0] == "b"
+
+
+def test_read_only_index_follows_the_writer(tmp_path):
+    """Test that a read-only index remaps to pick up committed rows"""
+    writer = LocalVectorIndex(str(tmp_path))
+    vectors = _vectors(4)
+    writer.upsert(["a", "b"], vectors[:2].tolist(), ["a", "b"], [{"n": 0}, {"n": 1}])
+    reader = LocalVectorIndex(str(tmp_path), read_only=True)
+    assert len(reader.search(vectors[0].tolist(), 10)) == 2
+    
+    writer.upsert(["c"], vectors[2:3].tolist(), ["c"], [{"n": 2}])
+    assert [doc_id for doc_id, *_ in reader.search(vectors[0].tolist(), 10, {"n": 2})] == ["c"]
+    assert [doc_id for doc_id, *_ in reader.search(vectors[0].tolist(), 10, {"n": 0})] == ["a"]
+    
+    writer.upsert(["a"], vectors[3:].tolist(), ["a2"], [{"n": 3}])
+    results = reader.search(vectors[3].tolist(), 10)
+    assert len(results) == 3
+    assert results[0][:3] == ("a", "a2", {"n": 3})
+    assert reader.search(vectors[0].tolist(), 10, {"n": 0}) == []
+    assert [doc_id for doc_id, *_ in reader.search(vectors[0].tolist(), 10, {"n": 3})] == ["a"]
+    with pytest.raises(ValueError):
+        reader.upsert(["d"], vectors[:1].tolist(), ["d"], [{}])
+    
+    writer.clear()
+    assert reader.search(vectors[0].tolist(), 10) == []
+
+
+def test_read_only_metadata_index_is_extended(tmp_path):
+    """Test that a reader indexes only new and overwritten rows after a remap"""
+    writer = LocalVectorIndex(str(tmp_path))
+    vectors = _vectors(30)
+    writer.upsert(
+        [f"doc-{i}" for i in range(20)],
+        vectors[:20].tolist(),
+        [f"text {i}" for i in range(20)],
+        [{"group": i % 4} for i in range(20)]
+    )
+    reader = LocalVectorIndex(str(tmp_path), read_only=True)
+    assert len(reader.search(vectors[0].tolist(), 20, {"group": 1})) == 5
+    
+    indexed = []
+    metadata_index = reader._metadata_index
+    add = metadata_index.add
+    metadata_index.add = lambda row, metadata: (indexed.append(row), add(row, metadata))
+    writer.upsert(["doc-20", "doc-1"], vectors[20:22].tolist(), ["new", "moved"], [{"group": 1}, {"group": 3}])
+    
+    results = reader.search(vectors[0].tolist(), 20, {"group": 1})
+    assert sorted(indexed) == [1, 20]
+    assert sorted(doc_id for doc_id, *_ in results) == ["doc-13", "doc-17", "doc-20", "doc-5", "doc-9"]
+    assert reader.get(["doc-20"]) == [("doc-20", "new", {"group": 1})]
+    assert "doc-1" in [doc_id for doc_id, *_ in reader.search(vectors[0].tolist(), 20, {"group": 3})]
+    
+    # Rebuilt from scratch after the writer clears, even with more rows than before
+    writer.clear()
+    writer.upsert(
+        [f"other-{i}" for i in range(25)],
+        vectors[:25].tolist(),
+        ["other"] * 25,
+        [{"group": 9}] * 25
+    )
+    assert reader.search(vectors[0].tolist(), 30, {"group": 1}) == []
+    assert len(reader.search(vectors[0].tolist(), 30, {"group": 9})) == 25
+    assert reader.get(["doc-1", "other-3"]) == [("other-3", "other", {"group": 9})]
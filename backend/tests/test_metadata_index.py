@@ -0,0 +1,73 @@
+"""Tests for the metadata inverted index"""
+import random
+
+import numpy as np
+import pytest
+
+from app.services.metadata_index import MetadataIndex, matches_filter
+
+_VALUES = {
+    "team": ["billing", "logistics", "support"],
+    "year": [2021, 2022, 2023, 2024],
+    "score": [0.5, 1.5, 2.5],
+    "public": [True, False],
+    "tags": [["a"], ["a", "b"]],
+}
+_ORDERED = ["team", "year", "score"]
+
+
+def _random_metadata(rng):
+    # Keys are left out at random, so rows lack some of them
+    return {key: rng.choice(values) for key, values in _VALUES.items() if rng.random() < 0.8}
+
+
+def _random_condition(rng, key):
+    values = _VALUES[key]
+    operators = ["$eq", "$ne", "$in", "$nin"] + (["$gt", "$gte", "$lt", "$lte"] if key in _ORDERED else [])
+    kind = rng.choice(["plain"] + operators)
+    if kind == "plain":
+        return rng.choice(values)
+    if kind in ("$in", "$nin"):
+        return {kind: rng.sample(values, rng.randint(1, len(values)))}
+    if kind in ("$gt", "$gte") and rng.random() < 0.5:
+        # A range with both bounds
+        return {kind: min(values), "$lte": max(values)}
+    return {kind: rng.choice(values)}
+
+
+def _random_filter(rng, depth=0):
+    where = {}
+    for key in rng.sample(sorted(_VALUES), rng.randint(1, 2)):
+        where[key] = _random_condition(rng, key)
+    if depth < 2 and rng.random() < 0.4:
+        where[rng.choice(["$and", "$or"])] = [_random_filter(rng, depth + 1) for _ in range(rng.randint(1, 3))]
+    return where
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mask_matches_filter_on_random_filters(seed):
+    """Test that the index selects exactly the rows matches_filter accepts"""
+    rng = random.Random(seed)
+    rows = [_random_metadata(rng) for _ in range(300)]
+    index = MetadataIndex()
+    for row, metadata in enumerate(rows):
+        index.add(row, metadata)
+    # Replaced rows must leave no trace of their old metadata
+    for row in rng.sample(range(len(rows)), 50):
+        index.remove(row, rows[row])
+        rows[row] = _random_metadata(rng)
+        index.add(row, rows[row])
+    
+    for _ in range(200):
+        where = _random_filter(rng)
+        expected = np.array([matches_filter(metadata, where) for metadata in rows])
+        assert np.array_equal(index.mask(where, len(rows)), expected), where
+
+
+def test_unsupported_operator_is_rejected():
+    """Test that unknown operators raise instead of matching nothing"""
+    index = MetadataIndex()
+    index.add(0, {"year": 2024})
+    
+    with pytest.raises(ValueError):
+        index.mask({"year": {"$regex": "20.*"}}, 1)
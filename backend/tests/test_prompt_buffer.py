@@ -0,0 +1,116 @@
+"""Tests for the incrementally rendered conversation history"""
+import pytest
+
+from app.core.config import settings
+from app.models.schemas import ChatMessage
+from app.services.prompt_buffer import PromptBuffer
+from app.services.tokens import count_tokens
+
+
+def _messages(start, count):
+    return [
+        ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"message m{i}x with some words")
+        for i in range(start, start + count)
+    ]
+
+
+# Tokens per rendered message, the newline included
+SIZE = count_tokens("message m0x with some words") + 1
+
+
+def test_extend_renders_and_counts_messages():
+    """Test that appended messages are rendered once and counted"""
+    buffer = PromptBuffer()
+    buffer.extend(_messages(0, 3))
+    buffer.extend(_messages(3, 2))
+    
+    assert buffer.prefix == "".join(f"{m.content}\n" for m in _messages(0, 5))
+    assert buffer.tokens == 5 * SIZE
+    assert buffer.message_count == 5
+    assert buffer.start == 0
+
+
+def test_fit_within_budget_keeps_everything():
+    """Test that a history within budget is left untouched"""
+    buffer = PromptBuffer()
+    buffer.extend(_messages(0, 4))
+    prefix = buffer.prefix
+    
+    buffer.fit(4 * SIZE)
+    assert buffer.prefix == prefix
+    assert buffer.start == 0 and buffer.evict_to == 0
+
+
+def test_fit_trims_to_low_water_mark():
+    """Test that an over-budget history is trimmed well below the budget, then stays stable"""
+    buffer = PromptBuffer()
+    buffer.extend(_messages(0, 10))
+    budget = 8 * SIZE
+    
+    buffer.fit(budget)
+    assert buffer.tokens <= budget * PromptBuffer.LOW_WATER_RATIO
+    assert buffer.tokens + SIZE > budget * PromptBuffer.LOW_WATER_RATIO
+    assert buffer.evict_to == buffer.start == 10 - buffer.tokens // SIZE
+    assert buffer.prefix == "".join(f"{m.content}\n" for m in _messages(buffer.start, 10 - buffer.start))
+    
+    # Later turns reuse the same prefix until the budget is reached again
+    prefix = buffer.prefix
+    buffer.extend(_messages(10, 2))
+    buffer.fit(budget)
+    assert buffer.prefix.startswith(prefix)
+
+
+def test_fit_keeps_messages_past_limit():
+    """Test that a limited trim keeps unsummarized messages and records how far it would go"""
+    buffer = PromptBuffer()
+    buffer.extend(_messages(0, 10))
+    budget = 8 * SIZE
+    
+    buffer.fit(budget, limit=2)
+    assert buffer.start == 2
+    assert buffer.tokens == 8 * SIZE
+    assert buffer.evict_to > 2
+    
+    # Once the summary catches up, the rest is dropped as if trimmed
+    evict_to = buffer.evict_to
+    buffer.drop_before(evict_to)
+    buffer.fit(budget, limit=evict_to)
+    assert buffer.start == evict_to
+    assert buffer.tokens <= budget * PromptBuffer.LOW_WATER_RATIO
+
+
+def test_drop_before_rerenders_prefix():
+    """Test that dropping by store index rebuilds the prefix from the kept messages"""
+    buffer = PromptBuffer()
+    buffer.extend(_messages(0, 6))
+    
+    buffer.drop_before(4)
+    assert buffer.start == 4
+    assert buffer.tokens == 2 * SIZE
+    assert buffer.prefix == "".join(f"{m.content}\n" for m in _messages(4, 2))
+    
+    buffer.extend(_messages(6, 1))
+    assert buffer.prefix.endswith(f"{_messages(6, 1)[0].content}\n")
+    assert buffer.message_count == 7
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_rebuilt_after_eviction(llm_service, monkeypatch):
+    """Test that an evicted buffer is rebuilt from the store with the same prefix"""
+    monkeypatch.setattr(settings, "HISTORY_POLICY", "window")
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET", 10 ** 6)
+    for i in range(3):
+        await llm_service.chat(f"question {i}", "c1")
+    
+    before = await llm_service._get_prompt_buffer("c1")
+    llm_service._prompt_buffers.pop("c1")
+    after = await llm_service._get_prompt_buffer("c1")
+    assert after is not before
+    assert after.prefix == before.prefix
+    assert after.message_count == before.message_count == 6
+    
+    # A cleared conversation has fewer messages than the buffer consumed
+    llm_service.conversations.delete("c1")
+    await llm_service.chat("fresh start", "c1")
+    rebuilt = await llm_service._get_prompt_buffer("c1")
+    assert rebuilt.prefix == "fresh start\nanswer 4\n"
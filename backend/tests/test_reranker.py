@@ -0,0 +1,105 @@
+"""Tests for cross-encoder reranking and fitting context to a token budget"""
+import pytest
+import sentence_transformers
+
+from app.models.search_hit import SearchHit
+from app.services import reranker as reranker_module
+from app.services.chat_pipeline import ChatPipeline
+from app.services.reranker import CrossEncoderReranker
+from app.services.tokens import count_tokens
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how many query words the chunk contains"""
+    
+    def __init__(self, model_name, max_length=512, device="cpu"):
+        self.batches = []
+    
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.batches.append(pairs)
+        return [
+            float(sum(word in content.lower().split() for word in query.lower().split()))
+            for query, content in pairs
+        ]
+
+
+@pytest.fixture
+def reranker(monkeypatch):
+    monkeypatch.setattr(sentence_transformers, "CrossEncoder", FakeCrossEncoder)
+    return CrossEncoderReranker("fake-model")
+
+
+def _hit(content, score=0.5):
+    return SearchHit(content, score, {"source": content[:5]})
+
+
+def test_rerank_orders_by_score(reranker):
+    """Test that hits come back most relevant first, as copies with their scores"""
+    hits = [
+        _hit("nothing relevant at all here", 0.9),
+        _hit("refund policy", 0.8),
+        _hit("how long does a refund take under the policy", 0.7),
+    ]
+    
+    reranked = reranker.rerank("refund policy take", hits)
+    
+    assert [hit.content for hit in reranked] == [hits[2].content, hits[1].content, hits[0].content]
+    assert [hit.rerank_score for hit in reranked] == [3.0, 2.0, 0.0]
+    assert [hit.score for hit in reranked] == [0.7, 0.8, 0.9]
+    assert all(hit.rerank_score is None for hit in hits)
+    # Scored shortest first, so short chunks are not padded to the longest
+    assert [content for _, content in reranker.model.batches[0]] == sorted(
+        (hit.content for hit in hits), key=len
+    )
+    assert reranker.stats()["pairs"] == 3
+    assert reranker.rerank("query", []) == []
+
+
+def test_fit_context_stops_at_budget():
+    """Test that sources are kept in order, whole, until the budget is spent"""
+    hits = [_hit(" ".join(["word"] * n)) for n in (4, 5, 6, 3)]
+    sizes = [count_tokens(hit.content) for hit in hits]
+    
+    kept = ChatPipeline._fit_context(hits, sizes[0] + sizes[1])
+    assert kept == hits[:2]
+    
+    # A source that does not fit is skipped whole; a smaller later one may still fit
+    kept = ChatPipeline._fit_context(hits, sizes[0] + sizes[3])
+    assert kept == [hits[0], hits[3]]
+    assert sum(count_tokens(hit.content) for hit in kept) <= sizes[0] + sizes[3]
+
+
+def test_fit_context_keeps_best_source_over_budget():
+    """Test that the best source is kept, untruncated, even if it alone exceeds the budget"""
+    hits = [_hit(" ".join(["long"] * 50)), _hit("short")]
+    
+    kept = ChatPipeline._fit_context(hits, 10)
+    assert kept == [hits[0]]
+    assert kept[0].content == " ".join(["long"] * 50)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_reranks_within_budget(chat_pipeline, reranker, monkeypatch):
+    """Test that a reranked turn uses the best candidates that fit the context budget"""
+    monkeypatch.setattr(reranker_module.reranker_provider, "_instance", reranker)
+    for content in [
+        "shipping happens every weekday",
+        "refunds take five days after the refund is approved",
+        "refunds are approved by support",
+        "support answers email",
+    ]:
+        await chat_pipeline.vector_db.add_document(content)
+    
+    budget = count_tokens("refunds take five days after the refund is approved") + 1
+    result = await chat_pipeline.chat(
+        "refunds approved",
+        use_vector_db=True,
+        rerank=True,
+        rerank_candidates=4,
+        context_token_budget=budget
+    )
+    
+    scores = [hit.rerank_score for hit in result["sources"]]
+    assert scores == sorted(scores, reverse=True) and scores[0] == 2.0
+    assert sum(count_tokens(hit.content) for hit in result["sources"]) <= budget
+    assert "rerank_ms" in result["timings"]
@@ -0,0 +1,96 @@
+"""Tests for serializing service results straight to JSON responses"""
+from typing import List
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from httpx import AsyncClient
+from pydantic import TypeAdapter
+
+from app.api.rest import responses
+from app.api.rest.responses import FastJSONResponse
+from app.models.schemas import ChatResponse, SearchResult
+from app.models.search_hit import SearchHit
+
+
+@pytest.fixture(params=["json", "orjson"])
+def serializer(request, monkeypatch):
+    """Serialize with orjson when installed, and with the standard library fallback"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+def _hits():
+    return [
+        SearchHit("Café naïve — 日本語 😀", np.float32(0.1), {"lang": "fr", "weight": np.float64(2.5)}),
+        SearchHit("plain", 0.75, {"tags": ["a", "b"], "n": 3, "ok": True, "none": None}),
+    ]
+
+
+def test_search_results_match_json_response(serializer):
+    """Test that search hits serialize to the same bytes as the validated response model"""
+    hits = _hits()
+    expected = JSONResponse(jsonable_encoder(TypeAdapter(List[SearchResult]).validate_python(hits)))
+    
+    assert FastJSONResponse(hits).body == expected.body
+    # Non-ASCII text is written as UTF-8, not escaped
+    assert "日本語 😀".encode("utf-8") in expected.body
+
+
+def test_chat_response_matches_json_response(serializer):
+    """Test that a chat result with hits and numpy floats matches the old response"""
+    result = {
+        "message": "Ünïcode answer ✓",
+        "conversation_id": "c1",
+        "sources": [hit.to_dict() for hit in _hits()],
+        "prompt_tokens": 42,
+        "cached": False,
+        "timings": {"retrieval_ms": np.float64(1.5), "total_ms": np.float32(2.25)},
+    }
+    expected = JSONResponse(jsonable_encoder(ChatResponse(**{
+        **result,
+        "sources": [{**source, "score": float(source["score"])} for source in result["sources"]],
+        "timings": {name: float(value) for name, value in result["timings"].items()},
+    })))
+    
+    assert FastJSONResponse({**result, "sources": _hits()}).body == expected.body
+
+
+def test_unsupported_values_are_rejected(serializer):
+    """Test that values with no JSON form raise instead of being dropped"""
+    with pytest.raises(TypeError):
+        FastJSONResponse({"value": object()})
+
+
+def test_search_hits_validate_as_response_models():
+    """Test that hits still pass through a route's response model"""
+    hit = SearchHit("text", 0.5, {"source": "notes"}, rerank_score=1.5)
+    assert SearchResult.model_validate(hit).model_dump() == {
+        "content": "text",
+        "score": 0.5,
+        "metadata": {"source": "notes"}
+    }
+
+
+@pytest.mark.asyncio
+async def test_route_returning_hits_with_response_model():
+    """Test that a route can return hits directly and have them validated"""
+    app = FastAPI()
+    
+    @app.get("/hits", response_model=List[SearchResult])
+    async def hits():
+        return _hits()
+    
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/hits")
+    
+    assert response.status_code == 200
+    assert response.json() == [
+        {"content": hit.content, "score": float(hit.score), "metadata": jsonable_encoder(hit.metadata)}
+        for hit in _hits()
+    ]
@@ -0,0 +1,158 @@
+"""Tests for the semantic response cache"""
+import numpy as np
+import pytest
+
+from app.services import semantic_cache
+from app.services.semantic_cache import SemanticCache
+
+
+async def _embed(text):
+    return [1.0, 0.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_entries_from_another_model_are_dropped(tmp_path):
+    """Test that a cache reopened with another model or dimension misses instead of failing"""
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    cache = SemanticCache(_embed, url, model="small")
+    question = cache._normalize([1.0, 0.0, 0.0])
+    await cache.store(question, "context", "answer", 0.5)
+    assert await cache.lookup(question, "context") == "answer"
+    
+    # Same model with a different dimension
+    wider = cache._normalize([1.0, 0.0, 0.0, 0.0])
+    assert await cache.lookup(wider, "context") is None
+    await cache.store(wider, "context", "wider answer", 0.5)
+    assert cache.stats()["entries"] == 1
+    assert await cache.lookup(wider, "context") == "wider answer"
+    
+    assert await SemanticCache(_embed, url, model="small").lookup(wider, "context") == "wider answer"
+    other = SemanticCache(_embed, url, model="large")
+    assert await other.lookup(wider, "context") is None
+    assert other.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hit_times_are_written_in_batches(tmp_path):
+    """Test that lookups defer LRU updates until the next store"""
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    cache = SemanticCache(_embed, url, model="small", max_entries=2)
+    first, second, third = (
+        cache._normalize(vector) for vector in ([1.0, 0.0], [0.0, 1.0], [-1.0, 0.0])
+    )
+    await cache.store(first, None, "first", 0.1)
+    await cache.store(second, None, "second", 0.1)
+    
+    assert await cache.lookup(first) == "first"
+    assert len(cache._pending_hits) == 1
+    
+    # Evicts the least recently used entry, which is now the second
+    await cache.store(third, None, "third", 0.1)
+    assert cache._pending_hits == {}
+    reopened = SemanticCache(_embed, url, model="small")
+    assert await reopened.lookup(first) == "first"
+    assert await reopened.lookup(second) is None
+
+
+class FakeClock:
+    """Stands in for the time module so entries can be aged"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def cache_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'cache.db'}"
+
+
+@pytest.mark.asyncio
+async def test_threshold_boundary(cache_url):
+    """Test that a question exactly at the threshold hits and one just below misses"""
+    cache = SemanticCache(_embed, cache_url, model="small")
+    stored = cache._normalize([1.0, 0.0])
+    question = cache._normalize([0.8, 0.6])
+    await cache.store(stored, "context", "answer", 0.5)
+    similarity = float(stored @ question)
+    
+    cache.threshold = similarity
+    assert await cache.lookup(question, "context") == "answer"
+    # The same question with other context never hits
+    assert await cache.lookup(question, "other context") is None
+    
+    cache.threshold = float(np.nextafter(np.float32(similarity), np.float32(1.0)))
+    assert await cache.lookup(question, "context") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["lookups"] == 3
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_miss_and_are_deleted(cache_url, clock):
+    """Test that entries older than the TTL miss, then are deleted on the next store"""
+    cache = SemanticCache(_embed, cache_url, model="small", ttl=60)
+    old, new = cache._normalize([1.0, 0.0]), cache._normalize([0.0, 1.0])
+    await cache.store(old, None, "old", 0.5)
+    
+    clock.now += 60
+    assert await cache.lookup(old) == "old"
+    clock.now += 1
+    assert await cache.lookup(old) is None
+    assert cache.stats()["entries"] == 1
+    
+    await cache.store(new, None, "new", 0.5)
+    assert cache.stats()["entries"] == 1 and cache.stats()["evictions"] == 1
+    assert await cache.lookup(new) == "new"
+    reopened = SemanticCache(_embed, cache_url, model="small", ttl=60)
+    assert await reopened.lookup(new) == "new"
+    assert reopened.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted_at_capacity(cache_url, clock):
+    """Test that a full cache evicts the entry least recently stored or hit"""
+    cache = SemanticCache(_embed, cache_url, model="small", max_entries=3)
+    vectors = [cache._normalize(np.eye(4)[i]) for i in range(4)]
+    for i, vector in enumerate(vectors[:3]):
+        clock.now += 1
+        await cache.store(vector, None, f"answer {i}", 0.5)
+    
+    clock.now += 1
+    assert await cache.lookup(vectors[0]) == "answer 0"
+    clock.now += 1
+    await cache.store(vectors[3], None, "answer 3", 0.5)
+    
+    assert cache.stats()["entries"] == 3 and cache.stats()["evictions"] == 1
+    assert await cache.lookup(vectors[1]) is None
+    for i in (0, 2, 3):
+        assert await cache.lookup(vectors[i]) == f"answer {i}"
+    assert cache._matrix.shape == (3, 4)
+
+
+@pytest.mark.asyncio
+async def test_matrix_is_rebuilt_from_sqlite_after_restart(cache_url):
+    """Test that a reopened cache rebuilds the same matrix and answers the same lookups"""
+    cache = SemanticCache(_embed, cache_url, model="small")
+    rng = np.random.default_rng(0)
+    vectors = [cache._normalize(rng.standard_normal(8)) for _ in range(5)]
+    for i, vector in enumerate(vectors):
+        await cache.store(vector, f"context {i % 2}", f"answer {i}", 0.1 * (i + 1))
+    
+    reopened = SemanticCache(_embed, cache_url, model="small")
+    assert reopened.stats()["entries"] == 0
+    for i, vector in enumerate(vectors):
+        assert await reopened.lookup(vector, f"context {i % 2}") == f"answer {i}"
+    
+    assert np.array_equal(reopened._matrix, cache._matrix)
+    assert reopened._matrix.dtype == np.float32
+    assert reopened._ids == cache._ids
+    assert reopened._context_hashes == cache._context_hashes
+    assert reopened.stats()["latency_saved_ms"] == pytest.approx(1500.0)
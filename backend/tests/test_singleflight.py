@@ -0,0 +1,71 @@
+"""Tests for coalescing identical concurrent calls"""
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_run():
+    """Test that callers with the same key share one computation"""
+    flight = SingleFlight()
+    runs = []
+    
+    async def compute(value):
+        runs.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+    
+    results = await asyncio.gather(
+        *[flight.do("a", lambda: compute(1)) for _ in range(5)],
+        flight.do("b", lambda: compute(10))
+    )
+    
+    assert results == [2] * 5 + [20]
+    assert runs == [1, 10]
+    assert flight.stats() == {"calls": 2, "coalesced": 4, "in_flight": 0}
+    
+    # A later call runs again
+    assert await flight.do("a", lambda: compute(3)) == 6
+    assert runs == [1, 10, 3]
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    """Test that an exception is raised to every coalesced caller, then forgotten"""
+    flight = SingleFlight()
+    runs = 0
+    
+    async def fail():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    results = await asyncio.gather(*[flight.do("a", fail) for _ in range(3)], return_exceptions=True)
+    
+    assert runs == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        await flight.do("a", fail)
+    assert runs == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    """Test that one caller going away leaves the shared run going"""
+    flight = SingleFlight()
+    
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    first = asyncio.create_task(flight.do("a", compute))
+    second = asyncio.create_task(flight.do("a", compute))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first